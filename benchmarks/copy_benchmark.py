@@ -0,0 +1,111 @@
+"""Benchmark for BulkLoader COPY throughput at different ETL_COPY_WORKERS values.
+
+Transforms a synthetic CSV per mapping once (see transform_benchmark.py), then
+loads the transformed file into a scratch copy of the mapping's staging table
+(staging._bench_<table>, dropped afterwards) and reports rows/sec for:
+
+  * single   - one COPY straight into the table (INSERT mode, 1 worker)
+  * N conns  - parallel COPY over N dedicated connections into an UNLOGGED
+               staging table plus the INSERT ... SELECT into the target
+               (INSERT mode with ETL_COPY_WORKERS=N); the COPY phase alone
+               is shown in brackets
+
+Needs DATABASE_URL. Results depend heavily on network latency to the server:
+a local database is CPU bound and gains little, a remote one (Supabase) is
+bound by per-connection round trips and gains most.
+
+Usage:
+    python benchmarks/copy_benchmark.py [--rows 200000] [--mapping placement_history_events] [--workers 1 2 4 8]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from psycopg2 import sql  # noqa: E402
+
+from etl.db_connection import pooled_connection  # noqa: E402
+from etl.loader import BulkLoader  # noqa: E402
+from etl.mapper import MappingParser  # noqa: E402
+from etl.transformer import CSVTransformer  # noqa: E402
+from transform_benchmark import generate_csv  # noqa: E402
+
+
+def time_load(cursor, workers: int, table: tuple, path: str, columns: list) -> tuple:
+    """Load `path` into `table` the way INSERT mode does; returns (total secs, copy secs)."""
+    cursor.execute(sql.SQL("TRUNCATE {}").format(sql.Identifier(*table)))
+    loader = BulkLoader(copy_workers=workers)
+    columns_sql = sql.SQL(', ').join([sql.Identifier(col) for col in columns])
+
+    start = time.perf_counter()
+    if workers == 1:
+        loader._copy_from(cursor, sql.Identifier(*table), columns_sql, path)
+        return time.perf_counter() - start, time.perf_counter() - start
+
+    staged = loader._stage_rows(cursor, '.'.join(table), 0, path, columns)
+    copied = time.perf_counter() - start
+    try:
+        cursor.execute(sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {}").format(
+            sql.Identifier(*table), columns_sql, columns_sql, sql.Identifier(*staged)
+        ))
+    finally:
+        loader._drop_table(cursor, *staged)
+    return time.perf_counter() - start, copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200_000, help='Rows per synthetic file')
+    parser.add_argument('--mapping', action='append', help='Limit to one or more mapping names')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='COPY connections to try')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per setting (best is reported)')
+    args = parser.parse_args()
+
+    mapper = MappingParser(str(Path(__file__).resolve().parent.parent / 'Mappings'))
+    names = args.mapping or ['placement_history_events']
+    workers = sorted(set(args.workers) | {1})
+
+    print(f"{'mapping':<28} {'MB':>6} " + ' '.join(
+        f"{'single' if n == 1 else f'{n} conns':>22}" for n in workers))
+    with tempfile.TemporaryDirectory() as tmp, pooled_connection(autocommit=True) as conn:
+        cursor = conn.cursor()
+        for name in names:
+            mapping = mapper.load_mapping(name)
+            source = Path(tmp) / f"{name}.csv"
+            transformed = Path(tmp) / f"transformed_{name}.csv"
+            generate_csv(mapping, args.rows, source)
+            transformer = CSVTransformer(mapping, workers=1)
+            transformer.transform_csv(str(source), str(transformed), date.today(), source.name, 'benchmark')
+            with open(transformed, encoding='utf-8') as f:
+                columns = f.readline().strip().split(',')
+
+            schema, target = mapper.get_target_table(mapping).split('.')
+            table = (schema, f"_bench_{target}")
+            cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(*table)))
+            cursor.execute(sql.SQL("CREATE TABLE {} (LIKE {} INCLUDING ALL)").format(
+                sql.Identifier(*table), sql.Identifier(schema, target)
+            ))
+            try:
+                cells = []
+                for n in workers:
+                    runs = [time_load(cursor, n, table, str(transformed), columns) for _ in range(args.repeat)]
+                    total, copied = min(runs)
+                    rate = f"{transformer.row_count / total:,.0f}"
+                    if n > 1:
+                        rate += f" ({transformer.row_count / copied:,.0f})"
+                    cells.append(f"{rate:>22}")
+            finally:
+                cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(*table)))
+
+            size_mb = transformed.stat().st_size / 1024 / 1024
+            print(f"{name:<28} {size_mb:>6.1f} " + ' '.join(cells))
+    print("rows/sec end to end (COPY phase only)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark for ELT mode (`transform: elt`) against the Python coercion path.
+
+Generates a synthetic CSV per mapping (see transform_benchmark.py) and loads
+it into a scratch copy of the mapping's staging table without keys or
+indexes (staging._bench_<table>, dropped afterwards), single process,
+reporting rows/sec end to end for:
+
+  * python - CSVTransformer coerces every value, one COPY into the table
+  * elt    - CSVTransformer only projects, one COPY into an UNLOGGED text
+             landing table, then one INSERT ... SELECT coercing in SQL; the
+             Python + COPY phase alone is shown in brackets
+
+Needs DATABASE_URL. ELT moves the coercion work to the database server, so
+it helps most when the ETL process is the bottleneck (a small app container
+next to a larger database).
+
+Usage:
+    python benchmarks/elt_benchmark.py [--rows 200000] [--mapping contacts] [--repeat 3]
+"""
+import argparse
+import copy
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from psycopg2 import sql  # noqa: E402
+
+from etl.db_connection import pooled_connection  # noqa: E402
+from etl.elt import SqlCoercions  # noqa: E402
+from etl.loader import BulkLoader  # noqa: E402
+from etl.mapper import MappingParser  # noqa: E402
+from etl.transformer import CSVTransformer  # noqa: E402
+from transform_benchmark import generate_csv  # noqa: E402
+
+
+def time_load(cursor, mapping: dict, table: tuple, path: str) -> tuple:
+    """Transform and load `path` into `table`; returns (total secs, secs until the rows are in Postgres)."""
+    cursor.execute(sql.SQL("TRUNCATE {}").format(sql.Identifier(*table)))
+    loader = BulkLoader(copy_workers=1)
+    transformer = CSVTransformer(mapping, workers=1)
+
+    start = time.perf_counter()
+    with transformer.open_stream(path, date.today(), Path(path).name, 'benchmark') as stream:
+        columns_sql = sql.SQL(', ').join([sql.Identifier(col) for col in stream.columns])
+        if not transformer.elt:
+            loader._copy_from(cursor, sql.Identifier(*table), columns_sql, stream)
+            return time.perf_counter() - start, time.perf_counter() - start
+
+        landed = loader._land_rows(cursor, '.'.join(table), 0, stream, stream.columns, SqlCoercions(mapping))
+    copied = time.perf_counter() - start
+    try:
+        loader._copy_from(cursor, sql.Identifier(*table), columns_sql, landed)
+    finally:
+        loader._drop_table(cursor, *landed.table)
+    return time.perf_counter() - start, copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200_000, help='Rows per synthetic file')
+    parser.add_argument('--mapping', action='append', help='Limit to one or more mapping names')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per mode (best is reported)')
+    args = parser.parse_args()
+
+    mapper = MappingParser(str(Path(__file__).resolve().parent.parent / 'Mappings'))
+    names = args.mapping or ['contacts']
+
+    print(f"{'mapping':<28} {'MB':>6} {'python':>12} {'elt':>22}")
+    with tempfile.TemporaryDirectory() as tmp, pooled_connection(autocommit=True) as conn:
+        cursor = conn.cursor()
+        for name in names:
+            mapping = mapper.load_mapping(name)
+            source = Path(tmp) / f"{name}.csv"
+            generate_csv(mapping, args.rows, source)
+
+            schema, target = mapper.get_target_table(mapping).split('.')
+            table = (schema, f"_bench_{target}")
+            cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(*table)))
+            cursor.execute(sql.SQL("CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS)").format(
+                sql.Identifier(*table), sql.Identifier(schema, target)
+            ))
+            # Synthetic rows may leave key columns empty; only coercion cost is measured
+            cursor.execute("SELECT attname FROM pg_attribute WHERE attrelid = %s::regclass AND attnotnull AND attnum > 0",
+                           ('.'.join(table),))
+            for (column,) in cursor.fetchall():
+                cursor.execute(sql.SQL("ALTER TABLE {} ALTER COLUMN {} DROP NOT NULL").format(
+                    sql.Identifier(*table), sql.Identifier(column)
+                ))
+            try:
+                cells = []
+                for transform in ('python', 'elt'):
+                    variant = dict(copy.deepcopy(mapping), transform=transform)
+                    total, copied = min(time_load(cursor, variant, table, str(source)) for _ in range(args.repeat))
+                    rate = f"{args.rows / total:,.0f}"
+                    if transform == 'elt':
+                        rate += f" ({args.rows / copied:,.0f})"
+                    cells.append(rate)
+            finally:
+                cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(*table)))
+
+            size_mb = source.stat().st_size / 1024 / 1024
+            print(f"{name:<28} {size_mb:>6.1f} {cells[0]:>12} {cells[1]:>22}")
+    print("rows/sec end to end (ELT: Python + COPY phase only)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,9 @@
 import os
+import sys
 import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from etl.mapper import MappingParser
+from etl.partitions import is_partitioned, migrate_to_partitioned
 
 def create_staging_tables():
     """Create all staging tables in Supabase based on schema documentation."""
@@ -52,7 +55,7 @@ def create_staging_tables():
                 _raw_hash text,
                 _loaded_at timestamptz DEFAULT NOW(),
                 PRIMARY KEY (contact_sfid, _partition_date)
-            )
+            ) PARTITION BY RANGE (_partition_date)
         """,
         
         "staging.form_submission": """
@@ -89,7 +92,7 @@ def create_staging_tables():
                 _raw_hash text,
                 _loaded_at timestamptz DEFAULT NOW(),
                 PRIMARY KEY (form_submission_id, _partition_date)
-            )
+            ) PARTITION BY RANGE (_partition_date)
         """,
         
         "staging.job_applicant": """
@@ -117,7 +120,7 @@ def create_staging_tables():
                 _raw_hash text,
                 _loaded_at timestamptz DEFAULT NOW(),
                 PRIMARY KEY (job_applicant_sfid, _partition_date)
-            )
+            ) PARTITION BY RANGE (_partition_date)
         """,
         
         "staging.jobs_and_placements": """
@@ -153,7 +156,7 @@ def create_staging_tables():
                 _raw_hash text,
                 _loaded_at timestamptz DEFAULT NOW(),
                 PRIMARY KEY (job_sfid, _partition_date)
-            )
+            ) PARTITION BY RANGE (_partition_date)
         """,
         
         "staging.contacts_with_jobs": """
@@ -184,7 +187,7 @@ def create_staging_tables():
                 _raw_hash text,
                 _loaded_at timestamptz DEFAULT NOW(),
                 PRIMARY KEY (job_applicant_sfid, _partition_date)
-            )
+            ) PARTITION BY RANGE (_partition_date)
         """,
         
         "staging.job_applicant_history": """
@@ -204,7 +207,7 @@ def create_staging_tables():
                 _raw_hash text,
                 _loaded_at timestamptz DEFAULT NOW(),
                 PRIMARY KEY (job_applicant_sfid, edited_at, field_event, _partition_date)
-            )
+            ) PARTITION BY RANGE (_partition_date)
         """,
         
         "staging.placement_history": """
@@ -229,14 +232,18 @@ def create_staging_tables():
                 _raw_hash text,
                 _loaded_at timestamptz DEFAULT NOW(),
                 PRIMARY KEY (placement_sfid, edited_at, field_event, _partition_date)
-            )
+            ) PARTITION BY RANGE (_partition_date)
         """
     }
     
     for table_name, ddl in tables.items():
         print(f"Creating {table_name}...")
         cursor.execute(ddl)
-        print(f"✓ {table_name} created successfully")
+        if is_partitioned(cursor, table_name):
+            print(f"✓ {table_name} created successfully (partitioned by _partition_date)")
+        else:
+            print(f"⚠ {table_name} exists as an unpartitioned table; "
+                  f"run 'python db_setup.py --migrate-partitions' to convert it")
     
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS load_history (
@@ -253,11 +260,204 @@ def create_staging_tables():
             quarantine_path text
         )
     """)
+    # Keyset pagination for /api/history: newest first, optionally per table or status
+    cursor.execute("CREATE INDEX IF NOT EXISTS load_history_started_at_idx ON load_history (started_at, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS load_history_table_started_at_idx ON load_history (target_table, started_at, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS load_history_status_started_at_idx ON load_history (status, started_at, id)")
     print("✓ load_history table created successfully")
     
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS webhook_log (
+            id SERIAL PRIMARY KEY,
+            received_at timestamptz DEFAULT NOW(),
+            from_email text,
+            subject text,
+            attachments_count integer,
+            files_processed text[],
+            files_skipped text[],
+            files_failed text[],
+            status text NOT NULL,
+            error_message text,
+            load_ids integer[],
+            files_duplicate text[]
+        )
+    """)
+    cursor.execute("ALTER TABLE webhook_log ADD COLUMN IF NOT EXISTS files_duplicate text[]")
+    print("✓ webhook_log table created successfully")
+    
+    # Keyset pagination for /api/webhook-activity, optionally per status
+    cursor.execute("DROP INDEX IF EXISTS webhook_log_received_at_idx")
+    cursor.execute("CREATE INDEX IF NOT EXISTS webhook_log_received_at_id_idx ON webhook_log (received_at, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS webhook_log_status_received_at_idx ON webhook_log (status, received_at, id)")
+    # Dashboard: recent-failures list
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS webhook_log_failures_idx ON webhook_log (received_at)
+        WHERE status IN ('failed', 'partial')
+    """)
+    create_webhook_daily_stats(cursor)
+    print("✓ webhook_daily_stats rollup created successfully")
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS processed_files (
+            content_hash text NOT NULL,
+            target_table text NOT NULL,
+            load_id integer,
+            row_count integer,
+            file_name text,
+            load_date date NOT NULL,
+            processed_at timestamptz NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (content_hash, target_table, load_date)
+        )
+    """)
+    # Older installs keyed on (content_hash, target_table) only, which made a
+    # re-upload of the same file for a new partition date look like a duplicate
+    cursor.execute("""
+        SELECT COUNT(*) FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE i.indrelid = 'processed_files'::regclass AND i.indisprimary AND a.attname = 'load_date'
+    """)
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("DELETE FROM processed_files WHERE load_date IS NULL")
+        cursor.execute("ALTER TABLE processed_files DROP CONSTRAINT processed_files_pkey")
+        cursor.execute("ALTER TABLE processed_files ADD PRIMARY KEY (content_hash, target_table, load_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS processed_files_processed_at_idx ON processed_files (processed_at)")
+    print("✓ processed_files table created successfully")
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS etl_watermarks (
+            target_table text NOT NULL,
+            column_name text NOT NULL,
+            high_water timestamptz NOT NULL,
+            load_id integer,
+            load_date date,
+            updated_at timestamptz NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (target_table, column_name)
+        )
+    """)
+    cursor.execute("ALTER TABLE etl_watermarks ADD COLUMN IF NOT EXISTS load_date date")
+    print("✓ etl_watermarks table created successfully")
+    
     cursor.close()
     conn.close()
     print("\n✅ All staging tables created successfully!")
 
+def create_webhook_daily_stats(cursor):
+    """Create the per-day, per-status webhook_log rollup read by the dashboard.
+    
+    A trigger keeps it current on every webhook_log insert, update and
+    delete (each write moves the old row's contribution to the new one), so
+    every code path writing the log is covered. The first time, the rollup
+    is rebuilt from the existing log under a lock, in the same transaction
+    that attaches the trigger, so no row is missed or counted twice.
+    Days are calendar days in the session time zone, like DATE(received_at).
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS webhook_daily_stats (
+            day date NOT NULL,
+            status text NOT NULL,
+            webhooks integer NOT NULL DEFAULT 0,
+            files integer NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, status)
+        )
+    """)
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION webhook_daily_stats_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE webhook_daily_stats
+                SET webhooks = webhooks - 1,
+                    files = files - COALESCE(array_length(OLD.files_processed, 1), 0)
+                WHERE day = OLD.received_at::date AND status = OLD.status;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.received_at IS NOT NULL THEN
+                INSERT INTO webhook_daily_stats (day, status, webhooks, files)
+                VALUES (NEW.received_at::date, NEW.status, 1, COALESCE(array_length(NEW.files_processed, 1), 0))
+                ON CONFLICT (day, status) DO UPDATE
+                SET webhooks = webhook_daily_stats.webhooks + 1,
+                    files = webhook_daily_stats.files + EXCLUDED.files;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    
+    cursor.execute("""
+        SELECT 1 FROM pg_trigger
+        WHERE tgrelid = 'webhook_log'::regclass AND tgname = 'webhook_daily_stats_rollup'
+    """)
+    if cursor.fetchone():
+        return
+    
+    cursor.execute("BEGIN")
+    try:
+        cursor.execute("LOCK TABLE webhook_log IN SHARE ROW EXCLUSIVE MODE")
+        cursor.execute("DELETE FROM webhook_daily_stats")
+        cursor.execute("""
+            INSERT INTO webhook_daily_stats (day, status, webhooks, files)
+            SELECT received_at::date, status, COUNT(*), COALESCE(SUM(array_length(files_processed, 1)), 0)
+            FROM webhook_log
+            WHERE received_at IS NOT NULL
+            GROUP BY 1, 2
+        """)
+        cursor.execute("""
+            CREATE TRIGGER webhook_daily_stats_rollup
+            AFTER INSERT OR DELETE OR UPDATE OF received_at, status, files_processed ON webhook_log
+            FOR EACH ROW EXECUTE FUNCTION webhook_daily_stats_apply()
+        """)
+        cursor.execute("COMMIT")
+    except psycopg2.Error:
+        cursor.execute("ROLLBACK")
+        raise
+
+def migrate_staging_partitions(keep_legacy: bool = False):
+    """Convert existing unpartitioned staging tables to partitioned ones.
+    
+    Each table is migrated in its own transaction (see
+    etl.partitions.migrate_to_partitioned); loads into a table should be
+    paused while it is converted. Tables loaded with `load_mode: snapshot`
+    get daily partitions so each snapshot can be swapped in as a partition.
+    """
+    parser = MappingParser()
+    mappings = [parser.load_mapping(name) for name in parser.get_available_mappings()]
+    snapshot_tables = {
+        parser.get_target_table(mapping) for mapping in mappings
+        if parser.get_load_mode(mapping) == 'snapshot'
+    }
+    
+    DATABASE_URL = os.environ.get('DATABASE_URL')
+    if not DATABASE_URL:
+        raise ValueError("DATABASE_URL environment variable not set")
+    
+    conn = psycopg2.connect(DATABASE_URL)
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT n.nspname || '.' || c.relname
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_attribute a ON a.attrelid = c.oid AND a.attname = '_partition_date'
+        WHERE n.nspname = 'staging' AND c.relkind = 'r' AND NOT c.relispartition
+          AND c.relname NOT LIKE '%\\_legacy'
+        ORDER BY 1
+    """)
+    table_names = [row[0] for row in cursor.fetchall()]
+    conn.commit()
+    
+    for table_name in table_names:
+        print(f"Migrating {table_name}...")
+        try:
+            granularity = 'day' if table_name in snapshot_tables else None
+            partitions = migrate_to_partitioned(cursor, table_name, granularity, keep_legacy=keep_legacy)
+            conn.commit()
+            print(f"✓ {table_name} partitioned ({len(partitions)} partitions)")
+        except psycopg2.Error as e:
+            conn.rollback()
+            print(f"✗ {table_name} not migrated: {e}")
+    
+    cursor.close()
+    conn.close()
+
 if __name__ == "__main__":
     create_staging_tables()
+    if '--migrate-partitions' in sys.argv:
+        migrate_staging_partitions(keep_legacy='--keep-legacy' in sys.argv)
@@ -0,0 +1,81 @@
+"""Streaming attachment storage - writes, hashes and size-checks in one pass."""
+import base64
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Iterable, Iterator, Tuple
+
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024  # 100 MB
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+# Must stay a multiple of 4 so every slice decodes on its own
+BASE64_CHUNK_CHARS = 64 * 1024
+
+# b64decode() silently drops characters outside the alphabet (e.g. line breaks)
+_NON_BASE64 = re.compile(r'[^A-Za-z0-9+/=]')
+
+
+def iter_base64(text: str, chunk_chars: int = BASE64_CHUNK_CHARS) -> Iterator[bytes]:
+    """
+    Decode base64 text incrementally.
+
+    Yields decoded blocks of roughly chunk_chars * 3/4 bytes, so the decoded
+    attachment is never held in memory as a whole.
+
+    Raises:
+        binascii.Error: If the input is not valid base64
+    """
+    pending = ''
+    for start in range(0, len(text), chunk_chars):
+        piece = pending + _NON_BASE64.sub('', text[start:start + chunk_chars])
+        usable = len(piece) - len(piece) % 4
+        if usable:
+            yield base64.b64decode(piece[:usable])
+        pending = piece[usable:]
+
+    if pending:
+        # Leftover without a full quantum: let b64decode report the bad padding
+        yield base64.b64decode(pending)
+
+
+def save_stream(chunks: Iterable[bytes], dest: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> Tuple[str, int]:
+    """
+    Write chunks to dest through a temporary .part file in the same directory.
+
+    The SHA-256 and byte count are computed while writing and the size cap is
+    checked per chunk. dest only appears once the download is complete; on any
+    error the partial file is removed.
+
+    Args:
+        chunks: Byte blocks of the attachment
+        dest: Final file path
+        max_bytes: Size limit in bytes
+
+    Returns:
+        (sha256 hex digest, size in bytes)
+
+    Raises:
+        ValueError: If the attachment exceeds max_bytes
+    """
+    fd, part_path = tempfile.mkstemp(dir=dest.parent, prefix=f"{dest.name}.", suffix='.part')
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError(f"Attachment exceeded size limit during download (max {max_bytes} bytes)")
+                digest.update(chunk)
+                out.write(chunk)
+        os.replace(part_path, dest)
+    except BaseException:
+        try:
+            os.unlink(part_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    return digest.hexdigest(), size
@@ -1,7 +1,14 @@
 """CSV utility functions for handling duplicate headers and other edge cases."""
+import csv
+from io import StringIO
 from typing import List
 from collections import Counter
 
+from .encoding_utils import detect_encoding
+
+# Bytes read to find the header row (Salesforce headers are a few KB)
+HEADER_SAMPLE_BYTES = 64 * 1024
+
 
 def normalize_duplicate_headers(headers: List[str]) -> List[str]:
     """
@@ -29,3 +36,42 @@ def normalize_duplicate_headers(headers: List[str]) -> List[str]:
             normalized.append(f"{header}__{seen[header]}")
     
     return normalized
+
+
+def read_header(file_path: str) -> List[str]:
+    """
+    Read just the header row of a CSV file, decoded as the QA validator would.
+    
+    Only the first record is parsed. An ASCII header decodes the same in
+    every candidate encoding, so chardet (tens of ms) only runs for headers
+    with other bytes.
+    
+    Returns:
+        Header names as written (not normalized), empty if the file is empty
+    """
+    with open(file_path, 'rb') as f:
+        sample = f.read(HEADER_SAMPLE_BYTES)
+    
+    # First newline outside quotes ends the header record
+    end = -1
+    pos = 0
+    in_quotes = False
+    while True:
+        newline = sample.find(b'\n', pos)
+        if newline == -1:
+            break
+        if sample.count(b'"', pos, newline) % 2:
+            in_quotes = not in_quotes
+        pos = newline + 1
+        if not in_quotes:
+            end = newline
+            break
+    raw = sample if end == -1 else sample[:end]
+    
+    if raw.isascii():
+        text = raw.decode('ascii')
+    else:
+        encoding, errors_mode = detect_encoding(file_path)
+        text = raw.decode(encoding, errors=errors_mode)
+    
+    return next(csv.reader(StringIO(text)), [])
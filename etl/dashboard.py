@@ -0,0 +1,122 @@
+"""Webhook dashboard statistics, read from the webhook_daily_stats rollup."""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from etl.db_connection import pooled_connection
+
+DEFAULT_TTL_SECONDS = 10
+
+
+class WebhookStats:
+    """
+    Homepage webhook statistics with a short in-process cache.
+
+    Daily counts come from webhook_daily_stats (one row per day and status),
+    which a trigger on webhook_log keeps current on every insert/update (see
+    db_setup.py), so the cost does not grow with the log. Recent failures
+    are read through the partial index on failed rows. Results are reused
+    for `ttl_seconds` (ETL_DASHBOARD_CACHE_SECONDS, default 10; 0 disables
+    the cache); errors are raised and not cached.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = (ttl_seconds if ttl_seconds is not None
+                            else float(os.environ.get('ETL_DASHBOARD_CACHE_SECONDS', DEFAULT_TTL_SECONDS)))
+        self._lock = threading.Lock()
+        self._cached: Optional[Tuple[float, Dict[str, Any]]] = None
+
+    def get(self) -> Dict[str, Any]:
+        """
+        Dashboard statistics (shared between requests; do not modify).
+
+        Returns:
+            {'today': {'success', 'failed', 'total_files'},
+             'last_7_days': [{'date', 'success', 'failed', 'total_files'}, ...],
+             'recent_failures': [{'time', 'from', 'subject', 'error'}, ...]}
+        """
+        cached = self._cached
+        if cached and time.monotonic() - cached[0] < self.ttl_seconds:
+            return cached[1]
+
+        # One request refreshes; concurrent ones wait for its result
+        with self._lock:
+            cached = self._cached
+            if cached and time.monotonic() - cached[0] < self.ttl_seconds:
+                return cached[1]
+            stats = self._query()
+            self._cached = (time.monotonic(), stats)
+            return stats
+
+    def invalidate(self):
+        """Drop the cached statistics."""
+        self._cached = None
+
+    def _query(self) -> Dict[str, Any]:
+        stats = {
+            'today': {'success': 0, 'failed': 0, 'total_files': 0},
+            'last_7_days': [],
+            'recent_failures': []
+        }
+
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+
+            # Today's stats
+            cursor.execute("""
+                SELECT status, webhooks, files
+                FROM webhook_daily_stats
+                WHERE day = CURRENT_DATE
+            """)
+            for status, count, total_files in cursor.fetchall():
+                if status == 'success':
+                    stats['today']['success'] = count
+                    stats['today']['total_files'] = total_files
+                elif status in ('failed', 'partial'):
+                    stats['today']['failed'] += count
+
+            # Last 7 days trend
+            cursor.execute("""
+                SELECT
+                    day,
+                    COALESCE(SUM(webhooks) FILTER (WHERE status = 'success'), 0),
+                    COALESCE(SUM(webhooks) FILTER (WHERE status IN ('failed', 'partial')), 0),
+                    SUM(files)
+                FROM webhook_daily_stats
+                WHERE day >= CURRENT_DATE - 7
+                GROUP BY day
+                HAVING SUM(webhooks) > 0
+                ORDER BY day DESC
+            """)
+            stats['last_7_days'] = [
+                {
+                    'date': row[0].strftime('%b %d'),
+                    'success': row[1],
+                    'failed': row[2],
+                    'total_files': row[3] or 0
+                }
+                for row in cursor.fetchall()
+            ]
+
+            # Recent failures (last 5)
+            cursor.execute("""
+                SELECT received_at, from_email, subject, error_message
+                FROM webhook_log
+                WHERE status IN ('failed', 'partial')
+                ORDER BY received_at DESC
+                LIMIT 5
+            """)
+            stats['recent_failures'] = [
+                {
+                    'time': row[0].strftime('%b %d, %I:%M %p'),
+                    'from': row[1],
+                    'subject': row[2],
+                    'error': row[3]
+                }
+                for row in cursor.fetchall()
+            ]
+
+            cursor.close()
+
+        return stats
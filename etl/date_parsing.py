@@ -0,0 +1,156 @@
+"""Fast-path date/timestamp parsing with per-column format inference."""
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Any
+from dateutil import parser as date_parser
+
+
+# Fixed layouts Salesforce report exports emit, most common first.
+# 'iso' is handled by datetime.fromisoformat (covers 2024-10-15, 2024-10-15T10:30:00Z, ...).
+CANDIDATE_FORMATS = [
+    '%m/%d/%Y %I:%M %p',
+    '%m/%d/%Y',
+    'iso',
+    '%m/%d/%Y %H:%M',
+    '%m/%d/%Y %I:%M:%S %p',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y, %I:%M %p',
+]
+
+DEFAULT_SAMPLE_SIZE = 50
+DEFAULT_CACHE_SIZE = 4096
+
+
+def parse_with_dateutil(value: str) -> Optional[datetime]:
+    """Slow, permissive fallback parser."""
+    try:
+        return date_parser.parse(value)
+    except (ValueError, OverflowError):
+        return None
+
+
+def parse_with_format(value: str, fmt: str) -> Optional[datetime]:
+    """Parse with a single fixed layout, returning None if it doesn't match."""
+    try:
+        if fmt == 'iso':
+            # fromisoformat also accepts ISO week dates etc.; only take calendar dates
+            if len(value) < 10 or value[4] != '-' or value[7] != '-':
+                return None
+            return datetime.fromisoformat(value)
+        return datetime.strptime(value, fmt)
+    except ValueError:
+        return None
+
+
+class ColumnDateParser:
+    """
+    Parses one column's date/timestamp values to ISO strings.
+
+    The first `sample_size` distinct values are parsed with every candidate
+    layout (each match verified against dateutil) to infer the column's
+    dominant format. After that, values are parsed with that layout only and
+    dateutil is used for outliers. Results are memoized in a bounded LRU
+    keyed by the raw string.
+    """
+
+    def __init__(self, column: str, kind: str,
+                 sample_size: int = DEFAULT_SAMPLE_SIZE,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        if kind not in ('date', 'timestamptz'):
+            raise ValueError(f"Unsupported date kind: {kind}")
+
+        self.column = column
+        self.kind = kind
+        self.sample_size = sample_size
+        self.format: Optional[str] = None
+
+        self._format_votes: Dict[str, int] = {}
+        self._sampled = 0
+        self._fast_path = 0
+        self._fallback = 0
+        self._failed = 0
+
+        self._cached_parse = lru_cache(maxsize=cache_size)(self._parse)
+
+    def __call__(self, value: str) -> Optional[str]:
+        """Return the ISO representation of `value`, or None if unparseable."""
+        if not value:
+            return None
+        return self._cached_parse(value)
+
+    def _parse(self, value: str) -> Optional[str]:
+        if self.format is not None:
+            parsed = parse_with_format(value, self.format)
+            if parsed is not None:
+                self._fast_path += 1
+                return self._to_iso(parsed)
+        elif self._sampled < self.sample_size:
+            parsed = self._sample(value)
+            if parsed is not None:
+                self._fast_path += 1
+                return self._to_iso(parsed)
+
+        parsed = parse_with_dateutil(value)
+        if parsed is None:
+            self._failed += 1
+            return None
+        self._fallback += 1
+        return self._to_iso(parsed)
+
+    def _sample(self, value: str) -> Optional[datetime]:
+        """Try every candidate layout on a sample value and vote for the match."""
+        self._sampled += 1
+
+        parsed = None
+        for fmt in CANDIDATE_FORMATS:
+            candidate = parse_with_format(value, fmt)
+            # Only trust a layout that agrees with what dateutil would have produced
+            if candidate is not None and candidate == parse_with_dateutil(value):
+                self._format_votes[fmt] = self._format_votes.get(fmt, 0) + 1
+                parsed = candidate
+                break
+
+        if self._sampled >= self.sample_size and self._format_votes:
+            self.format = max(self._format_votes, key=self._format_votes.__getitem__)
+
+        return parsed
+
+    def _to_iso(self, parsed: datetime) -> str:
+        if self.kind == 'date':
+            return parsed.date().isoformat()
+        return parsed.isoformat()
+
+    def stats(self) -> Dict[str, Any]:
+        """Parse counters for this column."""
+        cache = self._cached_parse.cache_info()
+        values = cache.hits + cache.misses
+        return {
+            'kind': self.kind,
+            'format': self.format,
+            'values': values,
+            'cache_hits': cache.hits,
+            'fast_path': self._fast_path,
+            'fallback': self._fallback,
+            'failed': self._failed,
+            # Share of values served without touching dateutil
+            'hit_rate': round((cache.hits + self._fast_path) / values, 4) if values else 0.0,
+        }
+
+
+def merge_parse_stats(stats_list: List[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Sum per-column parse stats gathered from several parsers (e.g. worker processes)."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for stats in stats_list:
+        for column, col_stats in stats.items():
+            total = merged.setdefault(column, {
+                'kind': col_stats['kind'], 'format': None,
+                'values': 0, 'cache_hits': 0, 'fast_path': 0, 'fallback': 0, 'failed': 0,
+            })
+            for key in ('values', 'cache_hits', 'fast_path', 'fallback', 'failed'):
+                total[key] += col_stats[key]
+            total['format'] = total['format'] or col_stats['format']
+
+    for total in merged.values():
+        values = total['values']
+        total['hit_rate'] = round((total['cache_hits'] + total['fast_path']) / values, 4) if values else 0.0
+    return merged
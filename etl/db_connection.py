@@ -1,9 +1,12 @@
 """Robust database connection handling with retries and keep-alive for Supabase."""
 import os
+import threading
 import time
+from collections import deque
+from contextlib import contextmanager
 import psycopg2
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-from typing import Optional
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT, TRANSACTION_STATUS_IDLE
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
 
 
 def get_database_url() -> str:
@@ -79,7 +82,7 @@ def connect_with_retry(max_attempts: int = 5, autocommit: bool = False):
 
 def execute_with_retry(query: str, params: Optional[tuple] = None, fetch_one: bool = False, fetch_all: bool = False):
     """
-    Execute a query with automatic connection retry.
+    Execute a query on a pooled connection (stale connections are replaced).
     
     Args:
         query: SQL query to execute
@@ -90,9 +93,7 @@ def execute_with_retry(query: str, params: Optional[tuple] = None, fetch_one: bo
     Returns:
         Query result or None
     """
-    conn = None
-    try:
-        conn = connect_with_retry(autocommit=True)
+    with pooled_connection(autocommit=True) as conn:
         cursor = conn.cursor()
         cursor.execute(query, params)
         
@@ -102,7 +103,255 @@ def execute_with_retry(query: str, params: Optional[tuple] = None, fetch_one: bo
             return cursor.fetchall()
         else:
             return cursor.rowcount
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of PostgreSQL connections.
+    
+    Connections are borrowed most-recently-used first, so a busy app reuses a
+    few warm connections while idle ones age out. A borrowed connection is
+    only pinged (SELECT 1) if it sat idle longer than `health_check_after`;
+    a stale one is closed and the borrow retried with another connection.
+    New connections come from connect_with_retry(), which has its own backoff.
+    """
+    
+    def __init__(self, max_size: Optional[int] = None, idle_timeout: Optional[float] = None,
+                 health_check_after: Optional[float] = None, acquire_timeout: Optional[float] = None):
+        """
+        Args:
+            max_size: Maximum open connections (DB_POOL_MAX_SIZE, default 10)
+            idle_timeout: Seconds before an idle connection is closed (DB_POOL_IDLE_TIMEOUT, default 300)
+            health_check_after: Idle seconds after which a borrow pings first (DB_POOL_HEALTH_CHECK_AFTER, default 30)
+            acquire_timeout: Seconds to wait for a free connection at max_size (DB_POOL_ACQUIRE_TIMEOUT, default 30)
+        """
+        self.max_size = max_size or int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+        self.idle_timeout = idle_timeout if idle_timeout is not None else float(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300))
+        self.health_check_after = (health_check_after if health_check_after is not None
+                                   else float(os.environ.get('DB_POOL_HEALTH_CHECK_AFTER', 30)))
+        self.acquire_timeout = (acquire_timeout if acquire_timeout is not None
+                                else float(os.environ.get('DB_POOL_ACQUIRE_TIMEOUT', 30)))
+        
+        self._idle: List[Tuple[Any, float]] = []  # (connection, returned_at), most recent last
+        self._open = 0
+        self._lock = threading.Condition()
+        
+        self._stats = {
+            'acquired': 0,
+            'created': 0,
+            'reused': 0,
+            'stale_discarded': 0,
+            'idle_evicted': 0,
+            'broken_discarded': 0,
+            'wait_timeouts': 0,
+        }
+        self._latencies_ms: Deque[float] = deque(maxlen=1000)
+        self._max_latency_ms = 0.0
+        self._total_latency_ms = 0.0
+    
+    def acquire(self, autocommit: bool = False):
+        """Borrow a healthy connection; pair with release()."""
+        started = time.perf_counter()
+        
+        while True:
+            conn, idle_for = self._checkout()
+            
+            if conn is None:
+                # Reserved a slot for a new connection
+                try:
+                    conn = connect_with_retry(autocommit=autocommit)
+                except Exception:
+                    with self._lock:
+                        self._open -= 1
+                        self._lock.notify()
+                    raise
+                self._count('created')
+                break
             
-    finally:
-        if conn:
+            if conn.closed or (idle_for > self.health_check_after and not self._ping(conn)):
+                self._count('stale_discarded')
+                self._discard(conn)
+                continue
+            
+            self._count('reused')
+            break
+        
+        if conn.autocommit != autocommit:
+            # connect_with_retry's test query leaves a transaction open
+            if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            conn.autocommit = autocommit
+        self._record_latency((time.perf_counter() - started) * 1000)
+        return conn
+    
+    def release(self, conn, discard: bool = False):
+        """Return a borrowed connection (closed instead if broken or `discard`)."""
+        if discard or conn.closed:
+            self._count('broken_discarded')
+            self._discard(conn)
+            return
+        
+        try:
+            if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except psycopg2.Error:
+            self._count('broken_discarded')
+            self._discard(conn)
+            return
+        
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+            self._lock.notify()
+    
+    @contextmanager
+    def connection(self, autocommit: bool = False) -> Iterator[Any]:
+        """
+        Borrow a connection for a `with` block.
+        
+        Commits on success (unless autocommit), rolls back on error, and
+        discards the connection if the error means it is no longer usable.
+        """
+        conn = self.acquire(autocommit=autocommit)
+        try:
+            yield conn
+            if not autocommit and not conn.closed:
+                conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self.release(conn, discard=True)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Pool counters plus connection-acquire latency (ms)."""
+        with self._lock:
+            stats = dict(self._stats)
+            idle = len(self._idle)
+            open_count = self._open
+            samples = sorted(self._latencies_ms)
+            total_latency = self._total_latency_ms
+            max_latency = self._max_latency_ms
+        
+        acquired = stats['acquired']
+        return {
+            **stats,
+            'open': open_count,
+            'idle': idle,
+            'in_use': open_count - idle,
+            'max_size': self.max_size,
+            'acquire_latency_ms': {
+                'avg': round(total_latency / acquired, 3) if acquired else 0.0,
+                'p50': round(samples[len(samples) // 2], 3) if samples else 0.0,
+                'p95': round(samples[int(len(samples) * 0.95)], 3) if samples else 0.0,
+                'max': round(max_latency, 3),
+            },
+        }
+    
+    def close_all(self):
+        """Close every idle connection (borrowed ones close when returned)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn, _ in idle:
+            self._close_quietly(conn)
+    
+    def _checkout(self) -> Tuple[Any, float]:
+        """
+        Pop the most recently used idle connection, or reserve a slot for a
+        new one (returns None). Waits while the pool is exhausted.
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        
+        with self._lock:
+            while True:
+                self._evict_idle()
+                
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    return conn, time.monotonic() - returned_at
+                
+                if self._open < self.max_size:
+                    self._open += 1
+                    return None, 0.0
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['wait_timeouts'] += 1
+                    raise psycopg2.OperationalError(
+                        f"Timed out after {self.acquire_timeout}s waiting for a pooled connection "
+                        f"({self.max_size} in use)"
+                    )
+                self._lock.wait(remaining)
+    
+    def _evict_idle(self):
+        """Close connections idle longer than idle_timeout (caller holds the lock)."""
+        cutoff = time.monotonic() - self.idle_timeout
+        # Oldest entries sit at the front of the LIFO list
+        expired = 0
+        while expired < len(self._idle) and self._idle[expired][1] < cutoff:
+            expired += 1
+        
+        if expired:
+            stale, self._idle = self._idle[:expired], self._idle[expired:]
+            self._open -= expired
+            self._stats['idle_evicted'] += expired
+            for conn, _ in stale:
+                self._close_quietly(conn)
+    
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        with self._lock:
+            self._open -= 1
+            self._lock.notify()
+    
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+    
+    def _record_latency(self, elapsed_ms: float):
+        with self._lock:
+            self._stats['acquired'] += 1
+            self._latencies_ms.append(elapsed_ms)
+            self._total_latency_ms += elapsed_ms
+            self._max_latency_ms = max(self._max_latency_ms, elapsed_ms)
+    
+    @staticmethod
+    def _ping(conn) -> bool:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            if not conn.autocommit:
+                conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+    
+    @staticmethod
+    def _close_quietly(conn):
+        try:
             conn.close()
+        except psycopg2.Error:
+            pass
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """The process-wide connection pool (created on first use)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def pooled_connection(autocommit: bool = False):
+    """Context manager borrowing a connection from the shared pool."""
+    return get_pool().connection(autocommit=autocommit)
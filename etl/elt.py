@@ -0,0 +1,202 @@
+"""ELT mode: apply a mapping's coercions in PostgreSQL instead of per value in Python."""
+from typing import Dict, List, Tuple
+
+from psycopg2 import sql
+
+from .registry import compile_mapping
+from .transformer import BOOLEAN_FALSE, BOOLEAN_TRUE, METADATA_COLUMNS
+
+# Characters str.strip() removes (str.isspace()), so btrim() trims like the Python path
+WHITESPACE = ('\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005'
+              '\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000')
+
+# Layouts of etl.date_parsing.CANDIDATE_FORMATS: M/D/YYYY[,] [h:mm[:ss]] [AM|PM] and ISO 8601
+_US_DATE = r'^\d{1,2}/\d{1,2}/\d{4}(?:,? +\d{1,2}:\d{2}(?::\d{2})?(?: *[AaPp][Mm])?)?$'
+_ISO_DATE = (r'^\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?)?'
+             r'(?:Z|[+-](?:0\d|1[0-5])(?::?[0-5]\d)?)?$')
+_NUMBER = r'^[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d{1,4})?$'
+
+# pg_input_is_valid() (PostgreSQL 16+) lets other date layouts through without risking an error
+_INPUT_IS_VALID_VERSION = 160000
+
+
+class LandedRows:
+    """
+    Raw rows COPYed into a landing table, read back through SqlCoercions.select().
+
+    BulkLoader accepts it wherever it would COPY a CSV: the rows are written
+    with one INSERT ... SELECT instead.
+    """
+
+    def __init__(self, table: Tuple[str, str], columns: List[str], select: sql.Composable):
+        self.table = table
+        self.columns = columns
+        self.select = select
+
+
+class SqlCoercions:
+    """
+    Renders a mapping's `coercions` as SQL expressions over text columns.
+
+    Mirrors the Python coercions (trim, lower, boolean, date, timestamptz,
+    numeric) with one difference: a value that cannot be converted becomes
+    NULL instead of being passed through as-is (which would fail the COPY).
+    Dates are recognised in the layouts etl.date_parsing tries first; on
+    PostgreSQL 16+ anything else PostgreSQL itself can parse is accepted too.
+    Guesses only dateutil makes are NULL here: day-first dates (13/01/2025)
+    and dates missing a year or day, which it completes from today.
+    """
+
+    def __init__(self, mapping: Dict):
+        self.coercion_steps = compile_mapping(mapping).coercion_steps
+
+    def select(self, landing: Tuple[str, str], columns: List[str], column_types: Dict[str, str],
+               server_version: int = 0) -> sql.Composed:
+        """
+        SELECT producing staging rows from a landing table of text columns.
+
+        Args:
+            landing: Landing table holding `columns` as text
+            columns: Transformed column names (mapped columns, then METADATA_COLUMNS)
+            column_types: Target column -> SQL type (format_type() output)
+            server_version: connection.server_version, enables the PG 16 date fallback
+
+        Returns:
+            SELECT whose output columns are `columns`, in order; metadata
+            (including the transformer's _raw_hash) passes through unchanged
+        """
+        mapped = [col for col in columns if col not in METADATA_COLUMNS]
+        values = []
+
+        for col in columns:
+            value = sql.Identifier('l', col)
+            if col in mapped:
+                value = self._coerce(col, value, server_version)
+            col_type = column_types.get(col, 'text')
+            if col_type != 'text':
+                value = sql.SQL("({})::{}").format(value, sql.SQL(col_type))
+            values.append(sql.SQL("{} AS {}").format(value, sql.Identifier(col)))
+
+        return sql.SQL("SELECT {values} FROM {landing} l").format(
+            values=sql.SQL(', ').join(values),
+            landing=sql.Identifier(*landing)
+        )
+
+    def _coerce(self, column: str, value: sql.Composable, server_version: int) -> sql.Composable:
+        """Chain the column's 'rule|rule' coercion over `value` (a text expression)."""
+        typed = False
+        for rule in self.coercion_steps.get(column, ()):
+            if typed:
+                value = sql.SQL("({})::text").format(value)
+
+            if rule == 'trim':
+                value = sql.SQL("NULLIF(btrim({}, {}), '')").format(value, sql.Literal(WHITESPACE))
+            elif rule == 'lower':
+                value = sql.SQL("lower({})").format(value)
+            elif rule == 'boolean':
+                value = self._boolean(value)
+            elif rule == 'numeric':
+                value = self._numeric(value)
+            else:
+                value = self._date(rule, value, server_version >= _INPUT_IS_VALID_VERSION)
+            typed = rule in ('boolean', 'numeric', 'date', 'timestamptz')
+        return value
+
+    @staticmethod
+    def _boolean(value: sql.Composable) -> sql.Composable:
+        cases = [sql.SQL("WHEN {} THEN true").format(sql.Literal(text)) for text in BOOLEAN_TRUE]
+        cases += [sql.SQL("WHEN {} THEN false").format(sql.Literal(text)) for text in BOOLEAN_FALSE]
+        return sql.SQL("CASE btrim(lower({}), {}) {} END").format(
+            value, sql.Literal(WHITESPACE), sql.SQL(' ').join(cases)
+        )
+
+    @staticmethod
+    def _numeric(value: sql.Composable) -> sql.Composable:
+        # Same characters the Python path strips: currency sign, separators, whitespace
+        cleaned = sql.SQL("translate({}, {}, '')").format(value, sql.Literal('$,' + WHITESPACE))
+        return sql.SQL("CASE WHEN {c} ~ {pattern} THEN ({c})::numeric END").format(
+            c=cleaned, pattern=sql.Literal(_NUMBER)
+        )
+
+    @staticmethod
+    def _date(kind: str, value: sql.Composable, input_is_valid: bool) -> sql.Composable:
+        """
+        Safe date/timestamptz conversion: unrecognised or impossible values give NULL.
+
+        A cheap separator test picks the layout and a `~` test confirms it
+        (regexp_match() with capture groups is several times slower); fields
+        are then cut out with split_part() and substr() and range-checked
+        before make_date() or ::time, so that e.g. 02/30/2025 cannot raise.
+        Nested CASEs fix the order the checks run in.
+        """
+        def expr(template: str, **parts) -> sql.Composed:
+            return sql.SQL(template).format(v=value, **parts)
+
+        def calendar(y, m, d, time_ok, result):
+            day = expr("make_date({y}, {m}, 1) + ({d} - 1)", y=y, m=m, d=d)
+            return expr("CASE WHEN {m} BETWEEN 1 AND 12 AND {d} BETWEEN 1 AND 31 AND {y} >= 1 AND {time_ok} "
+                        "THEN CASE WHEN extract(month FROM {day}) = {m} THEN {result} END END",
+                        y=y, m=m, d=d, time_ok=time_ok, day=day, result=result(day))
+
+        # M/D/YYYY[,] [h:mm[:ss]] [AM|PM]
+        clock = expr("ltrim(substr(split_part({v}, '/', 3), 5), ', ')")
+        hour = expr("split_part({t}, ':', 1)::int", t=clock)
+        minute = expr("left(split_part({t}, ':', 2), 2)::int", t=clock)
+        second = expr("CASE WHEN split_part({t}, ':', 3) = '' THEN 0 "
+                      "ELSE left(split_part({t}, ':', 3), 2)::int END", t=clock)
+        meridiem = expr("upper(right({t}, 2))", t=clock)
+        us_time_ok = expr("CASE WHEN {t} = '' THEN true WHEN {mi} < 60 AND {s} < 60 THEN "
+                          "CASE WHEN {ampm} IN ('AM', 'PM') THEN {h} <= 12 ELSE {h} < 24 END "
+                          "ELSE false END", t=clock, h=hour, mi=minute, s=second, ampm=meridiem)
+
+        # YYYY-MM-DD[( |T)hh:mm[:ss[.ffffff]]][Z|±hh[:mm]], fixed field positions
+        iso_time_ok = expr("CASE WHEN substr({v}, 11, 1) NOT IN (' ', 'T') THEN true "
+                           "WHEN substr({v}, 12, 2)::int < 24 AND substr({v}, 15, 2)::int < 60 THEN "
+                           "CASE WHEN substr({v}, 17, 1) = ':' THEN substr({v}, 18, 2)::int < 60 ELSE true END "
+                           "ELSE false END")
+
+        def us_value(day):
+            if kind == 'date':
+                return day
+            # The checks above make the clock valid time input ('2:37 PM', '14:37:05')
+            return expr("(CASE WHEN {t} = '' THEN ({day})::timestamp ELSE {day} + ({t})::time END)::timestamptz",
+                        t=clock, day=day)
+
+        def iso_value(day):
+            if kind == 'date':
+                return day
+            # Fields are valid, so the cast cannot fail; it keeps fractions and offsets
+            return expr("({v})::timestamptz")
+
+        us_date = calendar(expr("left(split_part({v}, '/', 3), 4)::int"), expr("split_part({v}, '/', 1)::int"),
+                           expr("split_part({v}, '/', 2)::int"), us_time_ok, us_value)
+        iso_date = calendar(expr("substr({v}, 1, 4)::int"), expr("substr({v}, 6, 2)::int"),
+                            expr("substr({v}, 9, 2)::int"), iso_time_ok, iso_value)
+        branches = [
+            expr("WHEN (substr({v}, 2, 1) = '/' OR substr({v}, 3, 1) = '/') AND {v} ~ {pattern} THEN {result}",
+                 pattern=sql.Literal(_US_DATE), result=us_date),
+            expr("WHEN substr({v}, 5, 1) = '-' AND {v} ~ {pattern} THEN {result}",
+                 pattern=sql.Literal(_ISO_DATE), result=iso_date),
+        ]
+        if input_is_valid:
+            # Special inputs ('today', 'epoch', 'infinity') have no digit and stay NULL
+            branches.append(expr("WHEN {v} ~ '\\d' AND pg_input_is_valid({v}, {t}) THEN ({v})::{cast}",
+                                 t=sql.Literal('timestamp' if kind == 'date' else 'timestamptz'),
+                                 cast=sql.SQL('timestamp::date' if kind == 'date' else 'timestamptz')))
+        return sql.SQL("CASE {} END").format(sql.SQL(' ').join(branches))
+
+
+def column_types(cursor, table_name: str) -> Dict[str, str]:
+    """Column name -> SQL type of a table, as format_type() spells it."""
+    cursor.execute("""
+        SELECT attname, format_type(atttypid, atttypmod) FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+    """, (table_name,))
+    return dict(cursor.fetchall())
+
+
+def landing_table(table_name: str, load_id: int) -> Tuple[str, str]:
+    """(schema, table) of a load's landing table, e.g. staging._land_contacts_42."""
+    schema, table = table_name.split('.')
+    return schema, f"_land_{table}_{load_id}"
+
@@ -1,6 +1,70 @@
 """Encoding detection utilities for CSV files."""
+import codecs
+from typing import Optional
+
 import chardet
 
+# Single-byte encodings PostgreSQL can transcode during COPY: Python codec -> COPY ENCODING
+COPY_ENCODINGS = {
+    'iso-8859-1': 'LATIN1',
+    'latin-1': 'LATIN1',
+    'latin1': 'LATIN1',
+    'windows-1252': 'WIN1252',
+    'cp1252': 'WIN1252',
+}
+
+# Python codec reading and writing a passthrough stream under each COPY ENCODING
+PASSTHROUGH_CODECS = {'LATIN1': 'latin-1', 'WIN1252': 'etl_win1252'}
+
+# The only bytes Windows-1252 decodes differently from latin-1
+_C1_BYTES = bytes(range(0x80, 0xa0))
+
+# The five bytes Windows-1252 leaves undefined (0x81, 0x8D, 0x8F, 0x90, 0x9D)
+# read as U+FFFD, as in a cp1252 'replace' read; PostgreSQL's WIN1252 has no
+# character for them either, so U+FFFD is written back as '?'
+_WIN1252_DECODING_TABLE = bytes(range(256)).decode('cp1252', 'replace')
+_WIN1252_ENCODING_MAP = {ord(char): byte for byte, char in enumerate(_WIN1252_DECODING_TABLE) if char != '\ufffd'}
+_WIN1252_ENCODING_MAP[0xfffd] = ord('?')
+
+
+def _win1252_decode(data, errors: str = 'strict') -> tuple:
+    # Blocks without C1 bytes read the same as latin-1, whose decoder is a plain copy
+    data = bytes(data)
+    if len(data.translate(None, _C1_BYTES)) == len(data):
+        return codecs.latin_1_decode(data, errors)
+    return codecs.charmap_decode(data, errors, _WIN1252_DECODING_TABLE)
+
+
+def _win1252_encode(text: str, errors: str = 'strict') -> tuple:
+    try:
+        data = text.encode('latin-1')
+    except UnicodeEncodeError:
+        return codecs.charmap_encode(text, errors, _WIN1252_ENCODING_MAP)
+    if len(data.translate(None, _C1_BYTES)) != len(data):
+        return codecs.charmap_encode(text, errors, _WIN1252_ENCODING_MAP)
+    return data, len(text)
+
+
+class _Win1252IncrementalDecoder(codecs.IncrementalDecoder):
+    def decode(self, data, final=False):
+        return _win1252_decode(data, self.errors)[0]
+
+
+class _Win1252IncrementalEncoder(codecs.IncrementalEncoder):
+    def encode(self, text, final=False):
+        return _win1252_encode(text, self.errors)[0]
+
+
+def _search_codec(name: str) -> Optional[codecs.CodecInfo]:
+    if name != 'etl_win1252':
+        return None
+    return codecs.CodecInfo(_win1252_encode, _win1252_decode, name='etl_win1252',
+                            incrementalencoder=_Win1252IncrementalEncoder,
+                            incrementaldecoder=_Win1252IncrementalDecoder)
+
+
+codecs.register(_search_codec)
+
 
 def detect_encoding(file_path: str) -> tuple[str, str]:
     """
@@ -66,3 +130,24 @@ def detect_encoding(file_path: str) -> tuple[str, str]:
     
     # Last resort: UTF-8 with replace mode (will substitute bad chars with �)
     return 'utf-8', 'replace'
+
+
+def copy_passthrough_encoding(encoding: str) -> Optional[str]:
+    """
+    COPY ENCODING under which a file detected as `encoding` keeps its own bytes.
+
+    Such a file is read and its output written with PASSTHROUGH_CODECS, so
+    PostgreSQL transcodes during COPY instead of Python encoding UTF-8.
+    ISO-8859-1 uses latin-1 throughout. Windows-1252 uses etl_win1252,
+    which decodes and encodes blocks without bytes 0x80-0x9F as latin-1
+    (a plain copy) and falls back to the Windows-1252 table for blocks
+    with smart quotes, dashes or the euro sign. Either way validation,
+    coercions and _raw_hash see the same text as a cp1252 read.
+
+    Rows are still tokenized and projected in Python; only the decode and
+    encode around them are cheaper.
+
+    Returns:
+        'LATIN1' or 'WIN1252', or None to decode in Python
+    """
+    return COPY_ENCODINGS.get(encoding.lower())
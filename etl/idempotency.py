@@ -0,0 +1,97 @@
+"""Content-hash index of processed files, used to skip duplicate attachments."""
+import os
+from typing import Any, Dict, Optional
+
+import psycopg2
+
+from etl.db_connection import pooled_connection
+
+DEFAULT_TTL_DAYS = 7
+
+
+class ProcessedFileIndex:
+    """
+    Remembers which file contents were already loaded into which table.
+
+    Entries in processed_files map (SHA-256 of the file, target table,
+    partition date) to the load that processed it and its row count, so the
+    same export loaded for another partition date is not a duplicate. Entries expire after `ttl_days`
+    (ETL_IDEMPOTENCY_TTL_DAYS, default 7; 0 disables the check): lookup()
+    ignores expired rows and record() deletes them.
+
+    The index is an optimization, so database errors are logged and treated
+    as a cache miss instead of failing the load.
+    """
+
+    def __init__(self, ttl_days: Optional[float] = None):
+        self.ttl_days = (ttl_days if ttl_days is not None
+                         else float(os.environ.get('ETL_IDEMPOTENCY_TTL_DAYS', DEFAULT_TTL_DAYS)))
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_days > 0
+
+    def lookup(self, content_hash: str, target_table: str, load_date) -> Optional[Dict[str, Any]]:
+        """
+        Find an unexpired earlier load of the same content into the load_date
+        partition of target_table.
+
+        Returns:
+            Dict with load_id, row_count, file_name, load_date and processed_at,
+            or None if the file has not been processed recently
+        """
+        if not self.enabled or not content_hash:
+            return None
+
+        try:
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT load_id, row_count, file_name, load_date, processed_at
+                    FROM processed_files
+                    WHERE content_hash = %s AND target_table = %s AND load_date = %s
+                      AND processed_at > NOW() - %s * INTERVAL '1 day'
+                """, (content_hash, target_table, load_date, self.ttl_days))
+                row = cursor.fetchone()
+                cursor.close()
+        except psycopg2.Error as e:
+            print(f"Processed-file lookup failed, treating as new: {e}")
+            return None
+
+        if row is None:
+            return None
+
+        load_id, row_count, file_name, load_date, processed_at = row
+        return {
+            'load_id': load_id,
+            'row_count': row_count,
+            'file_name': file_name,
+            'load_date': load_date,
+            'processed_at': processed_at,
+        }
+
+    def record(self, content_hash: str, target_table: str, load_id: int, row_count: int,
+               file_name: str, load_date):
+        """Remember a successful load (replacing any older entry) and evict expired ones."""
+        if not self.enabled or not content_hash:
+            return
+
+        try:
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO processed_files
+                        (content_hash, target_table, load_id, row_count, file_name, load_date, processed_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, NOW())
+                    ON CONFLICT (content_hash, target_table, load_date) DO UPDATE
+                    SET load_id = EXCLUDED.load_id, row_count = EXCLUDED.row_count,
+                        file_name = EXCLUDED.file_name, processed_at = EXCLUDED.processed_at
+                """, (content_hash, target_table, load_id, row_count, file_name, load_date))
+                cursor.execute(
+                    "DELETE FROM processed_files WHERE processed_at <= NOW() - %s * INTERVAL '1 day'",
+                    (self.ttl_days,)
+                )
+                conn.commit()
+                cursor.close()
+        except psycopg2.Error as e:
+            print(f"Could not record processed file {file_name}: {e}")
@@ -0,0 +1,352 @@
+"""Durable SQLite-backed job queue for webhook attachments."""
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_QUEUE_PATH = 'uploads/etl_jobs.sqlite3'
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def default_workers() -> int:
+    """Background workers draining the queue (ETL_WEBHOOK_WORKERS, default 4)."""
+    return max(1, int(os.environ.get('ETL_WEBHOOK_WORKERS', 4)))
+
+
+def default_max_per_table() -> int:
+    """Concurrent loads allowed into one staging table (ETL_MAX_LOADS_PER_TABLE, default 1)."""
+    return max(1, int(os.environ.get('ETL_MAX_LOADS_PER_TABLE', 1)))
+
+
+def default_max_attempts() -> int:
+    """Times a job may be started before an interruption fails it (ETL_JOB_MAX_ATTEMPTS, default 3)."""
+    return max(1, int(os.environ.get('ETL_JOB_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)))
+
+
+class TableSlots:
+    """Per-target-table semaphores capping concurrent in-process loads."""
+
+    def __init__(self, per_table: Optional[int] = None):
+        self.per_table = per_table or default_max_per_table()
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, table: str) -> Iterator[None]:
+        with self._lock:
+            semaphore = self._semaphores.setdefault(table, threading.Semaphore(self.per_table))
+        with semaphore:
+            yield
+
+
+class JobQueue:
+    """
+    One row per attachment to load, stored in a local SQLite file so queued
+    work survives restarts.
+
+    Job status moves queued -> running -> success/failed. Claims use
+    BEGIN IMMEDIATE, so several worker threads (or processes sharing the
+    file) never pick up the same job, and skip jobs whose target table
+    already has `max_per_table` running jobs. A job whose worker died is
+    requeued on restart until it has been started `max_attempts` times;
+    after that it is failed, so a file that kills its worker cannot loop.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_per_table: Optional[int] = None,
+                 max_attempts: Optional[int] = None):
+        self.path = path or os.environ.get('ETL_QUEUE_PATH', DEFAULT_QUEUE_PATH)
+        self.max_per_table = max_per_table or default_max_per_table()
+        self.max_attempts = max_attempts or default_max_attempts()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    webhook_id INTEGER,
+                    load_id INTEGER,
+                    file_name TEXT NOT NULL,
+                    original_name TEXT,
+                    upload_path TEXT NOT NULL,
+                    mapping_name TEXT NOT NULL,
+                    target_table TEXT,
+                    content_hash TEXT,
+                    force INTEGER NOT NULL DEFAULT 0,
+                    partition_date TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker_pid INTEGER,
+                    error TEXT,
+                    result TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+            """)
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, definition in (('target_table', 'TEXT'), ('content_hash', 'TEXT'),
+                                       ('force', 'INTEGER NOT NULL DEFAULT 0'), ('original_name', 'TEXT')):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_idx ON jobs (status, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_webhook_idx ON jobs (webhook_id, status)")
+
+    def enqueue(self, file_name: str, upload_path: str, mapping_name: str, partition_date: str,
+                load_id: Optional[int] = None, webhook_id: Optional[int] = None,
+                target_table: Optional[str] = None, content_hash: Optional[str] = None,
+                force: bool = False, original_name: Optional[str] = None) -> int:
+        """
+        Add a job; returns its id.
+
+        Args:
+            file_name: Stored (sanitized) file name the load runs under
+            original_name: Attachment name as sent, for reporting (defaults to file_name)
+        """
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                INSERT INTO jobs (webhook_id, load_id, file_name, original_name, upload_path, mapping_name,
+                                  target_table, content_hash, force, partition_date, status, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'queued', ?)
+            """, (webhook_id, load_id, file_name, original_name or file_name, upload_path, mapping_name,
+                  target_table, content_hash, int(force), partition_date, datetime.now().isoformat()))
+            return cursor.lastrowid
+
+    def find_active(self, content_hash: str, target_table: str,
+                    partition_date: str) -> Optional[Dict[str, Any]]:
+        """Oldest queued or running job loading the same content into the same partition."""
+        with self._connect() as conn:
+            row = conn.execute("""
+                SELECT * FROM jobs
+                WHERE content_hash = ? AND target_table = ? AND partition_date = ?
+                  AND status IN ('queued', 'running')
+                ORDER BY id
+                LIMIT 1
+            """, (content_hash, target_table, partition_date)).fetchone()
+        return dict(row) if row else None
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Atomically take the oldest runnable queued job and mark it running.
+
+        Returns None when nothing is queued or every queued job targets a
+        table that is at its concurrency cap.
+        """
+        with self._transaction() as conn:
+            row = conn.execute("""
+                SELECT * FROM jobs AS j
+                WHERE j.status = 'queued'
+                  AND (j.target_table IS NULL OR (
+                      SELECT COUNT(*) FROM jobs AS r
+                      WHERE r.status = 'running' AND r.target_table = j.target_table
+                  ) < ?)
+                ORDER BY j.id
+                LIMIT 1
+            """, (self.max_per_table,)).fetchone()
+            if row is None:
+                return None
+
+            conn.execute("""
+                UPDATE jobs
+                SET status = 'running', attempts = attempts + 1, worker_pid = ?, started_at = ?
+                WHERE id = ?
+            """, (os.getpid(), datetime.now().isoformat(), row['id']))
+
+        job = dict(row)
+        job['status'] = 'running'
+        return job
+
+    def finish(self, job_id: int, status: str, error: Optional[str] = None,
+               result: Optional[Dict[str, Any]] = None):
+        """Record a job's outcome ('success' or 'failed')."""
+        with self._connect() as conn:
+            conn.execute("""
+                UPDATE jobs SET status = ?, error = ?, result = ?, finished_at = ?
+                WHERE id = ?
+            """, (status, error, json.dumps(result) if result is not None else None,
+                  datetime.now().isoformat(), job_id))
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def pending_for_webhook(self, webhook_id: int) -> int:
+        """Jobs of a webhook request that are still queued or running."""
+        with self._connect() as conn:
+            row = conn.execute("""
+                SELECT COUNT(*) FROM jobs
+                WHERE webhook_id = ? AND status IN ('queued', 'running')
+            """, (webhook_id,)).fetchone()
+        return row[0]
+
+    def requeue_orphans(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Put 'running' jobs whose worker process is gone back in the queue
+        (crash recovery). Jobs already started `max_attempts` times are
+        failed instead.
+
+        Returns:
+            (requeued jobs, failed jobs)
+        """
+        requeued, failed = [], []
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT * FROM jobs WHERE status = 'running'").fetchall()
+            for row in rows:
+                if _process_alive(row['worker_pid']):
+                    continue
+                job = dict(row)
+                if job['attempts'] >= self.max_attempts:
+                    job.update(status='failed', finished_at=datetime.now().isoformat(),
+                               error=f"Interrupted {job['attempts']} times, giving up")
+                    conn.execute("""
+                        UPDATE jobs SET status = ?, error = ?, worker_pid = NULL, finished_at = ?
+                        WHERE id = ?
+                    """, (job['status'], job['error'], job['finished_at'], job['id']))
+                    failed.append(job)
+                else:
+                    job['status'] = 'queued'
+                    conn.execute(
+                        "UPDATE jobs SET status = 'queued', worker_pid = NULL WHERE id = ?", (job['id'],)
+                    )
+                    requeued.append(job)
+        return requeued, failed
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+
+def _process_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    if pid == os.getpid():
+        # Same process: only recovered at startup, before our workers run
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobWorkers:
+    """
+    Pool of daemon threads that drain a JobQueue.
+
+    `handler(job)` does the work and returns a result dict; an exception marks
+    the job failed. `on_finished(job, status, error, result)` runs after the
+    outcome is recorded (used to roll job state up into webhook_log).
+    `on_abandoned(job)` runs for interrupted jobs failed at startup after
+    their last attempt; they never reach the handler.
+    """
+
+    def __init__(self, queue: JobQueue, handler: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 on_finished: Optional[Callable[..., None]] = None,
+                 workers: Optional[int] = None, poll_interval: float = 2.0,
+                 on_abandoned: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.queue = queue
+        self.handler = handler
+        self.on_finished = on_finished
+        self.on_abandoned = on_abandoned
+        self.workers = workers or default_workers()
+        self.poll_interval = poll_interval
+
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        """Recover orphaned jobs and start the worker threads (idempotent)."""
+        if self._threads:
+            return
+
+        requeued, abandoned = self.queue.requeue_orphans()
+        if requeued:
+            print(f"Job queue: requeued {len(requeued)} interrupted jobs")
+        for job in abandoned:
+            print(f"Job {job['id']} ({job['original_name'] or job['file_name']}) failed: {job['error']}")
+            if self.on_abandoned:
+                try:
+                    self.on_abandoned(job)
+                except Exception as e:
+                    print(f"Job {job['id']}: on_abandoned hook failed: {e}")
+
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'etl-job-worker-{index + 1}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"Job queue: {self.workers} workers started ({self.queue.path})")
+
+    def notify(self):
+        """Wake idle workers after enqueueing."""
+        self._wakeup.set()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim()
+            except sqlite3.Error as e:
+                print(f"Job queue: claim failed: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._execute(job)
+
+    def _execute(self, job: Dict[str, Any]):
+        started = time.perf_counter()
+        status, error, result = 'success', None, None
+        try:
+            result = self.handler(job)
+        except Exception as e:
+            status, error = 'failed', str(e)
+            traceback.print_exc()
+
+        self.queue.finish(job['id'], status, error, result)
+        print(f"Job {job['id']} ({job['original_name'] or job['file_name']}) {status} in {time.perf_counter() - started:.1f}s")
+
+        if self.on_finished:
+            try:
+                self.on_finished(job, status, error, result)
+            except Exception as e:
+                print(f"Job {job['id']}: on_finished hook failed: {e}")
@@ -1,27 +1,75 @@
 """PostgreSQL COPY Bulk Loader - High-performance loading to Supabase."""
 import os
+import csv
 import psycopg2
 from psycopg2 import sql
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-from typing import Optional
+from typing import Optional, List, Union
 from datetime import datetime
-from etl.db_connection import connect_with_retry
+from etl.db_connection import pooled_connection
+from etl.progress import ProgressReporter, get_progress_reporter
+from etl.partitions import PARTITION_COLUMN, ensure_partition, add_bounds_check, swap_snapshot
+from etl.streaming import ChunkedCSVStream
+# COPY_BUFFER_SIZE: read size handed to copy_expert (psycopg2 defaults to 8 KB)
+from etl.parallel_copy import COPY_BUFFER_SIZE, default_copy_workers, parallel_copy, record_blocks
+from etl.elt import LandedRows, SqlCoercions, column_types, landing_table
+
+
+DEFAULT_APPEND_LOOKBACK_DAYS = 31
+
+
+def default_append_lookback_days() -> int:
+    """Days of earlier partitions APPEND loads check (ETL_APPEND_LOOKBACK_DAYS, default 31, 0 = all)."""
+    return max(0, int(os.environ.get('ETL_APPEND_LOOKBACK_DAYS', DEFAULT_APPEND_LOOKBACK_DAYS)))
 
 
 class BulkLoader:
     """Loads CSV data to PostgreSQL using COPY for high performance."""
     
-    def __init__(self):
+    def __init__(self, progress: Optional[ProgressReporter] = None, copy_workers: Optional[int] = None,
+                 append_lookback_days: Optional[int] = None):
+        """
+        Args:
+            progress: Progress reporter (default: the shared one)
+            copy_workers: Concurrent COPY connections for INSERT and APPEND
+                loads (default ETL_COPY_WORKERS, 1 = single COPY)
+            append_lookback_days: APPEND mode only checks partitions loaded
+                this many days before the load's partition or later for
+                already-staged events (default ETL_APPEND_LOOKBACK_DAYS, 0 =
+                every partition)
+        """
         self.database_url = os.environ.get('DATABASE_URL')
         if not self.database_url:
             raise ValueError("DATABASE_URL environment variable not set")
+        self.progress = progress or get_progress_reporter()
+        self.copy_workers = copy_workers or default_copy_workers()
+        self.append_lookback_days = (append_lookback_days if append_lookback_days is not None
+                                     else default_append_lookback_days())
     
-    def load_csv(self, csv_file: str, table_name: str, 
+    def load_csv(self, csv_file: Union[str, ChunkedCSVStream], table_name: str, 
                  load_date: str, file_name: str, mapping_file: str, 
-                 load_id: Optional[int] = None, natural_key: Optional[list] = None) -> int:
+                 load_id: Optional[int] = None, natural_key: Optional[list] = None,
+                 stats: Optional[dict] = None, load_mode: Optional[str] = None,
+                 elt: Optional[SqlCoercions] = None) -> int:
         """
         Load a CSV file to a staging table using PostgreSQL COPY.
         
+        Args:
+            csv_file: Path to a transformed CSV, or a ChunkedCSVStream from
+                CSVTransformer.open_stream() which is COPYed without touching disk
+            natural_key: Key columns for UPSERT mode; empty/None appends rows
+            stats: Optional dict filled with 'inserted' and 'updated' counts in
+                UPSERT mode ('inserted' and 'replaced' in SNAPSHOT mode,
+                'changed', 'unchanged' and 'removed' in INCREMENTAL mode, 'inserted' and
+                'skipped' in APPEND mode)
+            load_mode: 'snapshot' replaces the whole load_date snapshot via a
+                shadow table swap; 'incremental' writes only rows whose
+                _raw_hash changed; 'append' inserts rows not already staged;
+                otherwise natural_key picks UPSERT or INSERT
+            elt: Coercions of an ELT mapping; the file holds raw projected
+                values that are landed as text and coerced in SQL on the way
+                into the table (see _land_rows)
+        
         Returns:
             Number of rows loaded
         """
@@ -38,117 +86,666 @@ class BulkLoader:
         if table_name not in allowed_tables:
             raise ValueError(f"Invalid table name: {table_name}")
         
-        # Use robust connection with retry logic and keep-alive for automated loads
-        conn = connect_with_retry(autocommit=True)
-        cursor = conn.cursor()
-        
+        # Borrow a pooled connection (health-checked, replaced if stale)
+        with pooled_connection(autocommit=True) as conn:
+            cursor = conn.cursor()
+            try:
+                return self._load(cursor, csv_file, table_name, load_date, file_name,
+                                  mapping_file, load_id, natural_key, stats, load_mode, elt)
+            finally:
+                cursor.close()
+    
+    def _load(self, cursor, csv_file: Union[str, ChunkedCSVStream], table_name: str,
+              load_date: str, file_name: str, mapping_file: str, load_id: Optional[int],
+              natural_key: Optional[list], stats: Optional[dict], load_mode: Optional[str] = None,
+              elt: Optional[SqlCoercions] = None) -> int:
+        """Run one load on a borrowed cursor (see load_csv)."""
         if load_id is None:
             load_id = self._start_load(cursor, load_date, table_name, file_name, mapping_file)
         
+        landed = None
         try:
-            # Get column names from CSV header
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                first_line = f.readline().strip()
-                csv_columns = first_line.split(',')
-            
-            # Determine load strategy based on natural_key
-            if natural_key and len(natural_key) > 0:
-                # UPSERT MODE: Delete existing records, then insert new ones
-                # This works without schema changes (no need to alter PRIMARY KEYs)
-                
-                self._update_progress(cursor, load_id, 'UPSERT: Loading to temp table', 50)
-                
-                # Create temp table with same structure as target
-                temp_table = f"temp_{table_name.split('.')[-1]}_{load_id}"
-                create_temp = sql.SQL("CREATE TEMP TABLE {} AS SELECT * FROM {} WHERE 1=0").format(
-                    sql.Identifier(temp_table),
-                    sql.Identifier(*table_name.split('.'))
+            csv_columns = self._source_columns(csv_file)
+            
+            if elt is not None:
+                # Every strategy below then reads the landed rows instead of the file
+                csv_file = landed = self._land_rows(cursor, table_name, load_id, csv_file, csv_columns, elt)
+            
+            # Partitioned tables need the snapshot's partition before any row arrives
+            # (SNAPSHOT mode brings its own partition)
+            partitioned = load_mode != 'snapshot' and ensure_partition(cursor, table_name, load_date)
+            
+            # Determine load strategy based on load_mode / natural_key
+            if load_mode == 'snapshot':
+                # SNAPSHOT MODE: build the day's snapshot aside, then swap it in
+                inserted, replaced = self._load_snapshot(cursor, load_id, table_name, load_date,
+                                                         csv_file, csv_columns)
+                
+                if stats is not None:
+                    stats.update({'inserted': inserted, 'replaced': replaced})
+                
+            elif load_mode == 'incremental':
+                # INCREMENTAL MODE: only new or changed rows are written
+                changed, unchanged, removed = self._load_incremental(cursor, load_id, table_name, load_date,
+                                                                     file_name, csv_file, csv_columns,
+                                                                     natural_key)
+                
+                if stats is not None:
+                    stats.update({'changed': changed, 'unchanged': unchanged, 'removed': removed})
+                
+                self._update_progress(load_id, f'INCREMENTAL: {changed} changed, {unchanged} unchanged, '
+                                               f'{removed} removed', 85)
+                print(f"INCREMENTAL MODE: {changed} new/changed rows written, {unchanged} unchanged skipped, "
+                      f"{removed} removed keys tombstoned")
+                
+            elif load_mode == 'append':
+                # APPEND MODE: insert new events, skip ones already staged
+                inserted, skipped = self._load_append(cursor, load_id, table_name, load_date,
+                                                      csv_file, csv_columns)
+                
+                if stats is not None:
+                    stats.update({'inserted': inserted, 'skipped': skipped})
+                
+                print(f"APPEND MODE: {inserted} new rows inserted, {skipped} already loaded skipped")
+                
+            elif natural_key and len(natural_key) > 0:
+                # UPSERT MODE: stage into an indexed temp table, then merge
+                self._update_progress(load_id, 'UPSERT: Loading to temp table', 50)
+                
+                primary_key = self._primary_key(cursor, table_name)
+                use_on_conflict = (
+                    primary_key
+                    and set(natural_key) <= set(primary_key)
+                    and set(primary_key) <= set(csv_columns)
                 )
-                cursor.execute(create_temp)
+                index_cols = primary_key if use_on_conflict else natural_key
                 
-                # Load CSV to temp table using COPY
-                with open(csv_file, 'r', encoding='utf-8') as f:
+                temp_table = self._create_temp_table(cursor, table_name, load_id)
+                try:
                     columns_sql = sql.SQL(', ').join([sql.Identifier(col) for col in csv_columns])
-                    copy_query = sql.SQL("COPY {} ({}) FROM STDIN WITH CSV HEADER DELIMITER ','").format(
+                    self._copy_from(cursor, sql.Identifier(temp_table), columns_sql, csv_file)
+                    
+                    # Index + ANALYZE so the planner sees real row counts and can
+                    # probe the target's primary key instead of hashing the table
+                    cursor.execute(sql.SQL("CREATE INDEX ON {} ({})").format(
                         sql.Identifier(temp_table),
-                        columns_sql
-                    )
-                    cursor.copy_expert(copy_query.as_string(cursor), f)
-                
-                self._update_progress(cursor, load_id, 'UPSERT: Removing old records', 65)
-                
-                # Delete existing records with matching natural keys
-                # Build WHERE clause: WHERE (natural_key_col1, natural_key_col2) IN (SELECT ... FROM temp)
-                key_cols = sql.SQL(', ').join([sql.Identifier(col) for col in natural_key])
-                delete_query = sql.SQL("""
-                    DELETE FROM {target} 
-                    WHERE ({keys}) IN (
-                        SELECT {keys} FROM {temp}
-                    )
-                """).format(
-                    target=sql.Identifier(*table_name.split('.')),
-                    keys=key_cols,
-                    temp=sql.Identifier(temp_table)
-                )
-                cursor.execute(delete_query)
-                deleted_count = cursor.rowcount
-                
-                if deleted_count > 0:
-                    self._update_progress(cursor, load_id, f'UPSERT: Deleted {deleted_count} old records', 70)
-                    print(f"UPSERT: Deleted {deleted_count} existing records")
-                
-                self._update_progress(cursor, load_id, 'UPSERT: Inserting new records', 75)
-                
-                # Insert all records from temp table
-                insert_query = sql.SQL("""
-                    INSERT INTO {target} ({cols})
-                    SELECT {cols} FROM {temp}
-                """).format(
-                    target=sql.Identifier(*table_name.split('.')),
-                    cols=columns_sql,
-                    temp=sql.Identifier(temp_table)
-                )
-                cursor.execute(insert_query)
+                        sql.SQL(', ').join([sql.Identifier(col) for col in index_cols])
+                    ))
+                    cursor.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(temp_table)))
+                    
+                    if use_on_conflict:
+                        inserted, updated = self._merge_on_conflict(
+                            cursor, load_id, table_name, temp_table, csv_columns, primary_key, partitioned
+                        )
+                    else:
+                        print(f"UPSERT: no primary key covering {natural_key} on {table_name}, "
+                              f"falling back to delete + insert")
+                        inserted, updated = self._merge_delete_insert(
+                            cursor, load_id, table_name, temp_table, csv_columns, natural_key
+                        )
+                finally:
+                    # Pooled sessions outlive this load, so temp tables must not linger
+                    self._drop_table(cursor, temp_table)
                 
-                self._update_progress(cursor, load_id, 'UPSERT: Complete', 85)
-                print(f"UPSERT MODE: Merged data using natural key: {natural_key}")
+                if stats is not None:
+                    stats.update({'inserted': inserted, 'updated': updated})
+                
+                self._update_progress(load_id, f'UPSERT: {inserted} inserted, {updated} updated', 85)
+                print(f"UPSERT MODE: Merged data using natural key {natural_key}: "
+                      f"{inserted} inserted, {updated} updated")
                 
             else:
                 # INSERT MODE: No natural key, just append all records (for history/event tables)
-                self._update_progress(cursor, load_id, 'INSERT: Loading to database', 60)
+                self._update_progress(load_id, 'INSERT: Loading to database', 60)
                 
-                with open(csv_file, 'r', encoding='utf-8') as f:
-                    columns_sql = sql.SQL(', ').join([sql.Identifier(col) for col in csv_columns])
-                    copy_query = sql.SQL("COPY {} ({}) FROM STDIN WITH CSV HEADER DELIMITER ','").format(
-                        sql.Identifier(*table_name.split('.')),
-                        columns_sql
-                    )
-                    cursor.copy_expert(copy_query.as_string(cursor), f)
+                columns_sql = sql.SQL(', ').join([sql.Identifier(col) for col in csv_columns])
+                if self.copy_workers > 1 and not isinstance(csv_file, LandedRows):
+                    # Parallel slices land in a staging table first, then reach
+                    # the target in one statement (all or nothing)
+                    staged = self._stage_rows(cursor, table_name, load_id, csv_file, csv_columns)
+                    try:
+                        cursor.execute(sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {}").format(
+                            sql.Identifier(*table_name.split('.')), columns_sql, columns_sql,
+                            sql.Identifier(*staged)
+                        ))
+                    finally:
+                        self._drop_table(cursor, *staged)
+                else:
+                    self._copy_from(cursor, sql.Identifier(*table_name.split('.')), columns_sql, csv_file)
                 
                 print(f"INSERT MODE: Appended all records (no natural key)")
                 
-            self._update_progress(cursor, load_id, 'Counting rows', 85)
+            self._update_progress(load_id, 'Counting rows', 85)
             
-            count_query = sql.SQL("SELECT COUNT(*) FROM {} WHERE _file_name = %s").format(
+            # Restricting to the snapshot lets partitioned tables prune to one partition
+            count_query = sql.SQL("SELECT COUNT(*) FROM {} WHERE _file_name = %s AND _partition_date = %s").format(
                 sql.Identifier(*table_name.split('.'))
             )
-            cursor.execute(count_query, (file_name,))
+            cursor.execute(count_query, (file_name, load_date))
             result = cursor.fetchone()
             row_count = result[0] if result else 0
             
-            self._update_progress(cursor, load_id, 'Complete', 95)
+            self._update_progress(load_id, 'Complete', 95)
             self._complete_load(cursor, load_id, row_count, 'success')
             
-            cursor.close()
-            conn.close()
-            
             return row_count
             
         except Exception as e:
             self._complete_load(cursor, load_id, 0, 'failed', str(e))
-            cursor.close()
-            conn.close()
             raise
+        finally:
+            if landed is not None:
+                self._drop_table(cursor, *landed.table)
+    
+    def _drop_table(self, cursor, *name: str):
+        """Drop a temp/shadow table, ignoring errors so the original failure surfaces."""
+        try:
+            cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(*name)))
+        except psycopg2.Error as e:
+            print(f"Could not drop table {'.'.join(name)}: {e}")
+    
+    def _load_snapshot(self, cursor, load_id: int, table_name: str, load_date: str,
+                       csv_file: Union[str, ChunkedCSVStream], csv_columns: List[str]) -> tuple:
+        """
+        Replace the load_date snapshot without row-level DELETE + INSERT.
+        
+        Rows are COPYed into a fresh, unindexed shadow table; its primary key
+        and a bounds CHECK are built afterwards, and swap_snapshot() then
+        attaches it as the day's partition in one short transaction. Readers
+        never see a half-loaded snapshot.
+        
+        Returns:
+            (rows loaded, rows in the replaced snapshot)
+        """
+        schema, table = table_name.split('.')
+        shadow = (schema, f"{table}_shadow_{load_id}")
+        
+        self._update_progress(load_id, 'SNAPSHOT: Loading to shadow table', 50)
+        self._drop_table(cursor, *shadow)
+        cursor.execute(sql.SQL("CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)").format(
+            sql.Identifier(*shadow),
+            sql.Identifier(schema, table)
+        ))
+        
+        try:
+            columns_sql = sql.SQL(', ').join([sql.Identifier(col) for col in csv_columns])
+            self._copy_from(cursor, sql.Identifier(*shadow), columns_sql, csv_file)
+            
+            self._update_progress(load_id, 'SNAPSHOT: Building indexes', 65)
+            primary_key = self._primary_key(cursor, table_name)
+            if primary_key:
+                cursor.execute(sql.SQL("ALTER TABLE {} ADD PRIMARY KEY ({})").format(
+                    sql.Identifier(*shadow),
+                    sql.SQL(', ').join([sql.Identifier(col) for col in primary_key])
+                ))
+            add_bounds_check(cursor, shadow, load_date)
+            cursor.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(*shadow)))
+            
+            cursor.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(sql.Identifier(*shadow)))
+            inserted = cursor.fetchone()[0]
+            
+            self._update_progress(load_id, 'SNAPSHOT: Swapping in new snapshot', 80)
+            method, replaced = swap_snapshot(cursor, table_name, shadow, load_date)
+        finally:
+            # After an attach the shadow has been renamed into the partition
+            self._drop_table(cursor, *shadow)
+        
+        print(f"SNAPSHOT MODE: {method} {load_date} snapshot of {table_name}: "
+              f"{inserted} rows (replaced {replaced})")
+        return inserted, replaced
+    
+    def _primary_key(self, cursor, table_name: str) -> List[str]:
+        """Primary key columns of a table, in key order (empty if it has none)."""
+        cursor.execute("""
+            SELECT a.attname
+            FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            WHERE i.indrelid = %s::regclass AND i.indisprimary
+            ORDER BY array_position(i.indkey::int2[], a.attnum)
+        """, (table_name,))
+        return [row[0] for row in cursor.fetchall()]
+    
+    def _create_temp_table(self, cursor, table_name: str, load_id: int) -> str:
+        """Create an empty temp table shaped like the target."""
+        temp_table = f"temp_{table_name.split('.')[-1]}_{load_id}"
+        cursor.execute(sql.SQL("CREATE TEMP TABLE {} AS SELECT * FROM {} WHERE 1=0").format(
+            sql.Identifier(temp_table),
+            sql.Identifier(*table_name.split('.'))
+        ))
+        return temp_table
+    
+    def _stage_rows(self, cursor, table_name: str, load_id: int,
+                    csv_file: Union[str, ChunkedCSVStream], csv_columns: List[str]) -> tuple:
+        """
+        COPY the file into an empty table shaped like the target, for a merge.
+        
+        With copy_workers > 1 the rows are COPYed over several dedicated
+        connections into an UNLOGGED table next to the target (temp tables are
+        private to one connection); otherwise into a temp table with one COPY.
+        
+        Returns:
+            Name parts of the staged table; drop it with _drop_table()
+        """
+        columns_sql = sql.SQL(', ').join([sql.Identifier(col) for col in csv_columns])
+        parallel = self.copy_workers > 1 and not isinstance(csv_file, LandedRows)
+        
+        if parallel:
+            schema, table = table_name.split('.')
+            staged = (schema, f"_copy_{table}_{load_id}")
+            cursor.execute(sql.SQL("CREATE UNLOGGED TABLE {} (LIKE {} INCLUDING DEFAULTS)").format(
+                sql.Identifier(*staged), sql.Identifier(schema, table)
+            ))
+        else:
+            staged = (self._create_temp_table(cursor, table_name, load_id),)
+        
+        try:
+            if parallel:
+                self._copy_parallel(cursor, sql.Identifier(*staged), columns_sql, csv_file)
+            else:
+                self._copy_from(cursor, sql.Identifier(*staged), columns_sql, csv_file)
+        except BaseException:
+            self._drop_table(cursor, *staged)
+            raise
+        return staged
+    
+    def _merge_on_conflict(self, cursor, load_id: int, table_name: str, temp_table: str,
+                           csv_columns: List[str], primary_key: List[str],
+                           partitioned: bool = False) -> tuple:
+        """
+        Merge the temp table with INSERT ... ON CONFLICT (pk) DO UPDATE.
+        
+        Args:
+            partitioned: Target is a partitioned table, where RETURNING cannot
+                read xmax; existing keys are counted before the merge instead
+        
+        Returns:
+            (inserted, updated) counts
+        """
+        self._update_progress(load_id, 'UPSERT: Merging on primary key', 70)
+        
+        update_cols = [col for col in csv_columns if col not in primary_key]
+        assignments = [
+            sql.SQL("{col} = EXCLUDED.{col}").format(col=sql.Identifier(col))
+            for col in update_cols
+        ]
+        if '_loaded_at' not in csv_columns and self._has_column(cursor, table_name, '_loaded_at'):
+            assignments.append(sql.SQL("_loaded_at = DEFAULT"))
+        
+        if assignments:
+            conflict_action = sql.SQL("DO UPDATE SET {}").format(sql.SQL(', ').join(assignments))
+        else:
+            conflict_action = sql.SQL("DO NOTHING")
+        
+        target = sql.Identifier(*table_name.split('.'))
+        cols = sql.SQL(', ').join([sql.Identifier(col) for col in csv_columns])
+        pk = sql.SQL(', ').join([sql.Identifier(col) for col in primary_key])
+        
+        if partitioned:
+            # Concurrent loads into one table are serialized (ETL_MAX_LOADS_PER_TABLE),
+            # so the pre-count matches what the merge will update
+            cursor.execute(sql.SQL("""
+                SELECT COUNT(*) FROM {temp} t
+                WHERE EXISTS (SELECT 1 FROM {target} x WHERE ({x_pk}) = ({t_pk}))
+            """).format(
+                temp=sql.Identifier(temp_table),
+                target=target,
+                x_pk=sql.SQL(', ').join([sql.Identifier('x', col) for col in primary_key]),
+                t_pk=sql.SQL(', ').join([sql.Identifier('t', col) for col in primary_key])
+            ))
+            existing = cursor.fetchone()[0]
+            
+            cursor.execute(sql.SQL("""
+                INSERT INTO {target} ({cols})
+                SELECT {cols} FROM {temp}
+                ON CONFLICT ({pk}) {action}
+            """).format(target=target, cols=cols, temp=sql.Identifier(temp_table), pk=pk,
+                        action=conflict_action))
+            updated = existing if assignments else 0
+            return cursor.rowcount - updated, updated
+        
+        # xmax = 0 only for freshly inserted tuples; updated rows carry the locking xid
+        merge_query = sql.SQL("""
+            WITH upserted AS (
+                INSERT INTO {target} ({cols})
+                SELECT {cols} FROM {temp}
+                ON CONFLICT ({pk}) {action}
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT
+                COUNT(*) FILTER (WHERE inserted),
+                COUNT(*) FILTER (WHERE NOT inserted)
+            FROM upserted
+        """).format(
+            target=target,
+            cols=cols,
+            temp=sql.Identifier(temp_table),
+            pk=pk,
+            action=conflict_action
+        )
+        cursor.execute(merge_query)
+        inserted, updated = cursor.fetchone()
+        return inserted, updated
+    
+    def _load_incremental(self, cursor, load_id: int, table_name: str, load_date: str, file_name: str,
+                          csv_file: Union[str, ChunkedCSVStream], csv_columns: List[str],
+                          natural_key: Optional[list]) -> tuple:
+        """
+        Write only rows that are new or changed since each key's previous version.
+        
+        The file is staged in an indexed temp table; a row is written when the
+        latest earlier row of its natural key (by _partition_date, found on the
+        primary key index) has a different _raw_hash. Unchanged rows are not
+        rewritten, so a key's state on a given date is its latest row with
+        _partition_date <= that date.
+        
+        Keys whose latest state is missing from the file get a tombstone: a
+        copy of that state in the load_date partition with _raw_hash NULL.
+        The current rows as of date D are therefore the latest row per key
+        with _partition_date <= D, kept only if its _raw_hash is not NULL.
+        An empty file tombstones nothing.
+        
+        Returns:
+            (rows written, unchanged rows skipped, keys tombstoned)
+        """
+        primary_key = self._primary_key(cursor, table_name)
+        if not natural_key:
+            raise ValueError("INCREMENTAL mode needs a natural_key")
+        if '_raw_hash' not in csv_columns:
+            raise ValueError("INCREMENTAL mode needs _raw_hash in the transformed data")
+        if not (primary_key and set(natural_key) <= set(primary_key) and set(primary_key) <= set(csv_columns)):
+            raise ValueError(f"INCREMENTAL mode needs a primary key on {table_name} "
+                             f"covering the natural key {natural_key}")
+        
+        self._update_progress(load_id, 'INCREMENTAL: Loading to temp table', 50)
+        temp_table = self._create_temp_table(cursor, table_name, load_id)
+        try:
+            columns_sql = sql.SQL(', ').join([sql.Identifier(col) for col in csv_columns])
+            self._copy_from(cursor, sql.Identifier(temp_table), columns_sql, csv_file)
+            cursor.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(temp_table)))
+            
+            cursor.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(sql.Identifier(temp_table)))
+            total = cursor.fetchone()[0]
+            
+            self._update_progress(load_id, 'INCREMENTAL: Comparing row hashes', 65)
+            
+            assignments = [
+                sql.SQL("{col} = EXCLUDED.{col}").format(col=sql.Identifier(col))
+                for col in csv_columns if col not in primary_key
+            ]
+            if '_loaded_at' not in csv_columns and self._has_column(cursor, table_name, '_loaded_at'):
+                assignments.append(sql.SQL("_loaded_at = DEFAULT"))
+            
+            cursor.execute(sql.SQL("""
+                INSERT INTO {target} ({cols})
+                SELECT {t_cols} FROM {temp} t
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM (
+                        SELECT x._raw_hash FROM {target} x
+                        WHERE ({x_key}) = ({t_key}) AND x._partition_date <= %s
+                        ORDER BY x._partition_date DESC
+                        LIMIT 1
+                    ) prev
+                    WHERE prev._raw_hash = t._raw_hash
+                )
+                ON CONFLICT ({pk}) DO UPDATE SET {assignments}
+            """).format(
+                target=sql.Identifier(*table_name.split('.')),
+                cols=columns_sql,
+                t_cols=sql.SQL(', ').join([sql.Identifier('t', col) for col in csv_columns]),
+                temp=sql.Identifier(temp_table),
+                x_key=sql.SQL(', ').join([sql.Identifier('x', col) for col in natural_key]),
+                t_key=sql.SQL(', ').join([sql.Identifier('t', col) for col in natural_key]),
+                pk=sql.SQL(', ').join([sql.Identifier(col) for col in primary_key]),
+                assignments=sql.SQL(', ').join(assignments)
+            ), (load_date,))
+            changed = cursor.rowcount
+            
+            removed = 0
+            if total:
+                self._update_progress(load_id, 'INCREMENTAL: Tombstoning removed keys', 75)
+                removed = self._tombstone_missing(cursor, table_name, temp_table, load_date, file_name,
+                                                  csv_columns, natural_key, primary_key, assignments)
+            else:
+                print("INCREMENTAL: empty file, no keys tombstoned")
+        finally:
+            self._drop_table(cursor, temp_table)
+        
+        return changed, total - changed, removed
+    
+    def _tombstone_missing(self, cursor, table_name: str, temp_table: str, load_date: str, file_name: str,
+                           csv_columns: List[str], natural_key: List[str], primary_key: List[str],
+                           assignments: list) -> int:
+        """
+        Mark keys that are live as of load_date but absent from the file as removed.
+        
+        Returns:
+            Number of tombstones written
+        """
+        overrides = {'_partition_date': sql.Placeholder('day'), '_file_name': sql.Placeholder('file_name'),
+                     '_raw_hash': sql.SQL("NULL")}
+        cursor.execute(sql.SQL("""
+            INSERT INTO {target} ({cols})
+            SELECT {prev_cols} FROM (
+                SELECT DISTINCT ON ({key}) * FROM {target}
+                WHERE _partition_date <= %(day)s
+                ORDER BY {key}, _partition_date DESC
+            ) prev
+            WHERE prev._raw_hash IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM {temp} t WHERE ({t_key}) = ({prev_key}))
+            ON CONFLICT ({pk}) DO UPDATE SET {assignments}
+        """).format(
+            target=sql.Identifier(*table_name.split('.')),
+            cols=sql.SQL(', ').join([sql.Identifier(col) for col in csv_columns]),
+            prev_cols=sql.SQL(', ').join([overrides.get(col, sql.Identifier('prev', col)) for col in csv_columns]),
+            key=sql.SQL(', ').join([sql.Identifier(col) for col in natural_key]),
+            temp=sql.Identifier(temp_table),
+            t_key=sql.SQL(', ').join([sql.Identifier('t', col) for col in natural_key]),
+            prev_key=sql.SQL(', ').join([sql.Identifier('prev', col) for col in natural_key]),
+            pk=sql.SQL(', ').join([sql.Identifier(col) for col in primary_key]),
+            assignments=sql.SQL(', ').join(assignments)
+        ), {'day': load_date, 'file_name': file_name})
+        return cursor.rowcount
+    
+    def _load_append(self, cursor, load_id: int, table_name: str, load_date: str,
+                     csv_file: Union[str, ChunkedCSVStream], csv_columns: List[str]) -> tuple:
+        """
+        Insert rows that are not staged yet, for append-only event tables.
+        
+        A row is skipped when a row with the same primary key (ignoring
+        _partition_date, so re-sent events loaded on an earlier day count too)
+        already exists, or on any remaining primary key conflict.
+        
+        The check only reads partitions from append_lookback_days before
+        load_date onwards, so older partitions are pruned from the plan.
+        The bound comes from the partition being loaded rather than from
+        event timestamps because partition dates are chosen at upload time
+        and need not follow the events. Later partitions are always
+        checked, so backfills skip events a newer load already holds.
+        
+        Returns:
+            (rows inserted, rows skipped)
+        """
+        primary_key = self._primary_key(cursor, table_name)
+        if not primary_key or not set(primary_key) <= set(csv_columns):
+            raise ValueError(f"APPEND mode needs a primary key on {table_name} covered by the file's columns")
+        event_key = [col for col in primary_key if col != PARTITION_COLUMN] or primary_key
+        
+        self._update_progress(load_id, 'APPEND: Staging rows', 50)
+        staged = self._stage_rows(cursor, table_name, load_id, csv_file, csv_columns)
+        try:
+            columns_sql = sql.SQL(', ').join([sql.Identifier(col) for col in csv_columns])
+            cursor.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(*staged)))
+            
+            cursor.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(sql.Identifier(*staged)))
+            total = cursor.fetchone()[0]
+            
+            params = []
+            probe_bound = sql.SQL("")
+            if self.append_lookback_days:
+                probe_bound = sql.SQL("AND x.{} >= %s::date - %s").format(sql.Identifier(PARTITION_COLUMN))
+                params.extend([load_date, self.append_lookback_days])
+            
+            self._update_progress(load_id, 'APPEND: Inserting new rows', 65)
+            cursor.execute(sql.SQL("""
+                INSERT INTO {target} ({cols})
+                SELECT {t_cols} FROM {temp} t
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {target} x WHERE ({x_key}) = ({t_key}) {probe_bound}
+                )
+                ON CONFLICT ({pk}) DO NOTHING
+            """).format(
+                target=sql.Identifier(*table_name.split('.')),
+                cols=columns_sql,
+                t_cols=sql.SQL(', ').join([sql.Identifier('t', col) for col in csv_columns]),
+                temp=sql.Identifier(*staged),
+                x_key=sql.SQL(', ').join([sql.Identifier('x', col) for col in event_key]),
+                t_key=sql.SQL(', ').join([sql.Identifier('t', col) for col in event_key]),
+                probe_bound=probe_bound,
+                pk=sql.SQL(', ').join([sql.Identifier(col) for col in primary_key])
+            ), params)
+            inserted = cursor.rowcount
+        finally:
+            self._drop_table(cursor, *staged)
+        
+        return inserted, total - inserted
+    
+    def _merge_delete_insert(self, cursor, load_id: int, table_name: str, temp_table: str,
+                             csv_columns: List[str], natural_key: List[str]) -> tuple:
+        """
+        Fallback merge for tables without a usable primary key: delete rows
+        whose natural key is being reloaded, then insert everything.
+        
+        Returns:
+            (inserted, updated) counts, where updated is the number of keys replaced
+        """
+        self._update_progress(load_id, 'UPSERT: Removing old records', 65)
+        
+        # Delete existing records with matching natural keys
+        # Build WHERE clause: WHERE (natural_key_col1, natural_key_col2) IN (SELECT ... FROM temp)
+        key_cols = sql.SQL(', ').join([sql.Identifier(col) for col in natural_key])
+        delete_query = sql.SQL("""
+            DELETE FROM {target} 
+            WHERE ({keys}) IN (
+                SELECT {keys} FROM {temp}
+            )
+        """).format(
+            target=sql.Identifier(*table_name.split('.')),
+            keys=key_cols,
+            temp=sql.Identifier(temp_table)
+        )
+        cursor.execute(delete_query)
+        deleted_count = cursor.rowcount
+        
+        if deleted_count > 0:
+            self._update_progress(load_id, f'UPSERT: Deleted {deleted_count} old records', 70)
+            print(f"UPSERT: Deleted {deleted_count} existing records")
+        
+        self._update_progress(load_id, 'UPSERT: Inserting new records', 75)
+        
+        # Insert all records from temp table
+        columns_sql = sql.SQL(', ').join([sql.Identifier(col) for col in csv_columns])
+        insert_query = sql.SQL("""
+            INSERT INTO {target} ({cols})
+            SELECT {cols} FROM {temp}
+        """).format(
+            target=sql.Identifier(*table_name.split('.')),
+            cols=columns_sql,
+            temp=sql.Identifier(temp_table)
+        )
+        cursor.execute(insert_query)
+        inserted_count = cursor.rowcount
+        
+        updated = min(deleted_count, inserted_count)
+        return inserted_count - updated, updated
+    
+    def _has_column(self, cursor, table_name: str, column: str) -> bool:
+        cursor.execute("""
+            SELECT 1 FROM pg_attribute
+            WHERE attrelid = %s::regclass AND attname = %s AND NOT attisdropped
+        """, (table_name, column))
+        return cursor.fetchone() is not None
+    
+    def _source_columns(self, csv_file: Union[str, ChunkedCSVStream, LandedRows]) -> List[str]:
+        """Column names of the CSV being loaded."""
+        if isinstance(csv_file, (ChunkedCSVStream, LandedRows)):
+            return csv_file.columns
+        
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            return next(csv.reader(f))
+    
+    def _copy_from(self, cursor, table, columns_sql, csv_file: Union[str, ChunkedCSVStream, LandedRows]):
+        """COPY a CSV file or stream (with header row) into a table; landed rows are INSERTed."""
+        if isinstance(csv_file, LandedRows):
+            cursor.execute(sql.SQL("INSERT INTO {} ({}) {}").format(table, columns_sql, csv_file.select))
+            return
+        
+        copy_query = self._copy_query(cursor, table, columns_sql, csv_file, header=True)
+        
+        if isinstance(csv_file, ChunkedCSVStream):
+            cursor.copy_expert(copy_query, csv_file, size=COPY_BUFFER_SIZE)
+        else:
+            with open(csv_file, 'rb') as f:
+                cursor.copy_expert(copy_query, f, size=COPY_BUFFER_SIZE)
+    
+    def _land_rows(self, cursor, table_name: str, load_id: int, csv_file: Union[str, ChunkedCSVStream],
+                   csv_columns: List[str], elt: SqlCoercions) -> LandedRows:
+        """
+        COPY an ELT file's raw values into an UNLOGGED landing table of text columns.
+        
+        Nothing is typed or coerced on the way in (text accepts every value),
+        so COPY does no per-value conversion; elt's SELECT then coerces all
+        rows in one statement when a strategy writes them (see _copy_from).
+        The landing table sits next to the target so parallel COPY
+        connections can reach it; drop it with _drop_table().
+        """
+        landing = landing_table(table_name, load_id)
+        self._update_progress(load_id, 'ELT: Landing raw rows', 40)
+        self._drop_table(cursor, *landing)
+        cursor.execute(sql.SQL("CREATE UNLOGGED TABLE {} ({})").format(
+            sql.Identifier(*landing),
+            sql.SQL(', ').join([sql.SQL("{} text").format(sql.Identifier(col)) for col in csv_columns])
+        ))
+        
+        try:
+            columns_sql = sql.SQL(', ').join([sql.Identifier(col) for col in csv_columns])
+            if self.copy_workers > 1:
+                self._copy_parallel(cursor, sql.Identifier(*landing), columns_sql, csv_file)
+            else:
+                self._copy_from(cursor, sql.Identifier(*landing), columns_sql, csv_file)
+            
+            select = elt.select(landing, csv_columns, column_types(cursor, table_name),
+                                cursor.connection.server_version)
+        except BaseException:
+            self._drop_table(cursor, *landing)
+            raise
+        return LandedRows(landing, csv_columns, select)
+    
+    def _copy_query(self, cursor, table, columns_sql, csv_file: Union[str, ChunkedCSVStream],
+                    header: bool) -> str:
+        """COPY ... FROM STDIN statement; streams not in UTF-8 get their COPY ENCODING."""
+        encoding = csv_file.encoding if isinstance(csv_file, ChunkedCSVStream) else 'UTF8'
+        options = [sql.SQL("FORMAT csv"), sql.SQL("DELIMITER ','")]
+        if header:
+            options.append(sql.SQL("HEADER true"))
+        if encoding != 'UTF8':
+            options.append(sql.SQL("ENCODING {}").format(sql.Literal(encoding)))
+        return sql.SQL("COPY {} ({}) FROM STDIN WITH ({})").format(
+            table,
+            columns_sql,
+            sql.SQL(', ').join(options)
+        ).as_string(cursor)
+    
+    def _copy_parallel(self, cursor, table, columns_sql, csv_file: Union[str, ChunkedCSVStream]):
+        """COPY a CSV file or stream (with header row) over copy_workers connections."""
+        copy_query = self._copy_query(cursor, table, columns_sql, csv_file, header=False)
+        
+        if isinstance(csv_file, ChunkedCSVStream):
+            rows = parallel_copy(copy_query, record_blocks(csv_file), self.copy_workers)
+        else:
+            with open(csv_file, 'rb') as f:
+                rows = parallel_copy(copy_query, record_blocks(iter(lambda: f.read(COPY_BUFFER_SIZE), b'')),
+                                     self.copy_workers)
+        print(f"Parallel COPY: {rows} rows over {self.copy_workers} connections")
     
     def _start_load(self, cursor, load_date: str, table_name: str, 
                    file_name: str, mapping_file: str) -> int:
@@ -165,13 +762,9 @@ class BulkLoader:
             raise RuntimeError("Failed to create load_history record")
         return result[0]
     
-    def _update_progress(self, cursor, load_id: int, stage: str, progress: int):
-        """Update progress in load_history."""
-        cursor.execute("""
-            UPDATE load_history 
-            SET current_stage = %s, progress_percent = %s
-            WHERE id = %s
-        """, (stage, progress, load_id))
+    def _update_progress(self, load_id: int, stage: str, progress: int):
+        """Queue a progress update in load_history (written asynchronously)."""
+        self.progress.update(load_id, stage, progress)
     
     def _complete_load(self, cursor, load_id: int, rows_loaded: int, 
                       status: str, error_message: Optional[str] = None):
@@ -1,7 +1,10 @@
 """YAML Mapping Parser - Reads and parses mapping files."""
 import yaml
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+LOAD_MODES = ('snapshot', 'incremental', 'upsert', 'append', 'insert')
+TRANSFORM_MODES = ('python', 'elt')
 
 
 class MappingParser:
@@ -54,3 +57,26 @@ class MappingParser:
     def get_reject_rules(self, mapping: Dict[str, Any]) -> List[str]:
         """Get reject rules."""
         return mapping.get('reject_rules', [])
+    
+    def get_load_mode(self, mapping: Dict[str, Any]) -> str:
+        """Get load mode: 'snapshot', 'incremental', 'upsert' (natural_key set), 'append' or 'insert'."""
+        load_mode = mapping.get('load_mode')
+        if load_mode is None:
+            return 'upsert' if self.get_natural_key(mapping) else 'insert'
+        if load_mode not in LOAD_MODES:
+            raise ValueError(f"Invalid load_mode '{load_mode}' (expected one of {', '.join(LOAD_MODES)})")
+        return load_mode
+    
+    def get_watermark_column(self, mapping: Dict[str, Any]) -> Optional[str]:
+        """Get the date/timestamp column tracked as a high-water mark, if any."""
+        column = mapping.get('watermark')
+        if column is not None and column not in self.get_column_mapping(mapping).values():
+            raise ValueError(f"watermark column '{column}' is not a mapped target column")
+        return column
+    
+    def get_transform_mode(self, mapping: Dict[str, Any]) -> str:
+        """Get where coercions run: 'python' (transformer, default) or 'elt' (SQL in the loader)."""
+        transform = mapping.get('transform', 'python')
+        if transform not in TRANSFORM_MODES:
+            raise ValueError(f"Invalid transform '{transform}' (expected one of {', '.join(TRANSFORM_MODES)})")
+        return transform
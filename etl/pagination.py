@@ -0,0 +1,107 @@
+"""Keyset (cursor) pagination for the history and webhook-activity APIs."""
+import base64
+from datetime import date, datetime, timedelta
+from typing import Any, List, Optional, Tuple
+
+from psycopg2 import sql
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Opaque cursor pointing just past (timestamp, id) in newest-first order."""
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{row_id}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    """
+    Inverse of encode_cursor.
+
+    Raises:
+        ValueError: Malformed cursor
+    """
+    try:
+        text = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        timestamp, row_id = text.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+
+
+def page_size(value: Optional[str]) -> int:
+    """`limit` query argument, clamped to 1..MAX_PAGE_SIZE (default DEFAULT_PAGE_SIZE)."""
+    if not value:
+        return DEFAULT_PAGE_SIZE
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except ValueError:
+        raise ValueError(f"Invalid limit: {value!r}")
+
+
+def parse_day(value: Optional[str], name: str) -> Optional[date]:
+    """YYYY-MM-DD query argument, or None if absent."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"Invalid {name} (use YYYY-MM-DD): {value!r}")
+
+
+def fetch_page(cursor, table: str, columns: List[str], order_column: str,
+               filters: List[Tuple[str, Any]], date_from: Optional[date] = None,
+               date_to: Optional[date] = None, after: Optional[Tuple[datetime, int]] = None,
+               limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[tuple], Optional[str]]:
+    """
+    One newest-first page of `table`, ordered by (order_column, id).
+
+    The cursor is compared as a row value, so with an index on
+    (order_column, id), or (filter column, order_column, id), every page
+    costs the same as the first however deep it is. Rows whose
+    order_column is NULL are never listed.
+
+    Args:
+        columns: Selected columns; must include order_column and id
+        filters: (column, value) equality filters; None values are skipped
+        date_from: First day included (inclusive, session time zone)
+        date_to: Last day included (inclusive)
+        after: decode_cursor() of the previous page's next_cursor
+
+    Returns:
+        (rows, next_cursor); next_cursor is None on the last page
+    """
+    conditions = [sql.SQL("{} IS NOT NULL").format(sql.Identifier(order_column))]
+    params: List[Any] = []
+
+    for column, value in filters:
+        if value is not None:
+            conditions.append(sql.SQL("{} = %s").format(sql.Identifier(column)))
+            params.append(value)
+    if date_from:
+        conditions.append(sql.SQL("{} >= %s").format(sql.Identifier(order_column)))
+        params.append(date_from)
+    if date_to:
+        conditions.append(sql.SQL("{} < %s").format(sql.Identifier(order_column)))
+        params.append(date_to + timedelta(days=1))
+    if after:
+        conditions.append(sql.SQL("({}, id) < (%s, %s)").format(sql.Identifier(order_column)))
+        params.extend(after)
+
+    cursor.execute(sql.SQL("""
+        SELECT {columns} FROM {table}
+        WHERE {conditions}
+        ORDER BY {order} DESC, id DESC
+        LIMIT %s
+    """).format(
+        columns=sql.SQL(', ').join([sql.Identifier(col) for col in columns]),
+        table=sql.Identifier(table),
+        conditions=sql.SQL(' AND ').join(conditions),
+        order=sql.Identifier(order_column)
+    ), params + [limit + 1])
+    rows = cursor.fetchall()
+
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last[columns.index(order_column)], last[columns.index('id')])
@@ -0,0 +1,138 @@
+"""Multiprocess chunked transform support for large CSV exports."""
+import csv
+import mmap
+import multiprocessing
+import os
+from io import StringIO
+from typing import Any, Dict, List, Tuple
+
+
+DEFAULT_CHUNK_MB = 16
+DEFAULT_MIN_PARALLEL_MB = 64
+
+
+def default_workers() -> int:
+    """
+    Worker processes for parallel transforms (ETL_TRANSFORM_WORKERS, default 1).
+
+    Opt-in: every concurrent load gets its own pool, so N webhook workers
+    with W transform workers each can run N x W processes at once.
+    """
+    return max(1, int(os.environ.get('ETL_TRANSFORM_WORKERS', 1)))
+
+
+def pool_context():
+    """
+    Start method for transform pools: spawn, never fork.
+
+    The web process already runs the connection pool and background threads
+    (progress writer, job workers); forking it would copy their locks in
+    whatever state they are in.
+    """
+    return multiprocessing.get_context('spawn')
+
+
+def default_chunk_bytes() -> int:
+    """Target input bytes per chunk (ETL_TRANSFORM_CHUNK_MB, default 16)."""
+    return int(float(os.environ.get('ETL_TRANSFORM_CHUNK_MB', DEFAULT_CHUNK_MB)) * 1024 * 1024)
+
+
+def default_min_parallel_bytes() -> int:
+    """Files smaller than this stay single-process (ETL_PARALLEL_MIN_MB, default 64)."""
+    return int(float(os.environ.get('ETL_PARALLEL_MIN_MB', DEFAULT_MIN_PARALLEL_MB)) * 1024 * 1024)
+
+
+def _record_end(data, start: int, target: int) -> int:
+    """
+    Offset just past the first record terminator at or after `target`.
+
+    `start` must be a record boundary. Quote parity from `start` tells whether
+    a newline sits inside a quoted field (multi-line Salesforce text), so only
+    newlines outside quotes end a record. Works on any ASCII-compatible encoding.
+    """
+    in_quotes = data[start:target].count(b'"') % 2 == 1
+    pos = target
+
+    while True:
+        newline = data.find(b'\n', pos)
+        if newline == -1:
+            return len(data)
+        if data[pos:newline].count(b'"') % 2 == 1:
+            in_quotes = not in_quotes
+        if not in_quotes:
+            return newline + 1
+        pos = newline + 1
+
+
+def split_records(path: str, chunk_bytes: int) -> Tuple[int, List[Tuple[int, int]]]:
+    """
+    Split a CSV file into byte ranges that start and end on record boundaries.
+
+    Returns:
+        (header_end, chunks) where the header occupies bytes [0, header_end)
+        and chunks is an ordered list of (start, end) offsets
+    """
+    if os.path.getsize(path) == 0:
+        return 0, []
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        size = len(data)
+        header_end = _record_end(data, 0, 0)
+
+        chunks = []
+        start = header_end
+        while start < size:
+            target = start + chunk_bytes
+            end = size if target >= size else _record_end(data, start, target)
+            chunks.append((start, end))
+            start = end
+
+    return header_end, chunks
+
+
+def read_header(path: str, header_end: int, encoding: str, errors_mode: str) -> List[str]:
+    """Parse the header record from the first `header_end` bytes."""
+    with open(path, 'rb') as f:
+        text = f.read(header_end).decode(encoding, errors_mode)
+    return next(csv.reader(StringIO(text, newline='')), [])
+
+
+def transform_chunk(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Worker entry point: transform one byte range of the input file.
+
+    Row numbers in the returned errors and rejects are relative to the chunk
+    (first record is row 2, as if it followed the header); the parent shifts
+    them and writes rejected rows to its sidecar.
+    """
+    from .reject_rules import bind_rules
+    from .transformer import CSVTransformer
+
+    with open(task['path'], 'rb') as f:
+        f.seek(task['start'])
+        text = f.read(task['end'] - task['start']).decode(task['encoding'], task['errors_mode'])
+
+    transformer = CSVTransformer(task['mapping'], workers=1, watermark=task['watermark'])
+    plan, mapped_headers = transformer._build_plan(task['headers'])
+    checks = bind_rules(transformer.reject_rules, mapped_headers)
+    hash_order = transformer._hash_order(plan, mapped_headers)
+    watermark_index = transformer._watermark_index(mapped_headers)
+    reader = csv.reader(StringIO(text, newline=''))
+
+    rejects = []
+    output = b''.join(transformer._generate_chunks(
+        reader, plan, len(task['headers']), task['metadata'],
+        checks, lambda row_num, rule_text, row: rejects.append((row_num, rule_text, row)),
+        hash_order, watermark_index, task['codec']
+    ))
+
+    return {
+        'data': output,
+        'records': transformer.records_read,
+        'row_count': transformer.row_count,
+        'row_errors': transformer.row_errors,
+        'rejects': rejects,
+        'parse_stats': transformer.get_parse_stats(),
+        'watermark_skipped': transformer.watermark_skipped,
+        'watermark_max': transformer.watermark_max,
+    }
@@ -0,0 +1,131 @@
+"""Multi-connection COPY: split a CSV stream into record-aligned blocks and COPY them concurrently."""
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator
+
+from etl.db_connection import connect_with_retry
+from etl.streaming import ChunkedCSVStream
+
+# Blocks handed to the COPY workers (cut at the first record end past this size)
+COPY_BLOCK_BYTES = 1024 * 1024
+COPY_BUFFER_SIZE = 256 * 1024
+_POLL_SECONDS = 0.5
+
+
+def default_copy_workers() -> int:
+    """Concurrent COPY connections per load (ETL_COPY_WORKERS, default 1 = single COPY)."""
+    return max(1, int(os.environ.get('ETL_COPY_WORKERS', 1)))
+
+
+def record_blocks(chunks: Iterable[bytes], block_bytes: int = COPY_BLOCK_BYTES,
+                  skip_header: bool = True) -> Iterator[bytes]:
+    """
+    Regroup CSV bytes (any chunking) into blocks that end on record boundaries.
+
+    Quote parity decides whether a newline ends a record, as in
+    etl.parallel.split_records, so quoted multi-line fields stay whole.
+
+    Args:
+        skip_header: Drop the first record (the header row)
+    """
+    buffer = b''
+    scanned = 0       # bytes of buffer already scanned for record ends
+    boundary = 0      # end of the last complete record in buffer
+    in_quotes = False
+
+    for chunk in chunks:
+        buffer += chunk
+        pos = scanned
+        while True:
+            newline = buffer.find(b'\n', pos)
+            if newline == -1:
+                break
+            if buffer.count(b'"', pos, newline) % 2:
+                in_quotes = not in_quotes
+            pos = newline + 1
+            if not in_quotes:
+                boundary = pos
+                if skip_header:
+                    buffer, pos, boundary, skip_header = buffer[pos:], 0, 0, False
+        scanned = pos
+
+        if boundary >= block_bytes:
+            yield buffer[:boundary]
+            buffer = buffer[boundary:]
+            scanned -= boundary
+            boundary = 0
+
+    if buffer and not skip_header:
+        yield buffer
+
+
+def parallel_copy(copy_query: str, blocks: Iterable[bytes], workers: int) -> int:
+    """
+    COPY blocks of CSV data over `workers` connections at once.
+
+    Each worker runs one COPY (autocommit) and pulls blocks from a shared
+    bounded queue, so faster connections take more of the file. The target
+    should be a table nobody else reads yet (e.g. an UNLOGGED staging table
+    merged afterwards): if any worker or the producer fails the remaining
+    COPYs are aborted and the error raised, but slices that already
+    finished stay committed.
+
+    Args:
+        copy_query: COPY ... FROM STDIN statement without HEADER
+        blocks: Record-aligned data blocks (see record_blocks)
+
+    Returns:
+        Rows copied
+    """
+    feed: queue.Queue = queue.Queue(maxsize=workers * 2)
+    failed = threading.Event()
+
+    def drain() -> Iterator[bytes]:
+        while True:
+            try:
+                block = feed.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if failed.is_set():
+                    raise RuntimeError("Parallel COPY aborted")
+                continue
+            if block is None:
+                return
+            yield block
+
+    def copy_slice() -> int:
+        try:
+            conn = connect_with_retry(autocommit=True)
+            try:
+                cursor = conn.cursor()
+                cursor.copy_expert(copy_query, ChunkedCSVStream([], drain()), size=COPY_BUFFER_SIZE)
+                return cursor.rowcount
+            finally:
+                conn.close()
+        except BaseException:
+            failed.set()
+            raise
+
+    def put(item) -> bool:
+        while not failed.is_set():
+            try:
+                feed.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='copy-slice') as executor:
+        futures = [executor.submit(copy_slice) for _ in range(workers)]
+        try:
+            for block in blocks:
+                if not put(block):
+                    break
+            for _ in futures:
+                put(None)
+        except BaseException:
+            failed.set()
+            raise
+
+        return sum(future.result() for future in futures)
@@ -0,0 +1,261 @@
+"""Range partitioning of staging tables by _partition_date."""
+import os
+from datetime import date, datetime, timedelta
+from typing import List, Tuple, Union
+
+import psycopg2
+from psycopg2 import sql
+
+PARTITION_COLUMN = '_partition_date'
+GRANULARITIES = ('day', 'month')
+
+
+def default_granularity() -> str:
+    """Partition size for new partitions (ETL_PARTITION_GRANULARITY: 'day' or 'month', default 'month')."""
+    granularity = os.environ.get('ETL_PARTITION_GRANULARITY', 'month').lower()
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"ETL_PARTITION_GRANULARITY must be one of {GRANULARITIES}, got '{granularity}'")
+    return granularity
+
+
+def partition_bounds(day: Union[date, str], granularity: str) -> Tuple[date, date]:
+    """[start, end) range of the partition holding `day`."""
+    if isinstance(day, str):
+        day = datetime.strptime(day, '%Y-%m-%d').date()
+
+    if granularity == 'day':
+        return day, day + timedelta(days=1)
+
+    start = day.replace(day=1)
+    end = date(start.year + 1, 1, 1) if start.month == 12 else date(start.year, start.month + 1, 1)
+    return start, end
+
+
+def partition_name(table_name: str, start: date, granularity: str) -> Tuple[str, str]:
+    """(schema, table) of the partition starting at `start`, e.g. staging.contacts_p202610."""
+    schema, table = table_name.split('.')
+    suffix = start.strftime('%Y%m%d' if granularity == 'day' else '%Y%m')
+    return schema, f"{table}_p{suffix}"
+
+
+def is_partitioned(cursor, table_name: str) -> bool:
+    """True if table_name is a partitioned parent table."""
+    cursor.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = %s::regclass", (table_name,))
+    row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def ensure_partition(cursor, table_name: str, day: Union[date, str], granularity: str = None) -> bool:
+    """
+    Create the partition of table_name holding `day` if it does not exist.
+
+    Does nothing for tables that are not partitioned, so the loader can call
+    it unconditionally before COPY.
+
+    Returns:
+        True if the table is partitioned (and the partition now exists)
+    """
+    if not is_partitioned(cursor, table_name):
+        return False
+
+    granularity = granularity or default_granularity()
+    start, end = partition_bounds(day, granularity)
+    schema, name = partition_name(table_name, start, granularity)
+
+    try:
+        cursor.execute(sql.SQL("""
+            CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {parent}
+            FOR VALUES FROM (%s) TO (%s)
+        """).format(
+            partition=sql.Identifier(schema, name),
+            parent=sql.Identifier(*table_name.split('.'))
+        ), (start, end))
+    except (psycopg2.errors.DuplicateTable, psycopg2.errors.UniqueViolation):
+        # A concurrent load created it after our IF NOT EXISTS check. Fine in
+        # autocommit mode; inside a transaction the error has aborted it
+        if not cursor.connection.autocommit:
+            raise
+    return True
+
+
+def migrate_to_partitioned(cursor, table_name: str, granularity: str = None,
+                           keep_legacy: bool = False) -> List[str]:
+    """
+    Convert an existing plain staging table into a partitioned one.
+
+    The table is renamed to <table>_legacy, a partitioned parent with the same
+    columns, defaults and indexes is created under the original name, one
+    partition per existing bucket is created and the rows are copied over.
+    Run inside a transaction so a failure leaves the original table untouched.
+
+    Args:
+        keep_legacy: Keep the renamed original table instead of dropping it
+
+    Returns:
+        Names of the partitions created
+    """
+    if is_partitioned(cursor, table_name):
+        return []
+
+    granularity = granularity or default_granularity()
+    schema, table = table_name.split('.')
+    legacy = f"{table}_legacy"
+
+    # Move the old table (and its primary key name) out of the way
+    cursor.execute(sql.SQL("ALTER TABLE {} RENAME TO {}").format(
+        sql.Identifier(schema, table), sql.Identifier(legacy)
+    ))
+    cursor.execute("""
+        SELECT conname FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'p'
+    """, (f"{schema}.{legacy}",))
+    row = cursor.fetchone()
+    if row:
+        cursor.execute(sql.SQL("ALTER TABLE {} RENAME CONSTRAINT {} TO {}").format(
+            sql.Identifier(schema, legacy), sql.Identifier(row[0]), sql.Identifier(f"{legacy}_pkey")
+        ))
+
+    cursor.execute(sql.SQL("""
+        CREATE TABLE {parent} (LIKE {legacy} INCLUDING ALL)
+        PARTITION BY RANGE ({column})
+    """).format(
+        parent=sql.Identifier(schema, table),
+        legacy=sql.Identifier(schema, legacy),
+        column=sql.Identifier(PARTITION_COLUMN)
+    ))
+
+    cursor.execute(sql.SQL("SELECT DISTINCT {column} FROM {legacy}").format(
+        column=sql.Identifier(PARTITION_COLUMN), legacy=sql.Identifier(schema, legacy)
+    ))
+    starts = sorted({partition_bounds(row[0], granularity)[0] for row in cursor.fetchall()})
+
+    created = []
+    for start in starts:
+        ensure_partition(cursor, table_name, start, granularity)
+        created.append(partition_name(table_name, start, granularity)[1])
+
+    cursor.execute(sql.SQL("INSERT INTO {parent} SELECT * FROM {legacy}").format(
+        parent=sql.Identifier(schema, table), legacy=sql.Identifier(schema, legacy)
+    ))
+
+    if not keep_legacy:
+        cursor.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(schema, legacy)))
+
+    return created
+
+
+def swap_lock_timeout_ms() -> int:
+    """Max wait for the swap's table locks (ETL_SWAP_LOCK_TIMEOUT_MS, default 30000)."""
+    return int(os.environ.get('ETL_SWAP_LOCK_TIMEOUT_MS', 30000))
+
+
+def add_bounds_check(cursor, shadow: Tuple[str, str], day: Union[date, str]):
+    """
+    Constrain a shadow table to one day of _partition_date.
+
+    ATTACH PARTITION trusts a matching CHECK constraint instead of scanning
+    the table inside the swap transaction.
+    """
+    start, end = partition_bounds(day, 'day')
+    cursor.execute(sql.SQL("""
+        ALTER TABLE {shadow} ADD CONSTRAINT {name}
+        CHECK ({column} IS NOT NULL AND {column} >= %s AND {column} < %s)
+    """).format(
+        shadow=sql.Identifier(*shadow),
+        name=sql.Identifier(f"{shadow[1]}_bounds"),
+        column=sql.Identifier(PARTITION_COLUMN)
+    ), (start, end))
+
+
+def swap_snapshot(cursor, table_name: str, shadow: Tuple[str, str], day: Union[date, str]) -> Tuple[str, int]:
+    """
+    Replace one day's snapshot of table_name with the rows of a shadow table.
+
+    On a partitioned table the shadow becomes the day's partition: the old
+    daily partition (if any) is detached and dropped and the shadow attached
+    and renamed in its place, all in one short transaction, so readers see
+    either the old or the new snapshot and no row is rewritten. The shadow
+    needs the parent's primary key and add_bounds_check() beforehand.
+
+    If the day falls inside a wider partition (e.g. monthly) or the table is
+    not partitioned, the day's rows are deleted and the shadow's inserted
+    instead, still in a single transaction; the shadow is then left for the
+    caller to drop.
+
+    Must run on an autocommit connection (the transaction is explicit).
+
+    Returns:
+        ('attached' or 'replaced', rows in the previous snapshot)
+    """
+    schema, table = table_name.split('.')
+    parent = sql.Identifier(schema, table)
+    start, end = partition_bounds(day, 'day')
+    _, daily_name = partition_name(table_name, start, 'day')
+
+    cursor.execute(sql.SQL("SELECT COUNT(*) FROM {} WHERE {} = %s").format(
+        parent, sql.Identifier(PARTITION_COLUMN)
+    ), (start,))
+    previous_rows = cursor.fetchone()[0]
+
+    partitioned = is_partitioned(cursor, table_name)
+    cursor.execute("""
+        SELECT c.relispartition FROM pg_class c
+        WHERE c.oid = to_regclass(%s)
+    """, (f"{schema}.{daily_name}",))
+    row = cursor.fetchone()
+    has_daily = bool(row and row[0])
+
+    cursor.execute("BEGIN")
+    try:
+        cursor.execute("SET LOCAL lock_timeout = %s", (f"{swap_lock_timeout_ms()}ms",))
+        method = 'replaced'
+
+        if partitioned:
+            if has_daily:
+                cursor.execute(sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(
+                    parent, sql.Identifier(schema, daily_name)
+                ))
+
+            cursor.execute("SAVEPOINT attach_snapshot")
+            try:
+                cursor.execute(sql.SQL("ALTER TABLE {} ATTACH PARTITION {} FOR VALUES FROM (%s) TO (%s)").format(
+                    parent, sql.Identifier(*shadow)
+                ), (start, end))
+                method = 'attached'
+            except psycopg2.errors.InvalidObjectDefinition:
+                # The day is covered by a wider partition
+                cursor.execute("ROLLBACK TO SAVEPOINT attach_snapshot")
+
+        if method == 'attached':
+            if has_daily:
+                cursor.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(schema, daily_name)))
+            cursor.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT {}").format(
+                sql.Identifier(*shadow), sql.Identifier(f"{shadow[1]}_bounds")
+            ))
+            cursor.execute(sql.SQL("ALTER TABLE {} RENAME TO {}").format(
+                sql.Identifier(*shadow), sql.Identifier(daily_name)
+            ))
+            cursor.execute("""
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = %s::regclass AND contype = 'p'
+            """, (f"{schema}.{daily_name}",))
+            row = cursor.fetchone()
+            if row:
+                cursor.execute(sql.SQL("ALTER TABLE {} RENAME CONSTRAINT {} TO {}").format(
+                    sql.Identifier(schema, daily_name), sql.Identifier(row[0]),
+                    sql.Identifier(f"{daily_name}_pkey")
+                ))
+        else:
+            cursor.execute(sql.SQL("DELETE FROM {} WHERE {} = %s").format(
+                parent, sql.Identifier(PARTITION_COLUMN)
+            ), (start,))
+            cursor.execute(sql.SQL("INSERT INTO {} SELECT * FROM {}").format(
+                parent, sql.Identifier(*shadow)
+            ))
+
+        cursor.execute("COMMIT")
+    except BaseException:
+        cursor.execute("ROLLBACK")
+        raise
+
+    return method, previous_rows
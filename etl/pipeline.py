@@ -0,0 +1,107 @@
+"""Fused single-pass validate + transform pipeline stage."""
+import csv
+import tempfile
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .csv_utils import normalize_duplicate_headers
+from .encoding_utils import PASSTHROUGH_CODECS, detect_encoding
+from .streaming import ChunkedCSVStream
+from .transformer import CSVTransformer
+from .validator import QAValidator, report_validation_progress
+
+# Transformed output stays in memory up to this size, then spills to a temp file
+SPOOL_MAX_BYTES = 32 * 1024 * 1024
+SPOOL_READ_SIZE = 256 * 1024
+
+
+class FusedPipeline:
+    """
+    Decodes and tokenizes each CSV row once and feeds it to both the QA
+    validator and the transformer.
+
+    Transformed output is buffered (memory, spilling to disk) until validation
+    has seen the whole file, so a failing file can still be quarantined without
+    anything reaching the database.
+    """
+
+    def __init__(self, validator: QAValidator, transformer: CSVTransformer,
+                 spool_dir: Optional[str] = None, spool_max_bytes: int = SPOOL_MAX_BYTES):
+        self.validator = validator
+        self.transformer = transformer
+        self.spool_dir = spool_dir
+        self.spool_max_bytes = spool_max_bytes
+        self.output: Optional[ChunkedCSVStream] = None
+
+    @property
+    def row_count(self) -> int:
+        return self.transformer.row_count
+
+    @property
+    def transform_errors(self) -> List[str]:
+        return self.transformer.errors
+
+    def run(self, input_file: str, partition_date: date, file_name: str,
+            source_report: str, progress_callback=None) -> Tuple[bool, List[str], Dict[str, Any]]:
+        """
+        Validate and transform a CSV file in one pass.
+
+        On success `self.output` is a stream of the transformed CSV (header
+        included) ready for BulkLoader.load_csv; close it when done.
+
+        Returns:
+            (is_valid, errors, stats) tuple, as QAValidator.validate_file
+        """
+        validator = self.validator
+        encoding, errors_mode = detect_encoding(input_file)
+        copy_encoding = self.transformer.copy_encoding(encoding, file_name, source_report)
+        if copy_encoding:
+            # The transformed bytes stay in the source encoding and are COPYed as-is
+            encoding, errors_mode = PASSTHROUGH_CODECS[copy_encoding], 'strict'
+
+        with open(input_file, 'r', encoding=encoding, errors=errors_mode, newline='') as f:
+            reader = csv.reader(f)
+
+            header = next(reader, None)
+            if not header:
+                return False, ["CSV file has no headers"], validator.stats
+
+            # Normalize duplicate headers (add __2, __3 suffixes automatically)
+            normalized_headers = normalize_duplicate_headers(header)
+
+            def checked_rows() -> Iterator[List[str]]:
+                stats = validator.stats
+                for row_num, row in enumerate(reader, start=2):
+                    validator.check_row(row_num, row)
+                    if progress_callback and row and stats['total_rows'] % 50000 == 0:
+                        report_validation_progress(progress_callback, stats['total_rows'])
+                    yield row
+
+            if validator.begin(normalized_headers):
+                # Header mismatch already fails the file: validate only, skip the transform
+                for _ in checked_rows():
+                    pass
+                return validator.finish(input_file)
+
+            spool = tempfile.SpooledTemporaryFile(max_size=self.spool_max_bytes, dir=self.spool_dir)
+            try:
+                stream = self.transformer.stream_rows(
+                    checked_rows(), normalized_headers, partition_date, file_name, source_report,
+                    copy_encoding=copy_encoding
+                )
+                for chunk in stream:
+                    spool.write(chunk)
+            except Exception:
+                spool.close()
+                raise
+
+        is_valid, errors, stats = validator.finish(input_file)
+
+        if not is_valid:
+            spool.close()
+            return is_valid, errors, stats
+
+        spool.seek(0)
+        chunks = iter(lambda: spool.read(SPOOL_READ_SIZE), b'')
+        self.output = ChunkedCSVStream(stream.columns, chunks, on_close=spool.close, encoding=stream.encoding)
+        return is_valid, errors, stats
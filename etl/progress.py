@@ -0,0 +1,127 @@
+"""Coalescing, asynchronous progress writer for load_history."""
+import atexit
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import psycopg2
+
+from etl.db_connection import pooled_connection
+
+TERMINAL_STATUSES = ('success', 'failed')
+
+
+class ProgressReporter:
+    """
+    Buffers load_history stage/percent updates and writes them in the background.
+
+    update() only records the latest (stage, percent) per load in memory and
+    returns immediately; a daemon thread flushes the buffer at most once per
+    `flush_interval` in a single transaction. complete() writes terminal
+    states synchronously. Buffered updates never overwrite a finished load:
+    the flush only touches rows whose status is not success/failed.
+    """
+
+    def __init__(self, flush_interval: Optional[float] = None):
+        """
+        Args:
+            flush_interval: Minimum seconds between background flushes
+                (ETL_PROGRESS_FLUSH_SECONDS, default 0.5)
+        """
+        self.flush_interval = (flush_interval if flush_interval is not None
+                               else float(os.environ.get('ETL_PROGRESS_FLUSH_SECONDS', 0.5)))
+
+        self._pending: Dict[int, Tuple[str, int]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def update(self, load_id: int, stage: str, progress: int):
+        """Record the latest stage/percent for a load (never blocks on the database)."""
+        with self._lock:
+            self._pending[load_id] = (stage, progress)
+            if self._thread is None:
+                self._start()
+        self._wakeup.set()
+
+    def complete(self, load_id: int, stage: str, progress: int, status: str):
+        """Write a stage together with a status immediately and durably."""
+        with self._lock:
+            self._pending.pop(load_id, None)
+
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE load_history
+                SET current_stage = %s, progress_percent = %s, status = %s, completed_at = %s
+                WHERE id = %s
+            """, (stage, progress, status, datetime.now() if status in TERMINAL_STATUSES else None, load_id))
+            conn.commit()
+            cursor.close()
+
+    def flush(self):
+        """Write all buffered updates now."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+
+            try:
+                with pooled_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.executemany("""
+                        UPDATE load_history
+                        SET current_stage = %s, progress_percent = %s
+                        WHERE id = %s AND status NOT IN ('success', 'failed')
+                    """, [(stage, progress, load_id) for load_id, (stage, progress) in batch.items()])
+                    conn.commit()
+                    cursor.close()
+            except psycopg2.Error as e:
+                # Progress is best effort: keep the values for the next flush
+                # unless something newer has arrived meanwhile
+                print(f"Progress flush failed ({len(batch)} loads): {e}")
+                with self._lock:
+                    for load_id, value in batch.items():
+                        self._pending.setdefault(load_id, value)
+
+    def close(self):
+        """Stop the background thread after a final flush."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name='progress-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+            self.flush()
+            # Bound the write rate; updates arriving meanwhile coalesce
+            if self._stop.wait(self.flush_interval):
+                break
+
+
+_reporter: Optional[ProgressReporter] = None
+_reporter_lock = threading.Lock()
+
+
+def get_progress_reporter() -> ProgressReporter:
+    """The process-wide progress reporter (created on first use)."""
+    global _reporter
+    if _reporter is None:
+        with _reporter_lock:
+            if _reporter is None:
+                _reporter = ProgressReporter()
+                atexit.register(_reporter.close)
+    return _reporter
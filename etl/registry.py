@@ -0,0 +1,264 @@
+"""Mapping Registry - parses each mapping file once and serves compiled mappings."""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from .mapper import MappingParser
+from .reject_rules import RejectRule, parse_reject_rules
+
+DEFAULT_NULL_LIKE = ["", "NULL", "N/A", "n/a", "null"]
+COERCION_RULES = ('trim', 'lower', 'boolean', 'date', 'timestamptz', 'numeric')
+
+# Distinct header rows remembered per mapping (Salesforce exports rarely vary)
+_HEADER_PLAN_CACHE_SIZE = 32
+
+_parser = MappingParser()
+
+
+def default_reload_seconds() -> float:
+    """Seconds between checks of the mappings directory for changed files (ETL_MAPPING_RELOAD_SECONDS)."""
+    return max(0.0, float(os.environ.get('ETL_MAPPING_RELOAD_SECONDS', 2)))
+
+
+class CompiledMapping(dict):
+    """
+    A parsed mapping plus everything derived from it, computed once.
+
+    It is still the mapping dict, so mapping.get(...) and the MappingParser
+    getters keep working; the derived plans are attributes. Treat it as
+    read-only: edits to the dict are not reflected in the attributes.
+    """
+
+    def __init__(self, mapping: Dict[str, Any], name: Optional[str] = None,
+                 path: Optional[str] = None, version: Optional[Tuple[int, int]] = None):
+        """
+        Args:
+            mapping: Parsed YAML mapping
+            name: Mapping name (file stem), if loaded from a file
+            path: Mapping file path
+            version: (mtime_ns, size) of the file when it was parsed
+
+        Raises:
+            ValueError: On an invalid load_mode, transform, watermark or reject rule
+        """
+        super().__init__(mapping)
+        self.name = name
+        self.path = path
+        self.version = version
+        # Content fingerprint stamped into _mapping_version: unlike `version` it
+        # is the same on every deploy of the same mapping, and ignores comments
+        self.fingerprint = hashlib.sha256(
+            json.dumps(mapping, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()[:12]
+
+        self.column_mapping: Dict[str, str] = self.get('columns', {})
+        self.target_columns: List[str] = list(self.column_mapping.values())
+        self.coercions: Dict[str, str] = self.get('coercions', {})
+        self.null_like: List[str] = self.get('null_like', DEFAULT_NULL_LIKE)
+        self.null_values = frozenset(self.null_like)
+        self.natural_key: List[str] = self.get('natural_key', [])
+
+        target_object = self.get('target_object')
+        self.target_table: Optional[str] = f"staging.{target_object}" if target_object else None
+        self.load_mode = _parser.get_load_mode(self)
+        self.transform = _parser.get_transform_mode(self)
+        self.watermark_column = _parser.get_watermark_column(self)
+
+        # Coercion plan: known rules per column, in the order they are applied
+        self.coercion_steps: Dict[str, Tuple[str, ...]] = {
+            column: tuple(rule.strip() for rule in (coercion or '').split('|') if rule.strip() in COERCION_RULES)
+            for column, coercion in self.coercions.items()
+        }
+
+        # Reverse mapping (target -> source) and the source side of keys and rules
+        self.reverse_mapping: Dict[str, str] = {v: k for k, v in self.column_mapping.items()}
+        self.source_key_cols = [self.reverse_mapping.get(k, k) for k in self.natural_key]
+        self.reject_rules: List[RejectRule] = parse_reject_rules(self.get('reject_rules', []), self.target_columns)
+        self.source_rule_cols = [self.reverse_mapping.get(rule.column, rule.column) for rule in self.reject_rules]
+
+        self._header_plans: Dict[Tuple[str, ...], Tuple[List[Tuple[int, str]], List[str]]] = {}
+
+    def header_plan(self, source_headers: List[str]) -> Tuple[List[Tuple[int, str]], List[str]]:
+        """
+        Resolve a (normalized) header row against the mapping, cached per header.
+
+        Returns:
+            (positions, mapped_headers): one (source_index, target_column) pair
+            per mapped column in source order, and the target column names.
+            Both are shared; copy before modifying
+        """
+        key = tuple(source_headers)
+        plan = self._header_plans.get(key)
+        if plan is None:
+            positions = [(index, self.column_mapping[header])
+                         for index, header in enumerate(key) if header in self.column_mapping]
+            plan = (positions, [target for _, target in positions])
+            if len(self._header_plans) >= _HEADER_PLAN_CACHE_SIZE:
+                self._header_plans.clear()
+            self._header_plans[key] = plan
+        return plan
+
+    def __reduce__(self):
+        # Reject predicates are closures; workers recompile from the plain dict
+        return CompiledMapping, (dict(self), self.name, self.path, self.version)
+
+
+def compile_mapping(mapping: Dict[str, Any]) -> CompiledMapping:
+    """Compile a mapping dict (returned as-is if it already is a CompiledMapping)."""
+    if isinstance(mapping, CompiledMapping):
+        return mapping
+    return CompiledMapping(mapping)
+
+
+class HeaderIndex:
+    """
+    Inverted index from source header names to the mappings expecting them.
+
+    Scores a file's header row against every mapping at once: only the
+    postings of its own headers are visited.
+    """
+
+    def __init__(self, mappings: Dict[str, CompiledMapping]):
+        self.postings: Dict[str, List[str]] = {}
+        self.sizes: Dict[str, int] = {}
+        for name, mapping in mappings.items():
+            self.sizes[name] = len(mapping.column_mapping)
+            for header in mapping.column_mapping:
+                self.postings.setdefault(header, []).append(name)
+
+    def score(self, normalized_headers: List[str]) -> List[Tuple[float, str]]:
+        """
+        (similarity, mapping name) for every mapping sharing a header, best first.
+
+        Similarity is |shared| / |union| of the header sets, so 1.0 means the
+        file has exactly the mapping's headers (what QA validation requires).
+        """
+        headers = set(normalized_headers)
+        shared = Counter()
+        for header in headers:
+            shared.update(self.postings.get(header, ()))
+        scores = [(count / (self.sizes[name] + len(headers) - count), name) for name, count in shared.items()]
+        return sorted(scores, key=lambda item: (-item[0], item[1]))
+
+
+class MappingRegistry:
+    """
+    Compiled mappings of a directory, reloaded only when a file changes.
+
+    Files are stat()ed at most every `reload_seconds`; in between, a lookup is
+    a dict hit. Changed files (mtime or size) are re-parsed on their next
+    lookup, new files show up and deleted ones disappear.
+    """
+
+    def __init__(self, mappings_dir: str = "Mappings", reload_seconds: Optional[float] = None):
+        self.mappings_dir = Path(mappings_dir)
+        self.reload_seconds = reload_seconds if reload_seconds is not None else default_reload_seconds()
+        self._lock = threading.Lock()
+        self._versions: Dict[str, Tuple[int, int]] = {}
+        self._compiled: Dict[str, CompiledMapping] = {}
+        self._checked_at: Optional[float] = None
+        self._header_index: Optional[HeaderIndex] = None
+
+    def names(self) -> List[str]:
+        """Names of the available mappings (file stems), sorted."""
+        self._refresh()
+        return sorted(self._versions)
+
+    def get(self, mapping_name: str) -> CompiledMapping:
+        """
+        Compiled mapping by name.
+
+        Raises:
+            FileNotFoundError: No such mapping file
+            ValueError: The mapping is invalid (see CompiledMapping)
+        """
+        self._refresh()
+        version = self._versions.get(mapping_name)
+        if version is None:
+            raise FileNotFoundError(f"Mapping file not found: {self.mappings_dir / f'{mapping_name}.yaml'}")
+
+        compiled = self._compiled.get(mapping_name)
+        if compiled is not None and compiled.version == version:
+            return compiled
+
+        with self._lock:
+            compiled = self._compiled.get(mapping_name)
+            if compiled is None or compiled.version != version:
+                path = self.mappings_dir / f"{mapping_name}.yaml"
+                with open(path, 'r') as f:
+                    compiled = CompiledMapping(yaml.safe_load(f) or {}, mapping_name, str(path), version)
+                self._compiled[mapping_name] = compiled
+                print(f"Compiled mapping '{mapping_name}'")
+            return compiled
+
+    def match_headers(self, normalized_headers: List[str],
+                      preferred: Optional[str] = None) -> Tuple[Optional[str], float]:
+        """
+        Mapping whose `columns` best match a header row.
+
+        Args:
+            normalized_headers: Header row after normalize_duplicate_headers
+            preferred: Mapping that wins ties (e.g. guessed from the file name)
+
+        Returns:
+            (mapping name, similarity 0..1), or (None, 0.0) if no mapping
+            shares a header
+        """
+        scores = self.header_index().score(normalized_headers)
+        if not scores:
+            return None, 0.0
+        best = scores[0][0]
+        tied = [name for score, name in scores if score == best]
+        return (preferred if preferred in tied else tied[0]), best
+
+    def header_index(self) -> HeaderIndex:
+        """Header index over all valid mappings, rebuilt after any file changes."""
+        self._refresh()
+        index = self._header_index
+        if index is None:
+            index = self._header_index = HeaderIndex(self.valid_mappings())
+        return index
+
+    def valid_mappings(self) -> Dict[str, CompiledMapping]:
+        """Every mapping that compiles, by name; broken files are logged and left out."""
+        mappings = {}
+        for name in self.names():
+            try:
+                mappings[name] = self.get(name)
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                print(f"Mapping '{name}' skipped: {e}")
+        return mappings
+
+    def invalidate(self):
+        """Re-check the directory on the next lookup."""
+        self._checked_at = None
+
+    def _refresh(self):
+        """Re-stat the mapping files if reload_seconds have passed since the last check."""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.reload_seconds:
+            return
+
+        with self._lock:
+            versions = {}
+            if self.mappings_dir.exists():
+                for path in self.mappings_dir.glob("*.yaml"):
+                    try:
+                        stat = path.stat()
+                    except FileNotFoundError:
+                        continue
+                    versions[path.stem] = (stat.st_mtime_ns, stat.st_size)
+
+            for name in set(self._compiled) - set(versions):
+                del self._compiled[name]
+            if versions != self._versions:
+                self._header_index = None
+            self._versions = versions
+            self._checked_at = now
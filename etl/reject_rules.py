@@ -0,0 +1,141 @@
+"""Reject rules - compiles mapping `reject_rules` into row predicates."""
+import csv
+import re
+from typing import Any, Callable, List, Optional
+
+_RULE_RE = re.compile(
+    r"^\s*(?P<column>\w+)\s+(?P<op>is\s+not\s+null|is\s+null|!=|<>|=)\s*(?P<operand>.*?)\s*$",
+    re.IGNORECASE,
+)
+
+
+class RejectRule:
+    """
+    One parsed reject rule.
+
+    Supported forms (keywords are case-insensitive):
+        "<column> is null", "<column> is not null",
+        "<column> = 'value'", "<column> != 'value'"
+
+    Columns are target column names; a row matching any rule is rejected.
+    """
+
+    def __init__(self, text: str, column: str, op: str, operand: Optional[str] = None):
+        self.text = text
+        self.column = column
+        self.op = op
+        self.operand = operand
+        self.matches = self._compile()
+
+    @classmethod
+    def parse(cls, text: str) -> 'RejectRule':
+        match = _RULE_RE.match(text or '')
+        if not match:
+            raise ValueError(f"Invalid reject rule: {text!r}")
+
+        op = ' '.join(match.group('op').lower().split())
+        operand = match.group('operand')
+
+        if op in ('is null', 'is not null'):
+            if operand:
+                raise ValueError(f"Invalid reject rule: {text!r}")
+            return cls(text, match.group('column'), op)
+
+        if not operand:
+            raise ValueError(f"Reject rule needs a value to compare: {text!r}")
+        if len(operand) >= 2 and operand[0] == operand[-1] and operand[0] in ('"', "'"):
+            operand = operand[1:-1]
+        return cls(text, match.group('column'), '!=' if op == '<>' else op, operand)
+
+    def _compile(self) -> Callable[[Any], bool]:
+        """Predicate over one column value (None or '' means null)."""
+        if self.op == 'is null':
+            return lambda value: value is None or value == ''
+        if self.op == 'is not null':
+            return lambda value: value is not None and value != ''
+
+        operand = self.operand
+        if self.op == '=':
+            return lambda value: value is not None and str(value) == operand
+        return lambda value: value is None or str(value) != operand
+
+    def __repr__(self):
+        return f"RejectRule({self.text!r})"
+
+
+def parse_reject_rules(rules: List[str], columns: Optional[List[str]] = None) -> List[RejectRule]:
+    """
+    Parse a mapping's reject rules.
+
+    Args:
+        rules: Rule strings from the mapping
+        columns: Known target columns; rules naming anything else are an error
+
+    Raises:
+        ValueError: On a malformed rule or unknown column
+    """
+    parsed = [RejectRule.parse(rule) for rule in rules or []]
+
+    if columns is not None:
+        known = set(columns)
+        for rule in parsed:
+            if rule.column not in known:
+                raise ValueError(f"Reject rule {rule.text!r} refers to unknown column '{rule.column}'")
+
+    return parsed
+
+
+def bind_rules(rules: List[RejectRule], columns: List[str]) -> List[tuple]:
+    """
+    Resolve rules to (position, rule) pairs over a positional row.
+
+    Columns absent from this row layout get position None (always null).
+    """
+    positions = {column: index for index, column in enumerate(columns)}
+    return [(positions.get(rule.column), rule) for rule in rules]
+
+
+def first_match(checks: List[tuple], values: List[Any]) -> Optional[RejectRule]:
+    """First rule matching a positional row, or None if the row is kept."""
+    width = len(values)
+    for index, rule in checks:
+        value = values[index] if index is not None and index < width else None
+        if rule.matches(value):
+            return rule
+    return None
+
+
+class RejectSink:
+    """
+    Writes rejected source rows to a sidecar CSV next to the quarantine files.
+
+    The file is only created once the first row is rejected. Columns are
+    `_row_number`, `_reject_rule` and then the original source columns.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._headers: List[str] = []
+        self._file = None
+        self._writer = None
+
+    def begin(self, source_headers: List[str]):
+        self._headers = list(source_headers)
+
+    def write(self, row_num: int, rule_text: str, row: List[str]):
+        if self._file is None:
+            self._file = open(self.path, 'w', encoding='utf-8', newline='')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(['_row_number', '_reject_rule'] + self._headers)
+        self._writer.writerow([row_num, rule_text] + list(row))
+        self.count += 1
+
+    @property
+    def written(self) -> bool:
+        return self.count > 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,86 @@
+"""File-like adapters for streaming generated CSV straight into COPY."""
+from typing import Callable, Iterator, List, Optional
+
+# Consumed bytes kept at the front of the read buffer before it is compacted
+COMPACT_BYTES = 1024 * 1024
+
+
+class ChunkedCSVStream:
+    """
+    Read-only file-like object over an iterator of encoded CSV chunks.
+
+    psycopg2's copy_expert only needs read(size); chunks are pulled lazily so
+    the full CSV never has to exist on disk or in memory. `encoding` is the
+    PostgreSQL name of the chunks' encoding, passed to COPY ENCODING.
+
+    Chunks are appended to a bytearray and read() advances an offset into
+    it, so each call copies only the bytes it returns; the consumed prefix
+    is dropped once it is both COMPACT_BYTES and half the buffer.
+    """
+
+    def __init__(self, columns: List[str], chunks: Iterator[bytes],
+                 on_close: Optional[Callable[[], None]] = None, encoding: str = 'UTF8'):
+        self.columns = columns
+        self.encoding = encoding
+        self._chunks = chunks
+        self._on_close = on_close
+        self._buffer = bytearray()
+        self._offset = 0
+        self._exhausted = False
+        self.closed = False
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            parts = [self._take_buffer()]
+            parts.extend(self._chunks)
+            self._exhausted = True
+            return b''.join(parts)
+
+        while len(self._buffer) - self._offset < size and not self._exhausted:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                self._exhausted = True
+
+        start = self._offset
+        self._offset = min(start + size, len(self._buffer))
+        with memoryview(self._buffer) as view:
+            data = bytes(view[start:self._offset])
+
+        if self._offset >= COMPACT_BYTES and self._offset * 2 >= len(self._buffer):
+            del self._buffer[:self._offset]
+            self._offset = 0
+        return data
+
+    def _take_buffer(self) -> bytes:
+        """Unread buffered bytes; empties the buffer."""
+        with memoryview(self._buffer) as view:
+            data = bytes(view[self._offset:])
+        self._buffer = bytearray()
+        self._offset = 0
+        return data
+
+    def readable(self) -> bool:
+        return True
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        close_chunks = getattr(self._chunks, 'close', None)
+        if close_chunks:
+            close_chunks()
+        if self._on_close:
+            self._on_close()
+
+    def __iter__(self) -> Iterator[bytes]:
+        if len(self._buffer) > self._offset:
+            yield self._take_buffer()
+        yield from self._chunks
+        self._exhausted = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,178 +1,635 @@
 """CSV Transformation Engine - Applies mappings and coercions."""
 import csv
+import hashlib
+import os
 import re
+import string
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, date
-from dateutil import parser as date_parser
 from io import StringIO
-from typing import Dict, List, Any, Optional
-from .encoding_utils import detect_encoding
+from itertools import islice
+from typing import Dict, List, Any, Optional, Callable, Iterable, Iterator, Tuple
+from .encoding_utils import PASSTHROUGH_CODECS, copy_passthrough_encoding, detect_encoding
 from .csv_utils import normalize_duplicate_headers
+from .date_parsing import ColumnDateParser, merge_parse_stats
+from .registry import compile_mapping
+from .reject_rules import RejectRule, RejectSink, bind_rules, first_match
+from . import parallel
+from .streaming import ChunkedCSVStream
+from .watermarks import to_watermark
+
+
+METADATA_COLUMNS = ['_partition_date', '_file_name', '_source_report', '_extract_ts', '_mapping_version', '_raw_hash']
+
+# Transformed output is yielded to COPY in chunks of roughly this many characters
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# Characters stripped before numeric conversion ($, thousands separators, whitespace incl. NBSP)
+_NUMERIC_STRIP = str.maketrans('', '', '$,' + string.whitespace + '\xa0')
+_NUMERIC_STRIP_RE = re.compile(r'[$,\s]')
+
+# Spellings the boolean coercion accepts (after lower() and strip())
+BOOLEAN_TRUE = ('true', 'yes', '1', 't', 'y')
+BOOLEAN_FALSE = ('false', 'no', '0', 'f', 'n')
 
 
 class CSVTransformer:
     """Transforms CSV data based on YAML mapping specifications."""
-    
-    def __init__(self, mapping: Dict[str, Any]):
-        self.mapping = mapping
-        self.column_mapping = mapping.get('columns', {})
-        self.coercions = mapping.get('coercions', {})
-        self.null_like = mapping.get('null_like', ["", "NULL", "N/A", "n/a", "null"])
-    
-    def transform_csv(self, input_file: str, output_file: str, 
-                     partition_date: date, file_name: str, 
+
+    def __init__(self, mapping: Dict[str, Any], workers: Optional[int] = None,
+                 chunk_bytes: Optional[int] = None, min_parallel_bytes: Optional[int] = None,
+                 rejects_path: Optional[str] = None, watermark: Optional[datetime] = None,
+                 copy_passthrough: Optional[bool] = None):
+        """
+        Args:
+            mapping: Parsed YAML mapping or CompiledMapping (compiled here if
+                a plain dict; see etl.registry)
+            workers: Processes for large files (default ETL_TRANSFORM_WORKERS, 1)
+            chunk_bytes: Input bytes per parallel chunk (default ETL_TRANSFORM_CHUNK_MB)
+            min_parallel_bytes: Files below this size stay single-process
+                (default ETL_PARALLEL_MIN_MB)
+            rejects_path: Sidecar CSV for rows matching a reject rule (only
+                created if a row is rejected; without it rejects are just counted)
+            watermark: High-water mark of the mapping's `watermark` column;
+                rows older than it are skipped (see etl.watermarks)
+            copy_passthrough: Stream Latin-1/Windows-1252 files to COPY in their
+                own encoding (default ETL_COPY_PASSTHROUGH, on; see
+                encoding_utils.copy_passthrough_encoding)
+        """
+        self.mapping = compile_mapping(mapping)
+        self.column_mapping = self.mapping.column_mapping
+        self.coercions = self.mapping.coercions
+        self.null_like = self.mapping.null_like
+
+        self.workers = workers if workers is not None else parallel.default_workers()
+        self.chunk_bytes = chunk_bytes or parallel.default_chunk_bytes()
+        self.min_parallel_bytes = (min_parallel_bytes if min_parallel_bytes is not None
+                                   else parallel.default_min_parallel_bytes())
+        self.copy_passthrough = (copy_passthrough if copy_passthrough is not None
+                                 else os.environ.get('ETL_COPY_PASSTHROUGH', '1') != '0')
+
+        self.reject_rules = self.mapping.reject_rules
+        self.rejects_path = rejects_path
+        self.reject_sink: Optional[RejectSink] = None
+        self.watermark_column: Optional[str] = self.mapping.watermark_column
+        self.watermark = to_watermark(watermark)
+
+        # ELT mappings (`transform: elt`) are coerced by the loader in SQL (see
+        # etl.elt); only columns that reject rules or the watermark compare
+        # row by row are still coerced here. _raw_hash hashes the uncoerced
+        # values, so it is the same in both modes
+        self.elt = self.mapping.transform == 'elt'
+        python_columns = {rule.column for rule in self.reject_rules} | {self.watermark_column}
+
+        # Compile once per transformer: null checks become a frozenset lookup and
+        # each target column gets a pre-built coercion chain (None = pass-through);
+        # chains hold this transformer's date parsers, so they are not shared
+        self.null_values = self.mapping.null_values
+        self.date_parsers: Dict[str, ColumnDateParser] = {}
+        self.coercers: Dict[str, Optional[Callable[[Any], Any]]] = {
+            target_col: (self._compile_coercion(target_col, self.mapping.coercion_steps.get(target_col, ()))
+                         if not self.elt or target_col in python_columns else None)
+            for target_col in self.mapping.target_columns
+        }
+
+        # Results of the most recent transform/stream
+        self.row_count = 0
+        self.records_read = 0
+        self.row_errors: List[Tuple[int, str]] = []
+        self.rejected_count = 0
+        self.watermark_skipped = 0
+        self.watermark_max: Optional[datetime] = None
+        self._worker_parse_stats: List[Dict[str, Dict[str, Any]]] = []
+
+    @property
+    def errors(self) -> List[str]:
+        """Row-level errors from the most recent transform."""
+        return [f"Row {row_num}: {message}" for row_num, message in self.row_errors]
+
+    @property
+    def rejects_file(self) -> Optional[str]:
+        """Path of the rejects sidecar from the most recent transform, if any row was rejected."""
+        if self.reject_sink and self.reject_sink.written:
+            return self.reject_sink.path
+        return None
+
+    def transform_csv(self, input_file: str, output_file: str,
+                     partition_date: date, file_name: str,
                      source_report: str) -> tuple[int, List[str]]:
         """
         Transform a CSV file according to mapping.
-        
+
         Returns:
             (row_count, errors) tuple
         """
-        errors = []
-        row_count = 0
-        
+        # The output file is read back as UTF-8
+        with self.open_stream(input_file, partition_date, file_name, source_report,
+                              passthrough=False) as stream:
+            with open(output_file, 'wb') as outfile:
+                for chunk in stream:
+                    outfile.write(chunk)
+
+        return self.row_count, self.errors
+
+    def open_stream(self, input_file: str, partition_date: date,
+                    file_name: str, source_report: str, passthrough: bool = True) -> ChunkedCSVStream:
+        """
+        Transform a CSV file lazily as encoded chunks.
+
+        The returned stream can be handed straight to COPY (no transformed_*.csv
+        on disk). Its `columns` attribute holds the output header; row_count,
+        errors and rejected_count on this transformer are final once the stream
+        is exhausted. Rows matching a reject rule are left out of the output.
+        For ELT mappings values are only projected, not coerced (see etl.elt).
+
+        Output is UTF-8, except that with `passthrough` a Latin-1/Windows-1252
+        file keeps its own encoding; the stream's `encoding` then names it
+        for COPY ENCODING.
+
+        Files of at least `min_parallel_bytes` are split at record boundaries and
+        transformed by a pool of `workers` processes; output order is preserved.
+        """
         encoding, errors_mode = detect_encoding(input_file)
-        
-        with open(input_file, 'r', encoding=encoding, errors=errors_mode) as infile:
-            reader = csv.DictReader(infile)
-            
-            if not reader.fieldnames:
+        copy_encoding = self.copy_encoding(encoding, file_name, source_report) if passthrough else None
+        if copy_encoding:
+            encoding, errors_mode = PASSTHROUGH_CODECS[copy_encoding], 'strict'
+
+        if self.uses_parallel(input_file):
+            self._reset_results()
+            metadata = self._metadata_values(partition_date, file_name, source_report)
+            return self._open_parallel_stream(input_file, encoding, errors_mode, metadata, copy_encoding)
+
+        infile = open(input_file, 'r', encoding=encoding, errors=errors_mode, newline='')
+
+        try:
+            reader = csv.reader(infile)
+
+            header = next(reader, None)
+            if not header:
                 raise ValueError("CSV file has no headers")
-            
+
             # Normalize duplicate headers (add __2, __3 suffixes automatically)
-            original_headers = list(reader.fieldnames)
-            normalized_headers = normalize_duplicate_headers(original_headers)
-            reader.fieldnames = normalized_headers
-            
-            mapped_headers = self._map_headers(normalized_headers)
-            mapped_headers.extend(['_partition_date', '_file_name', '_source_report', '_extract_ts', '_mapping_version', '_raw_hash'])
-            
-            with open(output_file, 'w', encoding='utf-8', newline='') as outfile:
-                writer = csv.DictWriter(outfile, fieldnames=mapped_headers)
-                writer.writeheader()
-                
-                for row_num, row in enumerate(reader, start=2):
-                    try:
-                        transformed_row = self._transform_row(
-                            row, partition_date, file_name, source_report
-                        )
-                        writer.writerow(transformed_row)
-                        row_count += 1
-                    except Exception as e:
-                        errors.append(f"Row {row_num}: {str(e)}")
-        
-        return row_count, errors
-    
+            normalized_headers = normalize_duplicate_headers(header)
+
+            return self.stream_rows(reader, normalized_headers, partition_date, file_name,
+                                    source_report, on_close=infile.close, copy_encoding=copy_encoding)
+        except Exception:
+            infile.close()
+            raise
+
+    def stream_rows(self, rows: Iterable[List[str]], normalized_headers: List[str],
+                    partition_date: date, file_name: str, source_report: str,
+                    on_close: Optional[Callable[[], None]] = None,
+                    copy_encoding: Optional[str] = None) -> ChunkedCSVStream:
+        """
+        Transform already-tokenized data rows (header excluded) into a chunk stream.
+
+        Used by single-pass pipelines that read each row once and share it
+        between several stages. With `copy_encoding` (see copy_encoding())
+        the rows were read with its passthrough codec, which also encodes
+        the output.
+        """
+        self._reset_results()
+
+        plan, mapped_headers = self._build_plan(normalized_headers)
+        checks = bind_rules(self.reject_rules, mapped_headers)
+        hash_order = self._hash_order(plan, mapped_headers)
+        watermark_index = self._watermark_index(mapped_headers)
+        mapped_headers.extend(METADATA_COLUMNS)
+        metadata = self._metadata_values(partition_date, file_name, source_report)
+        on_reject = self._start_rejects(normalized_headers)
+        codec = PASSTHROUGH_CODECS[copy_encoding] if copy_encoding else 'utf-8'
+
+        def chunks() -> Iterator[bytes]:
+            try:
+                yield self._encode_header(mapped_headers)
+                yield from self._generate_chunks(rows, plan, len(normalized_headers), metadata,
+                                                 checks, on_reject, hash_order, watermark_index, codec)
+                self._log_parse_stats()
+                self._log_rejects()
+                self._log_watermark()
+            finally:
+                self._close_rejects()
+
+        return ChunkedCSVStream(mapped_headers, chunks(), on_close=on_close,
+                                encoding=copy_encoding or 'UTF8')
+
+    def copy_encoding(self, encoding: str, file_name: str, source_report: str) -> Optional[str]:
+        """
+        COPY ENCODING to stream a file detected as `encoding` in its own bytes,
+        or None for UTF-8 output.
+
+        Needs copy_passthrough, a single-byte source encoding PostgreSQL can
+        read (see encoding_utils.copy_passthrough_encoding) and metadata text
+        that the encoding can represent.
+        """
+        if not self.copy_passthrough:
+            return None
+        copy_encoding = copy_passthrough_encoding(encoding)
+        if copy_encoding:
+            try:
+                file_name.encode(PASSTHROUGH_CODECS[copy_encoding])
+                source_report.encode(PASSTHROUGH_CODECS[copy_encoding])
+            except UnicodeEncodeError:
+                return None
+        return copy_encoding
+
+    def uses_parallel(self, input_file: str) -> bool:
+        """Whether open_stream() would fan this file out to worker processes."""
+        return self.workers > 1 and os.path.getsize(input_file) >= self.min_parallel_bytes
+
+    def _reset_results(self):
+        self.row_count = 0
+        self.records_read = 0
+        self.row_errors = []
+        self.rejected_count = 0
+        self.watermark_skipped = 0
+        self.watermark_max = None
+        self._worker_parse_stats = []
+        self._close_rejects()
+        self.reject_sink = RejectSink(self.rejects_path) if self.rejects_path else None
+
+    def _start_rejects(self, normalized_headers: List[str]) -> Callable[[int, str, List[str]], None]:
+        """Reject callback for this run: count, and write to the sidecar if configured."""
+        sink = self.reject_sink
+        if sink:
+            sink.begin(normalized_headers)
+
+        def on_reject(row_num: int, rule_text: str, row: List[str]):
+            self.rejected_count += 1
+            if sink:
+                sink.write(row_num, rule_text, row)
+        return on_reject
+
+    def _hash_order(self, plan: List[Tuple[int, Optional[Callable]]], mapped_headers: List[str]) -> List[int]:
+        """Source row positions of the mapped columns, in hash_positions() order."""
+        return [plan[position][0] for position in hash_positions(mapped_headers)]
+
+    def _watermark_index(self, mapped_headers: List[str]) -> Optional[int]:
+        """Position of the watermark column in the mapped output, if the mapping has one."""
+        if self.watermark_column in mapped_headers:
+            return mapped_headers.index(self.watermark_column)
+        return None
+
+    def _log_watermark(self):
+        if self.watermark_skipped:
+            print(f"Watermark: skipped {self.watermark_skipped} rows with {self.watermark_column} "
+                  f"before {self.watermark.isoformat()}")
+
+    def _close_rejects(self):
+        if self.reject_sink:
+            self.reject_sink.close()
+
+    def _log_rejects(self):
+        if self.rejected_count:
+            location = f" -> {self.rejects_file}" if self.rejects_file else ""
+            print(f"Rejected {self.rejected_count} rows by reject_rules{location}")
+
+    def _open_parallel_stream(self, input_file: str, encoding: str, errors_mode: str,
+                              metadata: List[Any], copy_encoding: Optional[str] = None) -> ChunkedCSVStream:
+        """Fan record-aligned chunks out to worker processes and stream results in order."""
+        header_end, ranges = parallel.split_records(input_file, self.chunk_bytes)
+
+        header = parallel.read_header(input_file, header_end, encoding, errors_mode)
+        if not header:
+            raise ValueError("CSV file has no headers")
+
+        normalized_headers = normalize_duplicate_headers(header)
+        mapped_headers = self._build_plan(normalized_headers)[1]
+        mapped_headers.extend(METADATA_COLUMNS)
+        on_reject = self._start_rejects(normalized_headers)
+
+        tasks = [
+            {
+                'mapping': self.mapping,
+                'path': input_file,
+                'encoding': encoding,
+                'errors_mode': errors_mode,
+                'headers': normalized_headers,
+                'start': start,
+                'end': end,
+                'metadata': metadata,
+                'watermark': self.watermark,
+                'codec': PASSTHROUGH_CODECS[copy_encoding] if copy_encoding else 'utf-8',
+            }
+            for start, end in ranges
+        ]
+        workers = min(self.workers, len(tasks)) or 1
+        print(f"Parallel transform: {len(tasks)} chunks across {workers} workers")
+
+        def chunks() -> Iterator[bytes]:
+            yield self._encode_header(mapped_headers)
+
+            with ProcessPoolExecutor(max_workers=workers, mp_context=parallel.pool_context()) as executor:
+                # Keep a bounded window in flight so a slow COPY consumer
+                # doesn't buffer the whole transformed file in memory
+                pending = deque()
+                remaining = iter(tasks)
+                for task in islice(remaining, workers * 2):
+                    pending.append(executor.submit(parallel.transform_chunk, task))
+
+                while pending:
+                    result = pending.popleft().result()
+                    for task in islice(remaining, 1):
+                        pending.append(executor.submit(parallel.transform_chunk, task))
+
+                    # Chunk-relative row numbers -> global row numbers
+                    offset = self.records_read
+                    self.row_errors.extend(
+                        (row_num + offset, message) for row_num, message in result['row_errors']
+                    )
+                    self.records_read += result['records']
+                    self.row_count += result['row_count']
+                    self._worker_parse_stats.append(result['parse_stats'])
+                    self.watermark_skipped += result['watermark_skipped']
+                    if result['watermark_max'] and (self.watermark_max is None
+                                                    or result['watermark_max'] > self.watermark_max):
+                        self.watermark_max = result['watermark_max']
+                    for row_num, rule_text, row in result['rejects']:
+                        on_reject(row_num + offset, rule_text, row)
+
+                    if result['data']:
+                        yield result['data']
+
+            self._log_parse_stats()
+            self._log_rejects()
+            self._log_watermark()
+            self._close_rejects()
+
+        return ChunkedCSVStream(mapped_headers, chunks(), on_close=self._close_rejects,
+                                encoding=copy_encoding or 'UTF8')
+
+    def _encode_header(self, mapped_headers: List[str]) -> bytes:
+        buffer = StringIO()
+        csv.writer(buffer).writerow(mapped_headers)
+        return buffer.getvalue().encode('utf-8')
+
+    def _generate_chunks(self, reader, plan: List[Tuple[int, Optional[Callable]]],
+                         width: int, metadata: List[Any], checks: Optional[List[tuple]] = None,
+                         on_reject: Optional[Callable[[int, str, List[str]], None]] = None,
+                         hash_order: Optional[List[int]] = None,
+                         watermark_index: Optional[int] = None,
+                         codec: str = 'utf-8') -> Iterator[bytes]:
+        """
+        Run the positional plan over every data row, yielding whole-record CSV chunks.
+
+        Rows matching one of the bound reject `checks` are passed to
+        `on_reject(row_num, rule_text, source_row)` instead of being written.
+        With `hash_order` (see _hash_order) each row's _raw_hash is filled
+        in from its mapped source values (see row_hash). With `watermark_index`, rows whose
+        value there is older than self.watermark are skipped and the newest
+        value written is tracked in self.watermark_max. Chunks are encoded
+        with `codec`.
+        """
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+
+        null_values = self.null_values
+        row_errors = self.row_errors
+        watermark = self.watermark
+
+        for row_num, row in enumerate(reader, start=2):
+            self.records_read += 1
+            if not row:
+                continue
+            if len(row) < width:
+                row.extend([''] * (width - len(row)))
+            try:
+                out = []
+                for index, coerce in plan:
+                    # Inlined project_value()
+                    value = row[index]
+                    if not value or value in null_values:
+                        out.append(None)
+                    elif coerce is None:
+                        out.append(value)
+                    else:
+                        out.append(coerce(value))
+                if checks:
+                    rule = first_match(checks, out)
+                    if rule is not None:
+                        on_reject(row_num, rule.text, row)
+                        continue
+                if watermark_index is not None:
+                    event_at = to_watermark(out[watermark_index])
+                    if event_at is not None:
+                        if watermark is not None and event_at < watermark:
+                            self.watermark_skipped += 1
+                            continue
+                        if self.watermark_max is None or event_at > self.watermark_max:
+                            self.watermark_max = event_at
+                raw_hash = row_hash(row, hash_order, null_values) if hash_order is not None else None
+                out.extend(metadata)
+                out.append(raw_hash)
+                writer.writerow(out)
+                self.row_count += 1
+            except Exception as e:
+                row_errors.append((row_num, str(e)))
+
+            if buffer.tell() >= STREAM_CHUNK_SIZE:
+                yield buffer.getvalue().encode(codec)
+                buffer.seek(0)
+                buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue().encode(codec)
+
+    def _build_plan(self, source_headers: List[str]) -> Tuple[List[Tuple[int, Optional[Callable]]], List[str]]:
+        """
+        Resolve the positional plan for a file's header row.
+
+        Returns:
+            (plan, mapped_headers) where plan holds one (source_index, coercer)
+            entry per output column, in source header order
+        """
+        positions, mapped = self.mapping.header_plan(source_headers)
+        return [(index, self.coercers[target_col]) for index, target_col in positions], list(mapped)
+
+    def reject_matcher(self, normalized_headers: List[str]) -> Optional[Callable[[List[str]], Optional[RejectRule]]]:
+        """
+        Reject decision for raw source rows, as the transform makes it.
+
+        Rule columns go through the same positional plan, null_like values and
+        coercions as in _generate_chunks, so another stage (QA validation) can
+        skip exactly the rows the transform will route to the rejects file.
+
+        Returns:
+            Callable from a tokenized source row to the first matching rule
+            (None if the row is kept), or None if the mapping has no rules
+        """
+        plan, mapped_headers = self._build_plan(normalized_headers)
+        checks = [
+            (None, None, rule) if position is None else (plan[position][0], plan[position][1], rule)
+            for position, rule in bind_rules(self.reject_rules, mapped_headers)
+        ]
+        if not checks:
+            return None
+        null_values = self.null_values
+
+        def match(row: List[str]) -> Optional[RejectRule]:
+            width = len(row)
+            for index, coerce, rule in checks:
+                value = row[index] if index is not None and index < width else ''
+                try:
+                    value = project_value(value, coerce, null_values)
+                except Exception:
+                    # The transform reports this row as an error instead
+                    return None
+                if rule.matches(value):
+                    return rule
+            return None
+        return match
+
     def _map_headers(self, source_headers: Any) -> List[str]:
         """Map source headers to target column names."""
-        mapped = []
-        for header in source_headers:
-            if header in self.column_mapping:
-                mapped.append(self.column_mapping[header])
-        return mapped
-    
-    def _transform_row(self, row: Dict[str, str], partition_date: date,
-                      file_name: str, source_report: str) -> Dict[str, Any]:
-        """Transform a single row."""
-        transformed = {}
-        
-        for source_col, target_col in self.column_mapping.items():
-            value = row.get(source_col, '')
-            
-            if value in self.null_like:
-                transformed[target_col] = None
-            else:
-                transformed[target_col] = self._apply_coercion(target_col, value)
-        
-        transformed['_partition_date'] = partition_date.isoformat()
-        transformed['_file_name'] = file_name
-        transformed['_source_report'] = source_report
-        transformed['_extract_ts'] = datetime.now().isoformat()
-        transformed['_mapping_version'] = None  # TODO: Add version tracking
-        transformed['_raw_hash'] = None  # TODO: Add row hashing for deduplication
-        
-        return transformed
-    
-    def _apply_coercion(self, column_name: str, value: str) -> Any:
-        """Apply coercion rules to a value."""
-        if not value or value in self.null_like:
-            return None
-        
-        coercion = self.coercions.get(column_name, '')
-        
-        if not coercion:
-            return value
-        
-        rules = coercion.split('|')
-        result: Any = value
-        
+        return self._build_plan(list(source_headers))[1]
+
+    def _metadata_values(self, partition_date: date, file_name: str, source_report: str) -> List[Any]:
+        """
+        Values for the trailing metadata columns that are constant for a whole
+        file (everything but _raw_hash, which is computed per row).
+        """
+        return [
+            partition_date.isoformat(),
+            file_name,
+            source_report,
+            datetime.now().isoformat(),
+            self.mapping.fingerprint,
+        ]
+
+    def get_parse_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-column date/timestamp parse counters and hit rates."""
+        local = {column: parser.stats() for column, parser in self.date_parsers.items()}
+        if not self._worker_parse_stats:
+            return local
+        return merge_parse_stats(self._worker_parse_stats)
+
+    def _log_parse_stats(self):
+        # Like the reject and watermark summaries, only report what needs a look:
+        # columns with values that missed the learned format
+        for column, stats in self.get_parse_stats().items():
+            if stats['fallback'] or stats['failed']:
+                print(f"Date parsing [{column}]: format={stats['format']} hit_rate={stats['hit_rate']:.1%} "
+                      f"(cache {stats['cache_hits']}, fast {stats['fast_path']}, "
+                      f"dateutil {stats['fallback']}, failed {stats['failed']})")
+
+    def _compile_coercion(self, column_name: str, rules: Iterable[str]) -> Optional[Callable[[Any], Any]]:
+        """Compile a column's coercion steps (CompiledMapping.coercion_steps) into a single callable."""
+        steps = []
         for rule in rules:
-            rule = rule.strip()
-            
             if rule == 'trim':
-                result = str(result).strip() if result else result
+                steps.append(_trim)
             elif rule == 'lower':
-                result = str(result).lower() if result else result
+                steps.append(_lower)
             elif rule == 'boolean':
-                bool_result = self._to_boolean(str(result))
-                if bool_result is not None:
-                    result = bool_result
-            elif rule == 'date':
-                date_result = self._to_date(str(result))
-                result = date_result if date_result is not None else result
-            elif rule == 'timestamptz':
-                ts_result = self._to_timestamptz(str(result))
-                result = ts_result if ts_result is not None else result
+                steps.append(self._keep_on_failure(self._to_boolean))
+            elif rule in ('date', 'timestamptz'):
+                steps.append(self._keep_on_failure(self._date_parser(column_name, rule)))
             elif rule == 'numeric':
-                num_result = self._to_numeric(str(result))
-                if num_result is not None:
-                    result = num_result
-        
-        return result
-    
+                steps.append(self._keep_on_failure(self._to_numeric))
+
+        if not steps:
+            return None
+        if len(steps) == 1:
+            return steps[0]
+
+        def chain(value: Any) -> Any:
+            for step in steps:
+                value = step(value)
+            return value
+        return chain
+
+    def _date_parser(self, column_name: str, kind: str) -> ColumnDateParser:
+        """One inferring parser per column, shared by every row of a file."""
+        parser = self.date_parsers.get(column_name)
+        if parser is None or parser.kind != kind:
+            parser = ColumnDateParser(column_name, kind)
+            self.date_parsers[column_name] = parser
+        return parser
+
+    @staticmethod
+    def _keep_on_failure(convert: Callable[[str], Any]) -> Callable[[Any], Any]:
+        """Wrap a converter so unparseable values are kept as-is."""
+        def step(value: Any) -> Any:
+            converted = convert(str(value))
+            return value if converted is None else converted
+        return step
+
+    def _apply_coercion(self, column_name: str, value: str) -> Any:
+        """Apply coercion rules to a value."""
+        if not value or value in self.null_values:
+            return None
+
+        coerce = self.coercers.get(column_name)
+        if coerce is None:
+            coerce = self._compile_coercion(column_name, self.mapping.coercion_steps.get(column_name, ()))
+        return coerce(value) if coerce else value
+
     def _to_boolean(self, value: str) -> Optional[bool]:
         """Convert string to boolean."""
         if not value:
             return None
-        
+
         value_lower = str(value).lower().strip()
-        
-        if value_lower in ('true', 'yes', '1', 't', 'y'):
+
+        if value_lower in BOOLEAN_TRUE:
             return True
-        elif value_lower in ('false', 'no', '0', 'f', 'n'):
+        elif value_lower in BOOLEAN_FALSE:
             return False
         else:
             return None
-    
-    def _to_date(self, value: str) -> Optional[str]:
-        """Convert string to ISO date."""
-        if not value:
-            return None
-        
-        try:
-            parsed = date_parser.parse(value)
-            return parsed.date().isoformat()
-        except:
-            return None
-    
-    def _to_timestamptz(self, value: str) -> Optional[str]:
-        """Convert string to ISO timestamp."""
-        if not value:
-            return None
-        
-        try:
-            parsed = date_parser.parse(value)
-            return parsed.isoformat()
-        except:
-            return None
-    
+
     def _to_numeric(self, value: str) -> Optional[float]:
         """Convert string to numeric, stripping currency symbols."""
         if not value:
             return None
-        
-        cleaned = re.sub(r'[$,\s]', '', str(value))
-        
+
+        cleaned = value.translate(_NUMERIC_STRIP)
+
         try:
             return float(cleaned)
-        except:
-            return None
+        except ValueError:
+            # Rare non-ASCII whitespace not covered by the translate table
+            try:
+                return float(_NUMERIC_STRIP_RE.sub('', value))
+            except ValueError:
+                return None
+
+
+def project_value(value: str, coerce: Optional[Callable[[Any], Any]], null_values: frozenset) -> Any:
+    """One source value as written to the output: None if null-like, else coerced."""
+    if not value or value in null_values:
+        return None
+    return value if coerce is None else coerce(value)
+
+
+def hash_positions(mapped_headers: List[str]) -> List[int]:
+    """
+    Positions of the mapped columns in target-name order.
+
+    Hashing in this order keeps _raw_hash stable when a report's columns are
+    reordered.
+    """
+    return sorted(range(len(mapped_headers)), key=mapped_headers.__getitem__)
+
+
+def row_hash(values: List[Any], order: List[int], null_values: frozenset = frozenset()) -> str:
+    """
+    Stable 128-bit BLAKE2b hex digest of a row's mapped source values.
+
+    Values are hashed as projected, before coercions, so Python and ELT
+    (SQL-coerced) loads of the same row agree. Empty and `null_values`
+    entries hash as NULL; the digest does not depend on the process
+    (unlike hash()), so it can be compared across loads.
+    """
+    parts = ['\x00' if not values[i] or values[i] in null_values else values[i] for i in order]
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _trim(value: Any) -> Any:
+    return str(value).strip() if value else value
+
+
+def _lower(value: Any) -> Any:
+    return str(value).lower() if value else value
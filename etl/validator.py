@@ -1,119 +1,204 @@
 """QA Validation Framework - Validates CSV data quality."""
 import csv
-from typing import Dict, List, Any, Tuple
-from collections import Counter
+from typing import Callable, Dict, List, Any, Tuple, Optional, Iterator
+from .dedup import DuplicateKeyTracker
+from .registry import compile_mapping
 from .encoding_utils import detect_encoding
 from .csv_utils import normalize_duplicate_headers
+from .transformer import CSVTransformer
+
+# Raw values treated as missing by the QA checks
+MISSING_VALUES = ('', 'NULL', 'N/A', 'null')
 
 
 class QAValidator:
     """Validates CSV data quality before loading."""
-    
-    def __init__(self, mapping: Dict[str, Any]):
-        self.mapping = mapping
-        self.column_mapping = mapping.get('columns', {})
-        self.natural_key = mapping.get('natural_key', [])
-        self.reject_rules = mapping.get('reject_rules', [])
-        
-        # Create reverse mapping: target_name -> source_name
-        self.reverse_mapping = {v: k for k, v in self.column_mapping.items()}
-    
+
+    def __init__(self, mapping: Dict[str, Any], dedup_memory_budget: Optional[int] = None):
+        self.mapping = compile_mapping(mapping)
+        self.dedup_memory_budget = dedup_memory_budget
+        self.column_mapping = self.mapping.column_mapping
+        self.natural_key = self.mapping.natural_key
+        self.reject_rules = self.mapping.reject_rules
+
+        # Reverse mapping (target_name -> source_name) comes precompiled
+        self.reverse_mapping = self.mapping.reverse_mapping
+        self.source_key_cols = self.mapping.source_key_cols
+
+        # Reject decisions are the transformer's own (see CSVTransformer.reject_matcher)
+        self._rule_transformer = CSVTransformer(self.mapping, workers=1) if self.reject_rules else None
+
+        self._reset()
+
     def validate_file(self, csv_file: str, progress_callback=None) -> Tuple[bool, List[str], Dict[str, Any]]:
         """
         Validate a CSV file in a SINGLE pass for performance.
-        
+
         Args:
             csv_file: Path to CSV file
             progress_callback: Optional function to call with progress updates (percent, message)
-        
+
         Returns:
             (is_valid, errors, stats) tuple
         """
-        errors = []
-        stats = {
-            'total_rows': 0,
-            'duplicates': 0,
-            'missing_keys': 0,
-            'type_errors': 0
-        }
-        
         encoding, errors_mode = detect_encoding(csv_file)
-        
-        keys_seen = []
-        missing_key_errors = []
-        
-        with open(csv_file, 'r', encoding=encoding, errors=errors_mode) as f:
-            reader = csv.DictReader(f)
-            
+
+        with open(csv_file, 'r', encoding=encoding, errors=errors_mode, newline='') as f:
+            reader = csv.reader(f)
+
+            header = next(reader, None)
+
             # Validate headers first
-            if not reader.fieldnames:
-                errors.append("CSV file has no headers")
-                return False, errors, stats
-            
+            if not header:
+                self._reset()
+                self.errors.append("CSV file has no headers")
+                return False, self.errors, self.stats
+
             # Normalize duplicate headers (add __2, __3 suffixes automatically)
-            original_headers = list(reader.fieldnames)
-            normalized_headers = normalize_duplicate_headers(original_headers)
-            
-            # Update reader with normalized headers
-            reader.fieldnames = normalized_headers
-            
-            source_headers = set(normalized_headers)
-            expected_headers = set(self.column_mapping.keys())
-            
-            missing_headers = expected_headers - source_headers
-            extra_headers = source_headers - expected_headers
-            
-            if missing_headers:
-                errors.append(f"Missing expected headers: {', '.join(sorted(missing_headers))}")
-            
-            if extra_headers:
-                errors.append(f"Extra headers not in mapping: {', '.join(sorted(extra_headers))}")
-            
+            self.begin(normalize_duplicate_headers(header))
+
             # Single pass: count rows, check duplicates, validate required fields
             for row_num, row in enumerate(reader, start=2):
-                stats['total_rows'] += 1
-                
+                self.check_row(row_num, row)
+
                 # Report progress every 50,000 rows for large files
-                if progress_callback and stats['total_rows'] % 50000 == 0:
-                    progress_percent = min(10 + int((stats['total_rows'] / 500000) * 15), 25)
-                    progress_callback(progress_percent, f'Validating row {stats["total_rows"]:,}...')
-                
-                # Check for duplicate keys and missing required fields
-                if self.natural_key:
-                    # Map target column names to source column names
-                    source_key_cols = [self.reverse_mapping.get(k, k) for k in self.natural_key]
-                    
-                    # Get key values using SOURCE column names from CSV
-                    key_values = tuple(row.get(col, '') for col in source_key_cols)
-                    keys_seen.append(key_values)
-                    
-                    # Check for missing required fields
-                    for target_col, source_col in zip(self.natural_key, source_key_cols):
-                        value = row.get(source_col, '').strip()
-                        
-                        if not value or value in ('', 'NULL', 'N/A', 'null'):
-                            stats['missing_keys'] += 1
-                            if len(missing_key_errors) < 10:
-                                missing_key_errors.append(f"Row {row_num}: Missing required field '{source_col}'")
-        
-        # Process duplicate keys
-        if self.natural_key and keys_seen:
-            key_counts = Counter(keys_seen)
-            duplicates = {k: count for k, count in key_counts.items() if count > 1}
-            stats['duplicates'] = len(duplicates)
-            
+                if progress_callback and row and self.stats['total_rows'] % 50000 == 0:
+                    report_validation_progress(progress_callback, self.stats['total_rows'])
+
+        return self.finish(csv_file)
+
+    def begin(self, normalized_headers: List[str]) -> List[str]:
+        """
+        Start validating a file from its (normalized) header row.
+
+        Rows are then fed positionally to check_row() and the result collected
+        with finish(); this lets other single-pass stages share one tokenizer.
+
+        Returns:
+            Header errors found so far
+        """
+        self._reset()
+
+        source_headers = set(normalized_headers)
+        expected_headers = set(self.column_mapping.keys())
+
+        missing_headers = expected_headers - source_headers
+        extra_headers = source_headers - expected_headers
+
+        if missing_headers:
+            self.errors.append(f"Missing expected headers: {', '.join(sorted(missing_headers))}")
+
+        if extra_headers:
+            self.errors.append(f"Extra headers not in mapping: {', '.join(sorted(extra_headers))}")
+
+        # Positions of the natural key columns (None when the header is missing)
+        positions = {header: index for index, header in enumerate(normalized_headers)}
+        self._key_positions = [positions.get(col) for col in self.source_key_cols]
+
+        # Rows the transformer will route to the rejects file are excluded from
+        # the key checks
+        if self._rule_transformer:
+            self._reject_match = self._rule_transformer.reject_matcher(normalized_headers)
+
+        return list(self.errors)
+
+    def check_row(self, row_num: int, row: List[str]):
+        """Validate one tokenized data row (blank rows are ignored)."""
+        if not row:
+            return
+
+        self.stats['total_rows'] += 1
+
+        if self._reject_match and self._reject_match(row):
+            self.stats['rejected_rows'] += 1
+            return
+
+        # Check for duplicate keys and missing required fields
+        if self.natural_key:
+            width = len(row)
+            key_values = tuple(
+                row[index] if index is not None and index < width else ''
+                for index in self._key_positions
+            )
+            self._key_tracker.add(key_values)
+
+            # Check for missing required fields
+            for source_col, raw_value in zip(self.source_key_cols, key_values):
+                value = raw_value.strip()
+
+                if not value or value in MISSING_VALUES:
+                    self.stats['missing_keys'] += 1
+                    if len(self._missing_key_errors) < 10:
+                        self._missing_key_errors.append(f"Row {row_num}: Missing required field '{source_col}'")
+
+    def finish(self, csv_file: Optional[str] = None) -> Tuple[bool, List[str], Dict[str, Any]]:
+        """
+        Complete validation started with begin(); returns (is_valid, errors, stats).
+
+        Args:
+            csv_file: Source file, re-read for key columns only if hash
+                candidates need confirming against the exact key strings
+        """
+        errors = self.errors
+
+        # Process duplicate keys (only hashes were kept while streaming)
+        if self.natural_key and self.stats['total_rows']:
+            rescan = (lambda: self._rescan_keys(csv_file)) if csv_file else None
+            duplicates = self._key_tracker.finish(rescan)
+            self.stats['duplicates'] = len(duplicates)
+            self.stats['dedup_spills'] = self._key_tracker.spills
+
             if duplicates:
                 for key, count in list(duplicates.items())[:5]:
                     errors.append(f"Duplicate key {dict(zip(self.natural_key, key))}: {count} occurrences")
-                
+
                 if len(duplicates) > 5:
                     errors.append(f"... and {len(duplicates) - 5} more duplicate keys")
-        
+
         # Add missing key errors
-        errors.extend(missing_key_errors)
-        if stats['missing_keys'] > 10:
-            errors.append(f"... and {stats['missing_keys'] - 10} more rows with missing keys")
-        
+        errors.extend(self._missing_key_errors)
+        if self.stats['missing_keys'] > 10:
+            errors.append(f"... and {self.stats['missing_keys'] - 10} more rows with missing keys")
+
         is_valid = len(errors) == 0
-        
-        return is_valid, errors, stats
+
+        return is_valid, errors, self.stats
+
+    def _rescan_keys(self, csv_file: str) -> Iterator[Tuple[str, ...]]:
+        """Yield the natural key of every non-blank, non-rejected row, in file order."""
+        encoding, errors_mode = detect_encoding(csv_file)
+        positions = self._key_positions
+
+        with open(csv_file, 'r', encoding=encoding, errors=errors_mode, newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if not row or (self._reject_match and self._reject_match(row)):
+                    continue
+                width = len(row)
+                yield tuple(
+                    row[index] if index is not None and index < width else ''
+                    for index in positions
+                )
+
+    def _reset(self):
+        self.errors: List[str] = []
+        self.stats: Dict[str, Any] = {
+            'total_rows': 0,
+            'duplicates': 0,
+            'missing_keys': 0,
+            'type_errors': 0,
+            'rejected_rows': 0
+        }
+        if getattr(self, '_key_tracker', None):
+            self._key_tracker.close()
+        self._key_tracker = DuplicateKeyTracker(self.dedup_memory_budget)
+        self._missing_key_errors: List[str] = []
+        self._key_positions: List[Optional[int]] = []
+        self._reject_match: Optional[Callable[[List[str]], Any]] = None
+
+
+def report_validation_progress(progress_callback, total_rows: int):
+    """Map rows validated so far onto the 10-25% band of the progress bar."""
+    progress_percent = min(10 + int((total_rows / 500000) * 15), 25)
+    progress_callback(progress_percent, f'Validating row {total_rows:,}...')
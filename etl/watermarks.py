@@ -0,0 +1,99 @@
+"""Per-table high-water marks for append-only (history/event) loads."""
+from datetime import date, datetime, timezone
+from typing import Any, Optional
+
+import psycopg2
+
+from etl.db_connection import pooled_connection
+
+
+def to_watermark(value: Any) -> Optional[datetime]:
+    """
+    Coerced date/timestamp value -> timezone-aware datetime, or None.
+
+    Naive values are taken as UTC, like timestamptz input on a UTC session.
+    Values that are not ISO dates/timestamps (failed coercions) give None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        parsed = datetime(value.year, value.month, value.day)
+    else:
+        try:
+            parsed = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class WatermarkStore:
+    """
+    Newest event timestamp loaded per (target table, watermark column).
+
+    Rows live in etl_watermarks and only ever move forward, together with
+    the partition date of the load that set them. The transformer skips
+    rows older than the mark on forward loads (partition date on or after
+    the mark's); backfills of older partitions and forced reloads load
+    every row and never move the mark. A mark that cannot be read (or was
+    not advanced) only costs a larger load: the append load mode still
+    drops rows that are already staged. Database errors are therefore
+    logged instead of failing the load.
+    """
+
+    def get(self, target_table: str, column: str, load_date: date) -> Optional[datetime]:
+        """
+        High-water mark to filter a load of the load_date partition with.
+
+        Returns:
+            The mark, or None if nothing was loaded yet or load_date is
+            older than the partition that set it (a backfill)
+        """
+        try:
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT high_water, load_date FROM etl_watermarks
+                    WHERE target_table = %s AND column_name = %s
+                """, (target_table, column))
+                row = cursor.fetchone()
+                cursor.close()
+        except psycopg2.Error as e:
+            print(f"Watermark lookup for {target_table}.{column} failed, loading all rows: {e}")
+            return None
+
+        if row is None:
+            return None
+        high_water, mark_date = row
+        if mark_date is not None and load_date < mark_date:
+            print(f"Watermark: {load_date} is older than {target_table}'s {mark_date} load, "
+                  f"loading all rows (backfill)")
+            return None
+        return to_watermark(high_water)
+
+    def advance(self, target_table: str, column: str, value: datetime, load_date: date,
+                load_id: Optional[int] = None):
+        """
+        Move the mark up to `value` (never backwards). Call after the load committed.
+
+        Loads of a partition older than the mark's are backfills and leave it alone.
+        """
+        try:
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO etl_watermarks (target_table, column_name, high_water, load_id, load_date, updated_at)
+                    VALUES (%s, %s, %s, %s, %s, NOW())
+                    ON CONFLICT (target_table, column_name) DO UPDATE
+                    SET high_water = EXCLUDED.high_water, load_id = EXCLUDED.load_id,
+                        load_date = EXCLUDED.load_date, updated_at = EXCLUDED.updated_at
+                    WHERE etl_watermarks.high_water < EXCLUDED.high_water
+                      AND (etl_watermarks.load_date IS NULL OR etl_watermarks.load_date <= EXCLUDED.load_date)
+                """, (target_table, column, value, load_id, load_date))
+                conn.commit()
+                cursor.close()
+        except psycopg2.Error as e:
+            print(f"Could not advance watermark {target_table}.{column} to {value}: {e}")
@@ -8,14 +8,26 @@ from datetime import datetime, date
 from pathlib import Path
 import shutil
 import re
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
-from etl.mapper import MappingParser
+from etl.registry import CompiledMapping, MappingRegistry
+from etl.csv_utils import normalize_duplicate_headers, read_header
 from etl.transformer import CSVTransformer
 from etl.validator import QAValidator
+from etl.pipeline import FusedPipeline
 from etl.loader import BulkLoader
+from etl.elt import SqlCoercions
 from etl.notifications import NotificationService
-from etl.db_connection import connect_with_retry
+from etl.db_connection import pooled_connection, get_pool
+from etl.progress import get_progress_reporter
+from etl.job_queue import JobQueue, JobWorkers, TableSlots, default_workers
+from etl.attachments import save_stream, iter_base64, DEFAULT_MAX_BYTES, DOWNLOAD_CHUNK_BYTES
+from etl.idempotency import ProcessedFileIndex
+from etl.watermarks import WatermarkStore
+from etl.dashboard import WebhookStats
+from etl.pagination import decode_cursor, fetch_page, page_size, parse_day
+from psycopg2 import sql
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -26,146 +38,216 @@ QUARANTINE_FOLDER = Path('quarantine')
 UPLOAD_FOLDER.mkdir(exist_ok=True)
 QUARANTINE_FOLDER.mkdir(exist_ok=True)
 
-mapper = MappingParser()
+# Stream transformed rows directly into COPY instead of writing transformed_*.csv
+STREAM_TO_COPY = os.environ.get('ETL_STREAM_TO_COPY', '1') != '0'
+
+# Queue webhook attachments for background workers and answer 202 right away
+WEBHOOK_ASYNC = os.environ.get('CLOUDMAILIN_ASYNC', '1') != '0'
+
+# Columns and status filters of the paginated history/webhook-activity APIs
+HISTORY_COLUMNS = ['id', 'load_date', 'target_table', 'file_name', 'mapping_file',
+                   'rows_loaded', 'status', 'error_message', 'started_at', 'completed_at']
+HISTORY_STATUSES = ['queued', 'running', 'success', 'failed']
+WEBHOOK_COLUMNS = ['id', 'received_at', 'from_email', 'subject', 'attachments_count', 'files_processed',
+                   'files_skipped', 'files_failed', 'files_duplicate', 'status', 'error_message', 'load_ids']
+WEBHOOK_STATUSES = ['processing', 'success', 'partial', 'failed', 'duplicate', 'no_files']
+
+registry = MappingRegistry()
 loader = BulkLoader()
 notifier = NotificationService()
+progress_reporter = get_progress_reporter()
+processed_files = ProcessedFileIndex()
+watermarks = WatermarkStore()
+dashboard_stats = WebhookStats()
 
 
 @app.route('/')
 def index():
     """Homepage with upload form and webhook dashboard."""
-    mappings = mapper.get_available_mappings()
-    
-    # Get webhook statistics for dashboard
-    webhook_stats = {
-        'today': {'success': 0, 'failed': 0, 'total_files': 0},
-        'last_7_days': [],
-        'recent_failures': []
-    }
+    mappings = registry.names()
     
+    # Webhook statistics for the dashboard (rollup table, cached for a few seconds)
     try:
-        conn = connect_with_retry()
-        cursor = conn.cursor()
-        
-        # Today's stats
-        cursor.execute("""
-            SELECT 
-                status,
-                COUNT(*) as count,
-                SUM(ARRAY_LENGTH(files_processed, 1)) as total_files
-            FROM webhook_log
-            WHERE DATE(received_at) = CURRENT_DATE
-            GROUP BY status
-        """)
-        
-        for row in cursor.fetchall():
-            status, count, total_files = row
-            if status == 'success':
-                webhook_stats['today']['success'] = count
-                webhook_stats['today']['total_files'] = total_files or 0
-            elif status in ('failed', 'partial'):
-                webhook_stats['today']['failed'] += count
-        
-        # Last 7 days trend
-        cursor.execute("""
-            SELECT 
-                DATE(received_at) as date,
-                COUNT(*) FILTER (WHERE status = 'success') as success_count,
-                COUNT(*) FILTER (WHERE status IN ('failed', 'partial')) as failed_count,
-                SUM(ARRAY_LENGTH(files_processed, 1)) as total_files
-            FROM webhook_log
-            WHERE received_at >= CURRENT_DATE - INTERVAL '7 days'
-            GROUP BY DATE(received_at)
-            ORDER BY date DESC
-        """)
-        
-        webhook_stats['last_7_days'] = [
-            {
-                'date': row[0].strftime('%b %d'),
-                'success': row[1],
-                'failed': row[2],
-                'total_files': row[3] or 0
-            }
-            for row in cursor.fetchall()
-        ]
-        
-        # Recent failures (last 5)
-        cursor.execute("""
-            SELECT 
-                received_at,
-                from_email,
-                subject,
-                error_message
-            FROM webhook_log
-            WHERE status IN ('failed', 'partial')
-            ORDER BY received_at DESC
-            LIMIT 5
-        """)
-        
-        webhook_stats['recent_failures'] = [
-            {
-                'time': row[0].strftime('%b %d, %I:%M %p'),
-                'from': row[1],
-                'subject': row[2],
-                'error': row[3]
-            }
-            for row in cursor.fetchall()
-        ]
-        
-        cursor.close()
-        conn.close()
-        
+        webhook_stats = dashboard_stats.get()
     except Exception as e:
         print(f"Error fetching webhook stats: {e}")
+        webhook_stats = {
+            'today': {'success': 0, 'failed': 0, 'total_files': 0},
+            'last_7_days': [],
+            'recent_failures': []
+        }
     
     return render_template('index.html', mappings=mappings, webhook_stats=webhook_stats)
 
 
 def update_progress(load_id: int, stage: str, progress: int):
-    """Update progress for a load with robust connection."""
-    conn = connect_with_retry()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE load_history 
-        SET current_stage = %s, progress_percent = %s
-        WHERE id = %s
-    """, (stage, progress, load_id))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    """Queue a progress update for a load (written asynchronously, latest value wins)."""
+    progress_reporter.update(load_id, stage, progress)
 
 def update_progress_and_status(load_id: int, stage: str, progress: int, status: str):
-    """Update progress and status for a load with robust connection."""
-    conn = connect_with_retry()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE load_history 
-        SET current_stage = %s, progress_percent = %s, status = %s, completed_at = %s
-        WHERE id = %s
-    """, (stage, progress, status, datetime.now() if status in ('success', 'failed') else None, load_id))
-    conn.commit()
-    cursor.close()
-    conn.close()
-
-def create_load_record(filename: str, mapping_name: str, partition_date_str: str, target_table: str) -> int:
-    """Create initial load record and return load_id with robust connection."""
-    conn = connect_with_retry()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO load_history 
-        (load_date, target_table, file_name, mapping_file, status, current_stage, progress_percent, started_at)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        RETURNING id
-    """, (partition_date_str, target_table, filename, mapping_name, 'running', 'Starting upload', 0, datetime.now()))
-    result = cursor.fetchone()
-    if not result:
-        raise RuntimeError("Failed to create load_history record")
-    load_id = result[0]
-    conn.commit()
-    cursor.close()
-    conn.close()
+    """Update progress and status for a load immediately (terminal states are durable)."""
+    progress_reporter.complete(load_id, stage, progress, status)
+
+def create_load_record(filename: str, mapping_name: str, partition_date_str: str, target_table: str,
+                       status: str = 'running', stage: str = 'Starting upload') -> int:
+    """Create initial load record and return load_id using a pooled connection."""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO load_history 
+            (load_date, target_table, file_name, mapping_file, status, current_stage, progress_percent, started_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING id
+        """, (partition_date_str, target_table, filename, mapping_name, status, stage, 0, datetime.now()))
+        result = cursor.fetchone()
+        if not result:
+            raise RuntimeError("Failed to create load_history record")
+        load_id = result[0]
+        conn.commit()
+        cursor.close()
     return load_id
 
+def run_pipeline(mapping: CompiledMapping, mapping_name: str, upload_path: Path, filename: str,
+                 partition_date: date, load_id: int, force: bool = False) -> tuple:
+    """Validate, transform and load a CSV file.
+    
+    Files handled in a single process go through the fused stage: each row is
+    decoded and tokenized once and shared by QA validation and the transform,
+    with output buffered until validation passes. Files big enough for the
+    multiprocess transform are validated first and then streamed.
+    
+    Rows matching the mapping's reject_rules are left out of the load and
+    written to quarantine/<timestamp>_<file>.rejects.csv. For mappings with a
+    `watermark` column, rows older than the table's high-water mark are
+    skipped and the mark is advanced once the load succeeded. Forced
+    reloads and backfills of partitions older than the mark's load every
+    row and leave the mark alone.
+    
+    Returns:
+        (is_valid, errors, loaded_rows, transform_errors, rejects) tuple;
+        rejects is {'rows': count, 'file': sidecar path or None}. Nothing is
+        loaded when is_valid is False
+    """
+    update_progress(load_id, 'Running QA validation', 10)
+    validator = QAValidator(mapping)
+    rejects_path = QUARANTINE_FOLDER / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{Path(filename).stem}.rejects.csv"
+    watermark_column = mapping.watermark_column
+    watermark = (watermarks.get(mapping.target_table, watermark_column, partition_date)
+                 if watermark_column and not force else None)
+    transformer = CSVTransformer(mapping, rejects_path=str(rejects_path), watermark=watermark)
+    
+    def validation_progress(percent, message):
+        update_progress(load_id, message, percent)
+    
+    if STREAM_TO_COPY and not transformer.uses_parallel(str(upload_path)):
+        pipeline = FusedPipeline(validator, transformer, spool_dir=str(UPLOAD_FOLDER))
+        is_valid, errors, stats = pipeline.run(
+            str(upload_path),
+            partition_date,
+            filename,
+            mapping.get('source_report', 'Unknown'),
+            progress_callback=validation_progress
+        )
+        
+        if not is_valid:
+            # The whole file is quarantined; a partial rejects file would only confuse
+            rejects_path.unlink(missing_ok=True)
+            return False, errors, 0, [], None
+        
+        update_progress(load_id, 'Loading to Supabase', 50)
+        with pipeline.output as stream:
+            loaded_rows = load_to_staging(stream, mapping, mapping_name, filename, partition_date, load_id)
+        if not force:
+            advance_watermark(transformer, mapping, partition_date, load_id)
+        
+        return True, errors, loaded_rows, pipeline.transform_errors, reject_summary(transformer)
+    
+    is_valid, errors, stats = validator.validate_file(str(upload_path), progress_callback=validation_progress)
+    
+    if not is_valid:
+        return False, errors, 0, [], None
+    
+    loaded_rows, transform_errors = transform_and_load(
+        transformer, mapping, mapping_name, upload_path, filename, partition_date, load_id
+    )
+    if not force:
+        advance_watermark(transformer, mapping, partition_date, load_id)
+    return True, errors, loaded_rows, transform_errors, reject_summary(transformer)
+
+def advance_watermark(transformer: CSVTransformer, mapping: CompiledMapping, partition_date: date, load_id: int):
+    """Record the newest watermark value just loaded (no-op for mappings without one)."""
+    if transformer.watermark_column and transformer.watermark_max is not None:
+        watermarks.advance(mapping.target_table, transformer.watermark_column,
+                           transformer.watermark_max, partition_date, load_id)
+
+def reject_summary(transformer: CSVTransformer) -> dict:
+    """Rows routed away by reject_rules during the last transform."""
+    return {'rows': transformer.rejected_count, 'file': transformer.rejects_file}
+
+def completion_stage(rejects: dict) -> str:
+    """load_history stage text for a successful load."""
+    if rejects and rejects['rows']:
+        return f"Complete ({rejects['rows']:,} rows rejected)"
+    return 'Complete'
+
+def transform_and_load(transformer: CSVTransformer, mapping: CompiledMapping, mapping_name: str, upload_path: Path,
+                       filename: str, partition_date: date, load_id: int) -> tuple:
+    """Transform a validated CSV and COPY it into its staging table.
+    
+    By default transformed rows are streamed straight into COPY; set
+    ETL_STREAM_TO_COPY=0 to fall back to writing uploads/transformed_<file> first.
+    
+    Returns:
+        (loaded_rows, transform_errors) tuple
+    """
+    source_report = mapping.get('source_report', 'Unknown')
+    
+    if STREAM_TO_COPY:
+        update_progress(load_id, 'Transforming and loading to Supabase', 30)
+        
+        with transformer.open_stream(str(upload_path), partition_date, filename, source_report) as stream:
+            loaded_rows = load_to_staging(stream, mapping, mapping_name, filename, partition_date, load_id)
+        
+        return loaded_rows, transformer.errors
+    
+    update_progress(load_id, 'Transforming data', 30)
+    transformed_path = UPLOAD_FOLDER / f"transformed_{filename}"
+    
+    try:
+        row_count, transform_errors = transformer.transform_csv(
+            str(upload_path),
+            str(transformed_path),
+            partition_date,
+            filename,
+            source_report
+        )
+        
+        update_progress(load_id, 'Loading to Supabase', 50)
+        
+        loaded_rows = load_to_staging(str(transformed_path), mapping, mapping_name, filename, partition_date, load_id)
+    finally:
+        transformed_path.unlink(missing_ok=True)
+    
+    return loaded_rows, transform_errors
+
+def load_to_staging(source, mapping: CompiledMapping, mapping_name: str, filename: str,
+                    partition_date: date, load_id: int) -> int:
+    """COPY a transformed CSV path or stream into the mapping's staging table."""
+    # ELT mappings arrive uncoerced; the loader coerces them in SQL
+    elt = SqlCoercions(mapping) if mapping.transform == 'elt' else None
+    
+    return loader.load_csv(
+        source,
+        mapping.target_table,
+        partition_date.strftime('%Y-%m-%d'),
+        filename,
+        mapping_name,
+        load_id,
+        mapping.natural_key,
+        load_mode=mapping.load_mode,
+        elt=elt
+    )
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     """Handle CSV file upload and processing."""
@@ -190,25 +272,45 @@ def upload_file():
     
     filename = secure_filename(file.filename)
     upload_path = UPLOAD_FOLDER / filename
+    force = request.form.get('force') == '1'
     
-    mapping = mapper.load_mapping(mapping_name)
-    target_table = mapper.get_target_table(mapping)
+    try:
+        mapping = registry.get(mapping_name)
+    except FileNotFoundError:
+        available = registry.names()
+        return jsonify({
+            'success': False,
+            'error': f"Unknown mapping '{mapping_name}'. Available mappings: {', '.join(available)}",
+            'available_mappings': available
+        }), 400
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f"Mapping '{mapping_name}' is invalid: {e}"}), 400
+    target_table = mapping.target_table
     
-    load_id = create_load_record(filename, mapping_name, partition_date_str, target_table)
+    try:
+        content_hash, _ = save_stream(iter(lambda: file.stream.read(DOWNLOAD_CHUNK_BYTES), b''), upload_path)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    previous = None if force else processed_files.lookup(content_hash, target_table, partition_date)
+    if previous:
+        upload_path.unlink(missing_ok=True)
+        return jsonify({
+            'success': False,
+            'duplicate': True,
+            'duplicate_of': previous['load_id'],
+            'error': (f"This file was already loaded into {target_table} for {partition_date_str} "
+                      f"as load #{previous['load_id']} "
+                      f"({previous['row_count']} rows, {previous['processed_at']:%Y-%m-%d %H:%M}). "
+                      f"Tick 'Force reload' to load it again.")
+        }), 409
     
-    update_progress(load_id, 'Uploading file', 5)
-    file.save(upload_path)
+    load_id = create_load_record(filename, mapping_name, partition_date_str, target_table)
     
     try:
-        source_report = mapping.get('source_report', 'Unknown')
-        
-        update_progress(load_id, 'Running QA validation', 10)
-        validator = QAValidator(mapping)
-        
-        def validation_progress(percent, message):
-            update_progress(load_id, message, percent)
-        
-        is_valid, errors, stats = validator.validate_file(str(upload_path), progress_callback=validation_progress)
+        is_valid, errors, loaded_rows, transform_errors, rejects = run_pipeline(
+            mapping, mapping_name, upload_path, filename, partition_date, load_id, force
+        )
         
         if not is_valid:
             quarantine_path = QUARANTINE_FOLDER / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
@@ -224,47 +326,26 @@ def upload_file():
                 'error': f'QA validation failed. File quarantined.\n\nErrors:\n{error_report}'
             }), 400
         
-        update_progress(load_id, 'Transforming data', 30)
-        transformer = CSVTransformer(mapping)
-        transformed_path = UPLOAD_FOLDER / f"transformed_{filename}"
-        
-        row_count, transform_errors = transformer.transform_csv(
-            str(upload_path),
-            str(transformed_path),
-            partition_date,
-            filename,
-            source_report
-        )
-        
-        update_progress(load_id, 'Loading to Supabase', 50)
-        
         if transform_errors:
             flash(f'⚠️ Transformation warnings: {len(transform_errors)} errors', 'warning')
         
-        # Get natural key from mapping for UPSERT logic
-        natural_key = mapping.get('natural_key', [])
-        
-        loaded_rows = loader.load_csv(
-            str(transformed_path),
-            target_table,
-            partition_date_str,
-            filename,
-            mapping_name,
-            load_id,
-            natural_key
-        )
-        
         upload_path.unlink(missing_ok=True)
-        transformed_path.unlink(missing_ok=True)
         
-        update_progress_and_status(load_id, 'Complete', 100, 'success')
+        update_progress_and_status(load_id, completion_stage(rejects), 100, 'success')
+        processed_files.record(content_hash, target_table, load_id, loaded_rows, filename, partition_date)
         notifier.notify_success(filename, loaded_rows, target_table)
         
+        message = f'Successfully loaded {loaded_rows} rows to {target_table}'
+        if rejects['rows']:
+            message += f" ({rejects['rows']} rows rejected, see {rejects['file']})"
+        
         return jsonify({
             'success': True,
             'load_id': load_id,
             'rows_loaded': loaded_rows,
-            'message': f'Successfully loaded {loaded_rows} rows to {target_table}'
+            'rows_rejected': rejects['rows'],
+            'rejects_file': rejects['file'],
+            'message': message
         })
         
     except Exception as e:
@@ -288,82 +369,112 @@ def upload_file():
 
 @app.route('/history')
 def history():
-    """Show load history."""
-    try:
-        conn = connect_with_retry()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT id, load_date, target_table, file_name, mapping_file, 
-                   rows_loaded, status, error_message, started_at, completed_at
-            FROM load_history
-            ORDER BY started_at DESC
-            LIMIT 100
-        """)
-        
-        loads = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
-        
-        return render_template('history.html', loads=loads)
-        
-    except Exception as e:
-        flash(f'Error loading history: {str(e)}', 'error')
-        return redirect(url_for('index'))
+    """Show load history (rows are fetched page by page from /api/history)."""
+    tables = sorted({mapping.target_table for mapping in registry.valid_mappings().values() if mapping.target_table})
+    return render_template('history.html', tables=tables, statuses=HISTORY_STATUSES)
 
 
 @app.route('/webhook-activity')
 def webhook_activity():
-    """Show webhook activity log."""
+    """Show webhook activity log (rows are fetched page by page from /api/webhook-activity)."""
+    return render_template('webhook_activity.html', statuses=WEBHOOK_STATUSES)
+
+
+def json_value(value):
+    """JSON-friendly cell value (dates and timestamps as ISO 8601)."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def keyset_response(table: str, columns: list, order_column: str, filters: list):
+    """Page of `table` per the request's cursor/limit/date_from/date_to arguments, as JSON.
+    
+    Returns:
+        {'items': [row dicts], 'next_cursor': cursor for the next page or null};
+        400 on invalid arguments
+    """
     try:
-        conn = connect_with_retry()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT id, received_at, from_email, subject, attachments_count,
-                   files_processed, files_skipped, files_failed, status, 
-                   error_message, load_ids
-            FROM webhook_log
-            ORDER BY received_at DESC
-            LIMIT 100
-        """)
-        
-        webhooks = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
-        
-        return render_template('webhook_activity.html', webhooks=webhooks)
-        
+        limit = page_size(request.args.get('limit'))
+        date_from = parse_day(request.args.get('date_from'), 'date_from')
+        date_to = parse_day(request.args.get('date_to'), 'date_to')
+        token = request.args.get('cursor')
+        after = decode_cursor(token) if token else None
+        
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            rows, next_cursor = fetch_page(
+                cursor, table, columns, order_column, filters,
+                date_from=date_from, date_to=date_to, after=after, limit=limit
+            )
+            cursor.close()
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        flash(f'Error loading webhook activity: {str(e)}', 'error')
-        return redirect(url_for('index'))
+        return jsonify({'error': str(e)}), 500
+    
+    return jsonify({
+        'items': [{col: json_value(value) for col, value in zip(columns, row)} for row in rows],
+        'next_cursor': next_cursor
+    })
+
+
+@app.route('/api/history')
+def api_history():
+    """Load history, newest first, keyset-paginated.
+    
+    Query arguments: target_table, status, date_from / date_to (YYYY-MM-DD,
+    inclusive, on started_at), limit (default 50, max 500) and cursor
+    (next_cursor of the previous page).
+    """
+    return keyset_response('load_history', HISTORY_COLUMNS, 'started_at', [
+        ('target_table', request.args.get('target_table') or None),
+        ('status', request.args.get('status') or None),
+    ])
+
+
+@app.route('/api/webhook-activity')
+def api_webhook_activity():
+    """Webhook log, newest first, keyset-paginated.
+    
+    Query arguments: status, date_from / date_to (YYYY-MM-DD, inclusive, on
+    received_at), limit (default 50, max 500) and cursor (next_cursor of the
+    previous page).
+    """
+    return keyset_response('webhook_log', WEBHOOK_COLUMNS, 'received_at', [
+        ('status', request.args.get('status') or None),
+    ])
 
 
 @app.route('/api/mappings')
 def api_mappings():
     """API endpoint to get available mappings."""
-    mappings = mapper.get_available_mappings()
+    mappings = registry.names()
     return jsonify(mappings)
 
 
+@app.route('/api/metrics')
+def api_metrics():
+    """API endpoint exposing connection pool metrics (incl. acquire latency)."""
+    return jsonify({'db_pool': get_pool().metrics()})
+
+
 @app.route('/api/progress/<int:load_id>')
 def api_progress(load_id):
     """API endpoint to get progress for a specific load."""
     try:
-        conn = connect_with_retry()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT status, current_stage, progress_percent, rows_loaded, error_message
-            FROM load_history
-            WHERE id = %s
-        """, (load_id,))
-        
-        result = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT status, current_stage, progress_percent, rows_loaded, error_message
+                FROM load_history
+                WHERE id = %s
+            """, (load_id,))
+            
+            result = cursor.fetchone()
+            cursor.close()
         
         if result:
             return jsonify({
@@ -412,18 +523,55 @@ def auto_detect_mapping(filename: str):
     return None
 
 
-def download_attachment(attachment: dict) -> tuple:
-    """Download attachment from CloudMailin (base64 or URL).
+def detect_mapping(upload_path: Path, file_name: str) -> tuple:
+    """Pick the mapping for a downloaded attachment from its header row.
+    
+    The header is scored against every mapping's `columns` (see
+    etl.registry.HeaderIndex); the filename pattern only breaks ties. QA
+    validation needs the exact header set, so a file that matches no mapping
+    exactly is rejected here, before any data row is parsed.
+    
+    Returns:
+        (mapping_name, None) on an exact match, else (None, reason)
+    """
+    headers = normalize_duplicate_headers(read_header(str(upload_path)))
+    mapping_name, similarity = registry.match_headers(headers, preferred=auto_detect_mapping(file_name))
+    
+    if mapping_name is None:
+        return None, 'Headers match no mapping'
+    if similarity < 1.0:
+        expected = registry.get(mapping_name).column_mapping.keys()
+        missing = len(expected - set(headers))
+        extra = len(set(headers) - expected)
+        return None, f"Headers match no mapping exactly (closest: {mapping_name}, {missing} missing, {extra} extra)"
+    return mapping_name, None
+
+
+def download_attachment(attachment: dict, prefix: str = '') -> tuple:
+    """Download attachment from CloudMailin (base64 or URL) into uploads/.
+    
+    The payload is streamed to a temporary file (base64 is decoded
+    incrementally) while its SHA-256 and size are computed, so memory use
+    does not grow with the attachment size.
+    
+    Args:
+        prefix: Prepended to the stored file name (keeps concurrent
+            same-named attachments apart)
+    
+    Returns:
+        (filename, upload_path, sha256, size_bytes)
     
     Security:
         - URLs are validated against allowed cloud storage domains
         - Timeout enforced to prevent hanging requests
-        - Size limit enforced before download
+        - Size limit enforced before and during download
     """
     filename = secure_filename(attachment.get('file_name', 'unknown.csv'))
+    upload_path = UPLOAD_FOLDER / f"{prefix}{filename}"
+    max_size = DEFAULT_MAX_BYTES  # 100 MB
     
     if 'content' in attachment:
-        content = base64.b64decode(attachment['content'])
+        sha256, size = save_stream(iter_base64(attachment['content']), upload_path, max_size)
     elif 'url' in attachment:
         url = attachment['url']
         
@@ -460,49 +608,48 @@ def download_attachment(attachment: dict) -> tuple:
             raise ValueError(f"Attachment URL from untrusted domain: {hostname}")
         
         # Security: Download with timeout and size limit
-        max_size = 100 * 1024 * 1024  # 100 MB
-        
-        response = requests.get(url, timeout=30, stream=True)
-        response.raise_for_status()
-        
-        # Check size before downloading
-        content_length = response.headers.get('Content-Length')
-        if content_length and int(content_length) > max_size:
-            raise ValueError(f"Attachment too large: {content_length} bytes (max {max_size})")
-        
-        # Download content with size check
-        content = b''
-        for chunk in response.iter_content(chunk_size=8192):
-            content += chunk
-            if len(content) > max_size:
-                raise ValueError(f"Attachment exceeded size limit during download")
+        with requests.get(url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            
+            # Check size before downloading
+            content_length = response.headers.get('Content-Length')
+            if content_length and int(content_length) > max_size:
+                raise ValueError(f"Attachment too large: {content_length} bytes (max {max_size})")
+            
+            # Stream to disk; the size limit is enforced per chunk
+            sha256, size = save_stream(response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES),
+                                       upload_path, max_size)
         
     else:
         raise ValueError("Attachment has neither 'content' nor 'url'")
     
-    upload_path = UPLOAD_FOLDER / filename
-    upload_path.write_bytes(content)
+    app.logger.info(f"Saved attachment {filename}: {size} bytes, sha256 {sha256}")
     
-    return filename, upload_path
+    return filename, upload_path, sha256, size
 
 
-def process_csv_attachment(filename: str, upload_path: Path, mapping_name: str, partition_date: date):
-    """Process CSV file through ETL pipeline (shared logic)."""
-    mapping = mapper.load_mapping(mapping_name)
-    target_table = mapper.get_target_table(mapping)
+def process_csv_attachment(filename: str, upload_path: Path, mapping_name: str, partition_date: date,
+                           load_id: int = None, content_hash: str = None, force: bool = False):
+    """Process CSV file through ETL pipeline (shared logic).
     
-    load_id = create_load_record(filename, mapping_name, partition_date.strftime('%Y-%m-%d'), target_table)
+    Args:
+        load_id: Existing load_history record (e.g. created when the job was
+            queued); a new one is created when omitted
+        content_hash: SHA-256 of the file, recorded in processed_files on success
+        force: Forced reload; the watermark neither filters nor advances
+    """
+    mapping = registry.get(mapping_name)
+    target_table = mapping.target_table
+    
+    if load_id is None:
+        load_id = create_load_record(filename, mapping_name, partition_date.strftime('%Y-%m-%d'), target_table)
+    else:
+        update_progress_and_status(load_id, 'Starting', 0, 'running')
     
     try:
-        source_report = mapping.get('source_report', 'Unknown')
-        
-        update_progress(load_id, 'Running QA validation', 10)
-        validator = QAValidator(mapping)
-        
-        def validation_progress(percent, message):
-            update_progress(load_id, message, percent)
-        
-        is_valid, errors, stats = validator.validate_file(str(upload_path), progress_callback=validation_progress)
+        is_valid, errors, loaded_rows, transform_errors, rejects = run_pipeline(
+            mapping, mapping_name, upload_path, filename, partition_date, load_id, force
+        )
         
         if not is_valid:
             quarantine_path = QUARANTINE_FOLDER / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
@@ -513,37 +660,10 @@ def process_csv_attachment(filename: str, upload_path: Path, mapping_name: str,
             notifier.notify_failure(filename, f"QA validation failed: {error_report}", str(quarantine_path))
             raise ValueError(f'QA validation failed: {error_report}')
         
-        update_progress(load_id, 'Transforming data', 30)
-        transformer = CSVTransformer(mapping)
-        transformed_path = UPLOAD_FOLDER / f"transformed_{filename}"
-        
-        row_count, transform_errors = transformer.transform_csv(
-            str(upload_path),
-            str(transformed_path),
-            partition_date,
-            filename,
-            source_report
-        )
-        
-        update_progress(load_id, 'Loading to Supabase', 50)
-        
-        # Get natural key from mapping for UPSERT logic
-        natural_key = mapping.get('natural_key', [])
-        
-        loaded_rows = loader.load_csv(
-            str(transformed_path),
-            target_table,
-            partition_date.strftime('%Y-%m-%d'),
-            filename,
-            mapping_name,
-            load_id,
-            natural_key
-        )
-        
         upload_path.unlink(missing_ok=True)
-        transformed_path.unlink(missing_ok=True)
         
-        update_progress_and_status(load_id, 'Complete', 100, 'success')
+        update_progress_and_status(load_id, completion_stage(rejects), 100, 'success')
+        processed_files.record(content_hash, target_table, load_id, loaded_rows, filename, partition_date)
         notifier.notify_success(filename, loaded_rows, target_table)
         
         return load_id, loaded_rows, target_table
@@ -559,6 +679,340 @@ def process_csv_attachment(filename: str, upload_path: Path, mapping_name: str,
         raise
 
 
+def duplicate_result(file_name: str, target_table: str, previous: dict) -> dict:
+    """Per-file webhook result for an attachment whose content was already loaded."""
+    app.logger.info(f"Skipping duplicate attachment {file_name}: already loaded as load #{previous['load_id']}")
+    return {
+        'file': file_name,
+        'status': 'duplicate',
+        'duplicate_of': previous['load_id'],
+        'rows_loaded': previous.get('row_count'),
+        'target_table': target_table
+    }
+
+
+def webhook_status(processed: list, skipped: list, failed: list, duplicates: list) -> str:
+    """Overall webhook_log status from its per-file outcomes."""
+    if processed:
+        return 'success'
+    if skipped or failed:
+        return 'partial'
+    if duplicates:
+        return 'duplicate'
+    return 'no_files'
+
+
+def process_attachments_sync(attachments: list, from_email: str, subject: str, partition_date: date,
+                             force: bool = False):
+    """Load every attachment inside the request (CLOUDMAILIN_ASYNC=0).
+    
+    Attachments target different staging tables, so they are loaded
+    concurrently on a bounded thread pool (ETL_WEBHOOK_WORKERS) with at most
+    ETL_MAX_LOADS_PER_TABLE loads per target table at a time. Results keep the
+    attachment order. Files whose content was already loaded into their
+    table are reported as 'duplicate' unless force is set.
+    """
+    results = []
+    pending = []
+    batch = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    
+    for index, attachment in enumerate(attachments):
+        file_name = attachment.get('file_name', '')
+        
+        if not file_name.lower().endswith('.csv'):
+            app.logger.info(f"Skipping non-CSV attachment: {file_name}")
+            continue
+        
+        try:
+            # Loads overlap; keep same-named attachments apart on disk
+            filename, upload_path, sha256, size = download_attachment(attachment, prefix=f"webhook_{batch}_{index}_")
+            mapping_name, reason = detect_mapping(upload_path, file_name)
+            
+            if not mapping_name:
+                app.logger.warning(f"Could not auto-detect mapping for {file_name}: {reason}")
+                upload_path.unlink(missing_ok=True)
+                results.append({
+                    'file': file_name,
+                    'status': 'skipped',
+                    'reason': reason
+                })
+                continue
+            
+            target_table = registry.get(mapping_name).target_table
+            
+        except Exception as e:
+            app.logger.error(f"Error processing {file_name}: {str(e)}")
+            results.append({
+                'file': file_name,
+                'status': 'failed',
+                'error': str(e)
+            })
+            continue
+        
+        results.append(None)
+        pending.append((len(results) - 1, file_name, filename, upload_path, mapping_name, target_table, sha256))
+    
+    def load_attachment(file_name, filename, upload_path, mapping_name, target_table, content_hash):
+        try:
+            with table_slots.hold(target_table):
+                # Checked under the table slot so repeats within one email are caught too
+                previous = None if force else processed_files.lookup(content_hash, target_table, partition_date)
+                if previous:
+                    upload_path.unlink(missing_ok=True)
+                    return duplicate_result(file_name, target_table, previous)
+                
+                load_id, loaded_rows, target_table = process_csv_attachment(
+                    filename, upload_path, mapping_name, partition_date, content_hash=content_hash, force=force
+                )
+            
+            return {
+                'file': file_name,
+                'status': 'success',
+                'load_id': load_id,
+                'rows_loaded': loaded_rows,
+                'target_table': target_table
+            }
+            
+        except Exception as e:
+            app.logger.error(f"Error processing {file_name}: {str(e)}")
+            return {
+                'file': file_name,
+                'status': 'failed',
+                'error': str(e)
+            }
+    
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(len(pending), default_workers()),
+                                thread_name_prefix='webhook-load') as executor:
+            futures = [(slot, executor.submit(load_attachment, *args)) for slot, *args in pending]
+            for slot, future in futures:
+                results[slot] = future.result()
+    
+    # Log webhook request to database
+    files_processed = [r['file'] for r in results if r['status'] == 'success']
+    files_skipped = [r['file'] for r in results if r['status'] == 'skipped']
+    files_failed = [r['file'] for r in results if r['status'] == 'failed']
+    files_duplicate = [r['file'] for r in results if r['status'] == 'duplicate']
+    load_ids = [r.get('load_id') for r in results if r.get('load_id')]
+    
+    # Log webhook request using a pooled connection
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO webhook_log 
+            (from_email, subject, attachments_count, files_processed, files_skipped, files_failed,
+             files_duplicate, status, load_ids)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (
+            from_email, 
+            subject, 
+            len(attachments),
+            files_processed,
+            files_skipped,
+            files_failed,
+            files_duplicate,
+            webhook_status(files_processed, files_skipped, files_failed, files_duplicate),
+            load_ids
+        ))
+        conn.commit()
+        cur.close()
+    
+    return jsonify({
+        'status': 'ok',
+        'email_from': from_email,
+        'email_subject': subject,
+        'processed_files': results
+    }), 200
+
+
+def enqueue_attachments(attachments: list, from_email: str, subject: str, partition_date: date,
+                        force: bool = False):
+    """Persist CSV attachments, queue one job per file and answer 202 with the job ids.
+    
+    Each job gets a 'queued' load_history record up front; the webhook_log row
+    starts as 'processing' and is rolled up by record_webhook_job() once every
+    job of the email has finished. Unless force is set, files already loaded
+    into their table (or already queued for it) are not queued again.
+    """
+    webhook_id = create_webhook_log(from_email, subject, len(attachments))
+    
+    jobs = []
+    skipped = []
+    failed = []
+    duplicates = []
+    
+    for index, attachment in enumerate(attachments):
+        file_name = attachment.get('file_name', '')
+        
+        if not file_name.lower().endswith('.csv'):
+            app.logger.info(f"Skipping non-CSV attachment: {file_name}")
+            continue
+        
+        try:
+            # Queued files wait on disk; keep same-named attachments apart
+            filename, queued_path, sha256, size = download_attachment(attachment, prefix=f"queued_{webhook_id}_{index}_")
+            mapping_name, reason = detect_mapping(queued_path, file_name)
+            
+            if not mapping_name:
+                app.logger.warning(f"Could not auto-detect mapping for {file_name}: {reason}")
+                queued_path.unlink(missing_ok=True)
+                skipped.append({'file': file_name, 'status': 'skipped', 'reason': reason})
+                continue
+            
+            target_table = registry.get(mapping_name).target_table
+            
+            if not force:
+                previous = processed_files.lookup(sha256, target_table, partition_date)
+                active = None if previous else job_queue.find_active(sha256, target_table,
+                                                                     partition_date.strftime('%Y-%m-%d'))
+                if active:
+                    previous = {'load_id': active['load_id'], 'row_count': None}
+                if previous:
+                    queued_path.unlink(missing_ok=True)
+                    duplicates.append(duplicate_result(file_name, target_table, previous))
+                    continue
+            
+            load_id = create_load_record(filename, mapping_name, partition_date.strftime('%Y-%m-%d'),
+                                         target_table, status='queued', stage='Queued')
+            job_id = job_queue.enqueue(filename, str(queued_path), mapping_name,
+                                       partition_date.strftime('%Y-%m-%d'), load_id, webhook_id,
+                                       target_table=target_table, content_hash=sha256, force=force,
+                                       original_name=file_name)
+            
+            jobs.append({
+                'file': file_name,
+                'status': 'queued',
+                'job_id': job_id,
+                'load_id': load_id,
+                'mapping': mapping_name
+            })
+            
+        except Exception as e:
+            app.logger.error(f"Error queueing {file_name}: {str(e)}")
+            failed.append({'file': file_name, 'status': 'failed', 'error': str(e)})
+    
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE webhook_log
+            SET files_skipped = %s, files_failed = %s, files_duplicate = %s, load_ids = %s, error_message = %s
+            WHERE id = %s
+        """, (
+            [r['file'] for r in skipped],
+            [r['file'] for r in failed],
+            [r['file'] for r in duplicates],
+            [j['load_id'] for j in jobs],
+            '\n'.join(f"{r['file']}: {r['error']}" for r in failed) or None,
+            webhook_id
+        ))
+        conn.commit()
+        cur.close()
+    
+    if jobs:
+        job_workers.notify()
+    else:
+        finalize_webhook_log(webhook_id)
+    
+    return jsonify({
+        'status': 'accepted',
+        'webhook_id': webhook_id,
+        'email_from': from_email,
+        'email_subject': subject,
+        'jobs': jobs,
+        'skipped_files': skipped,
+        'failed_files': failed,
+        'duplicate_files': duplicates
+    }), 202
+
+def create_webhook_log(from_email: str, subject: str, attachments_count: int) -> int:
+    """Insert a 'processing' webhook_log row and return its id."""
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO webhook_log 
+            (from_email, subject, attachments_count, files_processed, files_skipped, files_failed, status, load_ids)
+            VALUES (%s, %s, %s, '{}', '{}', '{}', 'processing', '{}')
+            RETURNING id
+        """, (from_email, subject, attachments_count))
+        webhook_id = cur.fetchone()[0]
+        conn.commit()
+        cur.close()
+    return webhook_id
+
+def run_webhook_job(job: dict) -> dict:
+    """Job queue handler: load one queued attachment."""
+    partition_date = datetime.strptime(job['partition_date'], '%Y-%m-%d').date()
+    
+    load_id, loaded_rows, target_table = process_csv_attachment(
+        job['file_name'], Path(job['upload_path']), job['mapping_name'], partition_date, job['load_id'],
+        content_hash=job.get('content_hash'), force=bool(job.get('force'))
+    )
+    return {'load_id': load_id, 'rows_loaded': loaded_rows, 'target_table': target_table}
+
+def record_webhook_job(job: dict, status: str, error: str, result: dict):
+    """Add a finished job to its webhook_log row; roll up the status after the last one."""
+    webhook_id = job.get('webhook_id')
+    if not webhook_id:
+        return
+    
+    column = 'files_processed' if status == 'success' else 'files_failed'
+    # Report the attachment as sent, like the synchronous path does
+    file_name = job.get('original_name') or job['file_name']
+    
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(sql.SQL("""
+            UPDATE webhook_log
+            SET {column} = array_append(COALESCE({column}, '{{}}'), %s),
+                error_message = CASE WHEN %s::text IS NULL THEN error_message
+                                     ELSE concat_ws(E'\n', error_message, %s::text) END
+            WHERE id = %s
+        """).format(column=sql.Identifier(column)), (
+            file_name,
+            error,
+            f"{file_name}: {error}" if error else None,
+            webhook_id
+        ))
+        conn.commit()
+        cur.close()
+    
+    if job_queue.pending_for_webhook(webhook_id) == 0:
+        finalize_webhook_log(webhook_id)
+
+def abandon_webhook_job(job: dict):
+    """Fail a job that was interrupted too often: quarantine its file and close its load record."""
+    upload_path = Path(job['upload_path'])
+    if upload_path.exists():
+        shutil.move(upload_path, QUARANTINE_FOLDER / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{job['file_name']}")
+    if job.get('load_id'):
+        update_progress_and_status(job['load_id'], f"Failed: {job['error']}", 100, 'failed')
+    record_webhook_job(job, 'failed', job['error'], None)
+
+def finalize_webhook_log(webhook_id: int):
+    """Set the final webhook_log status from its file lists."""
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE webhook_log
+            SET status = CASE
+                WHEN COALESCE(array_length(files_processed, 1), 0) > 0 THEN 'success'
+                WHEN COALESCE(array_length(files_skipped, 1), 0)
+                   + COALESCE(array_length(files_failed, 1), 0) > 0 THEN 'partial'
+                WHEN COALESCE(array_length(files_duplicate, 1), 0) > 0 THEN 'duplicate'
+                ELSE 'no_files'
+            END
+            WHERE id = %s
+        """, (webhook_id,))
+        conn.commit()
+        cur.close()
+
+
+job_queue = JobQueue()
+job_workers = JobWorkers(job_queue, run_webhook_job, on_finished=record_webhook_job,
+                         on_abandoned=abandon_webhook_job)
+table_slots = TableSlots()
+
+
 @app.route('/webhook/cloudmailin', methods=['POST'])
 def cloudmailin_webhook():
     """Receive emails from CloudMailin with CSV attachments.
@@ -618,106 +1072,41 @@ def cloudmailin_webhook():
         if not attachments:
             return jsonify({'status': 'error', 'message': 'No attachments found in email'}), 400
         
-        results = []
         partition_date = date.today()
         
-        for attachment in attachments:
-            file_name = attachment.get('file_name', '')
-            
-            if not file_name.lower().endswith('.csv'):
-                app.logger.info(f"Skipping non-CSV attachment: {file_name}")
-                continue
-            
-            mapping_name = auto_detect_mapping(file_name)
-            
-            if not mapping_name:
-                app.logger.warning(f"Could not auto-detect mapping for: {file_name}")
-                results.append({
-                    'file': file_name,
-                    'status': 'skipped',
-                    'reason': 'No matching mapping pattern'
-                })
-                continue
-            
-            try:
-                filename, upload_path = download_attachment(attachment)
-                
-                load_id, loaded_rows, target_table = process_csv_attachment(
-                    filename, upload_path, mapping_name, partition_date
-                )
-                
-                results.append({
-                    'file': file_name,
-                    'status': 'success',
-                    'load_id': load_id,
-                    'rows_loaded': loaded_rows,
-                    'target_table': target_table
-                })
-                
-            except Exception as e:
-                app.logger.error(f"Error processing {file_name}: {str(e)}")
-                results.append({
-                    'file': file_name,
-                    'status': 'failed',
-                    'error': str(e)
-                })
+        # ?force=1 on the webhook URL reloads files even if they were processed before
+        force = request.args.get('force') == '1'
         
-        # Log webhook request to database
-        files_processed = [r['file'] for r in results if r['status'] == 'success']
-        files_skipped = [r['file'] for r in results if r['status'] == 'skipped']
-        files_failed = [r['file'] for r in results if r['status'] == 'failed']
-        load_ids = [r.get('load_id') for r in results if r.get('load_id')]
+        if WEBHOOK_ASYNC:
+            return enqueue_attachments(attachments, from_email, subject, partition_date, force=force)
         
-        # Log webhook request with robust connection
-        conn = connect_with_retry()
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO webhook_log 
-            (from_email, subject, attachments_count, files_processed, files_skipped, files_failed, status, load_ids)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            from_email, 
-            subject, 
-            len(attachments),
-            files_processed,
-            files_skipped,
-            files_failed,
-            'success' if files_processed else 'partial' if files_skipped or files_failed else 'no_files',
-            load_ids
-        ))
-        conn.commit()
-        cur.close()
-        conn.close()
-        
-        return jsonify({
-            'status': 'ok',
-            'email_from': from_email,
-            'email_subject': subject,
-            'processed_files': results
-        }), 200
+        return process_attachments_sync(attachments, from_email, subject, partition_date, force=force)
         
     except Exception as e:
         app.logger.error(f"Webhook error: {str(e)}")
         import traceback
         traceback.print_exc()
         
-        # Log failed webhook request with robust connection
+        # Log failed webhook request using a pooled connection
         try:
-            conn = connect_with_retry()
-            cur = conn.cursor()
-            cur.execute("""
-                INSERT INTO webhook_log 
-                (from_email, subject, attachments_count, status, error_message)
-                VALUES (%s, %s, %s, %s, %s)
-            """, ('unknown', 'Error', 0, 'failed', str(e)))
-            conn.commit()
-            cur.close()
-            conn.close()
+            with pooled_connection() as conn:
+                cur = conn.cursor()
+                cur.execute("""
+                    INSERT INTO webhook_log 
+                    (from_email, subject, attachments_count, status, error_message)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, ('unknown', 'Error', 0, 'failed', str(e)))
+                conn.commit()
+                cur.close()
         except:
             pass  # Don't fail on logging errors
         
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
+if WEBHOOK_ASYNC:
+    job_workers.start()
+
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=False)
@@ -0,0 +1,125 @@
+// Newest-first tables filled page by page from the keyset-paginated JSON APIs
+// (/api/history, /api/webhook-activity). The page provides a #filters form,
+// a #rows tbody and a #loadMore button.
+
+function formatTimestamp(value) {
+    // ISO 8601 in the database session time zone, shown as YYYY-MM-DD HH:MM
+    return value ? value.slice(0, 16).replace('T', ' ') : '-';
+}
+
+function cell(content, className) {
+    const td = document.createElement('td');
+    if (className) {
+        td.className = className;
+    }
+    if (content instanceof Node) {
+        td.appendChild(content);
+    } else {
+        td.textContent = content;
+    }
+    return td;
+}
+
+function badge(status) {
+    const span = document.createElement('span');
+    span.className = `badge badge-${status}`;
+    span.textContent = status;
+    return span;
+}
+
+function details(summary, text) {
+    const element = document.createElement('details');
+    const title = document.createElement('summary');
+    const pre = document.createElement('pre');
+    title.textContent = summary;
+    pre.textContent = text;
+    element.append(title, pre);
+    return element;
+}
+
+function keysetTable({url, colspan, emptyText, renderRow, onPage}) {
+    const form = document.getElementById('filters');
+    const tbody = document.getElementById('rows');
+    const loadMore = document.getElementById('loadMore');
+    let nextCursor = null;
+    let generation = 0;
+    
+    // Filters live in the page URL so a filtered view can be bookmarked
+    const params = new URLSearchParams(window.location.search);
+    for (const element of form.elements) {
+        if (element.name && params.has(element.name)) {
+            element.value = params.get(element.name);
+        }
+    }
+    
+    function filterQuery() {
+        const query = new URLSearchParams(new FormData(form));
+        for (const [key, value] of [...query]) {
+            if (!value) {
+                query.delete(key);
+            }
+        }
+        return query;
+    }
+    
+    function message(text) {
+        const tr = document.createElement('tr');
+        tr.appendChild(cell(text, 'no-data'));
+        tr.firstChild.colSpan = colspan;
+        tbody.replaceChildren(tr);
+    }
+    
+    async function fetchPage(reset) {
+        // A newer request (e.g. a changed filter) wins over one still in flight
+        const current = ++generation;
+        const query = filterQuery();
+        if (!reset && nextCursor) {
+            query.set('cursor', nextCursor);
+        }
+        loadMore.disabled = true;
+        
+        try {
+            const response = await fetch(`${url}?${query}`);
+            const data = await response.json();
+            if (!response.ok) {
+                throw new Error(data.error || response.statusText);
+            }
+            if (current !== generation) {
+                return;
+            }
+            
+            if (reset) {
+                tbody.replaceChildren();
+            }
+            for (const item of data.items) {
+                tbody.appendChild(renderRow(item));
+            }
+            if (reset && !data.items.length) {
+                message(emptyText);
+            }
+            nextCursor = data.next_cursor;
+            loadMore.style.display = nextCursor ? '' : 'none';
+            if (onPage) {
+                onPage(data.items, reset);
+            }
+        } catch (error) {
+            console.error('Error loading rows:', error);
+            if (current === generation) {
+                message(`Error loading rows: ${error.message}`);
+                loadMore.style.display = 'none';
+            }
+        } finally {
+            loadMore.disabled = false;
+        }
+    }
+    
+    form.addEventListener('submit', function(e) {
+        e.preventDefault();
+        const query = filterQuery().toString();
+        window.history.replaceState(null, '', query ? `?${query}` : window.location.pathname);
+        fetchPage(true);
+    });
+    loadMore.addEventListener('click', () => fetchPage(false));
+    
+    fetchPage(true);
+}
@@ -0,0 +1,87 @@
+"""Shared fixtures: CSV files, an optional Postgres connection and the Flask app."""
+import csv
+import os
+import sys
+from pathlib import Path
+
+import psycopg2
+import pytest
+from psycopg2 import sql
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    """Write rows (header first) to a CSV file in tmp_path and return its path."""
+    def write(rows, name='input.csv', newline='\n'):
+        path = tmp_path / name
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            csv.writer(f, lineterminator=newline).writerows(rows)
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def db_conn():
+    """
+    Autocommit connection to DATABASE_URL.
+
+    Tests using it are skipped when the variable is unset or the database
+    cannot be reached.
+    """
+    url = os.environ.get('DATABASE_URL')
+    if not url:
+        pytest.skip("DATABASE_URL not set")
+    try:
+        conn = psycopg2.connect(url, connect_timeout=3)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Database not reachable: {str(e).strip()[:80]}")
+    conn.autocommit = True
+    yield conn
+    conn.close()
+
+
+
+@pytest.fixture
+def schema(db_conn):
+    """Throwaway schema, dropped with everything in it afterwards."""
+    name = f"etl_test_{os.getpid()}"
+    cursor = db_conn.cursor()
+    cursor.execute(sql.SQL("DROP SCHEMA IF EXISTS {0} CASCADE; CREATE SCHEMA {0}").format(sql.Identifier(name)))
+    yield name
+    cursor.execute(sql.SQL("DROP SCHEMA {} CASCADE").format(sql.Identifier(name)))
+
+
+@pytest.fixture(scope='session')
+def app_dir(tmp_path_factory):
+    """Working directory for the app (uploads/, quarantine/, the job queue file)."""
+    path = tmp_path_factory.mktemp('app')
+    (path / 'Mappings').symlink_to(Path(__file__).resolve().parent.parent / 'Mappings')
+    return path
+
+
+@pytest.fixture(scope='session')
+def app_module(app_dir):
+    """The main module, imported in app_dir without job workers."""
+    previous_dir = os.getcwd()
+    saved = {name: os.environ.get(name) for name in ('CLOUDMAILIN_ASYNC', 'DATABASE_URL')}
+    os.environ['CLOUDMAILIN_ASYNC'] = '0'
+    os.environ.setdefault('DATABASE_URL', 'postgres://unused')
+    os.chdir(app_dir)
+    try:
+        sys.modules.pop('main', None)
+        import main
+    finally:
+        os.chdir(previous_dir)
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    return main
+
+
+@pytest.fixture
+def client(app_module, app_dir, monkeypatch):
+    """Flask test client; requests run in app_dir so files land there."""
+    monkeypatch.chdir(app_dir)
+    return app_module.app.test_client()
@@ -0,0 +1,48 @@
+"""APPEND load mode: already-staged events are skipped within the lookback (needs a database)."""
+from types import SimpleNamespace
+
+import pytest
+from psycopg2 import sql
+
+from etl.loader import BulkLoader
+
+COLUMNS = ['event_id', 'value', '_partition_date']
+
+
+@pytest.fixture
+def load(db_conn, schema, write_csv, monkeypatch):
+    """Load event ids into the given partition; returns (inserted, skipped)."""
+    db_conn.cursor().execute(sql.SQL("""
+        CREATE TABLE {}.events (
+            event_id text NOT NULL,
+            value text,
+            _partition_date date NOT NULL,
+            PRIMARY KEY (event_id, _partition_date)
+        )
+    """).format(sql.Identifier(schema)))
+    monkeypatch.setenv('DATABASE_URL', 'postgres://unused')
+    loader = BulkLoader(progress=SimpleNamespace(update=lambda *args: None), append_lookback_days=7)
+
+    def run(day, ids):
+        path = write_csv([COLUMNS] + [[event_id, 'v', day] for event_id in ids], name=f'{day}.csv')
+        return loader._load_append(db_conn.cursor(), 1, f'{schema}.events', day, path, COLUMNS)
+    return run
+
+
+def test_resent_events_are_skipped(load):
+    assert load('2025-01-10', ['a', 'b']) == (2, 0)
+    assert load('2025-01-11', ['a', 'b', 'c']) == (1, 2)
+    # Same partition again: the primary key catches what the probe sees anyway
+    assert load('2025-01-11', ['c', 'd']) == (1, 1)
+
+
+def test_backfill_sees_later_partitions(load):
+    load('2025-01-10', ['a'])
+    assert load('2025-01-02', ['a', 'b']) == (1, 1)
+
+
+def test_probe_stops_at_the_lookback(load):
+    load('2025-01-01', ['a'])
+    assert load('2025-01-08', ['a']) == (0, 1)
+    # Partitions more than append_lookback_days before the load are not read
+    assert load('2025-01-20', ['a']) == (1, 0)
@@ -0,0 +1,63 @@
+"""Attachment storage: incremental base64 decoding and hash-while-writing."""
+import base64
+import binascii
+import hashlib
+import os
+
+import pytest
+
+from etl.attachments import iter_base64, save_stream
+
+PAYLOAD = os.urandom(10_000)
+
+
+@pytest.mark.parametrize('chunk_chars', [4, 8, 100, 4096, 1 << 20])
+def test_base64_decodes_in_blocks(chunk_chars):
+    # Mail bodies wrap base64 at 76 characters
+    encoded = base64.encodebytes(PAYLOAD).decode()
+    blocks = list(iter_base64(encoded, chunk_chars))
+    assert b''.join(blocks) == PAYLOAD
+    assert max(map(len, blocks)) <= max(chunk_chars, 76) * 3 // 4 + 3
+
+
+def test_bad_padding_is_reported():
+    with pytest.raises(binascii.Error):
+        list(iter_base64('QUJD' + 'RA', chunk_chars=4))
+
+
+def test_saved_file_has_the_streamed_hash_and_size(tmp_path):
+    dest = tmp_path / 'contacts.csv'
+    chunks = [PAYLOAD[i:i + 777] for i in range(0, len(PAYLOAD), 777)]
+    assert save_stream(iter(chunks), dest) == (hashlib.sha256(PAYLOAD).hexdigest(), len(PAYLOAD))
+    assert dest.read_bytes() == PAYLOAD
+    assert [path.name for path in tmp_path.iterdir()] == ['contacts.csv']
+
+
+def test_oversized_download_leaves_nothing_behind(tmp_path):
+    dest = tmp_path / 'huge.csv'
+    consumed = []
+
+    def chunks():
+        for index in range(100):
+            consumed.append(index)
+            yield b'x' * 1000
+
+    with pytest.raises(ValueError, match='exceeded size limit'):
+        save_stream(chunks(), dest, max_bytes=2500)
+    # Stopped at the chunk that crossed the limit
+    assert consumed == [0, 1, 2]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_existing_file_is_replaced_only_when_complete(tmp_path):
+    dest = tmp_path / 'contacts.csv'
+    dest.write_bytes(b'previous')
+
+    def failing():
+        yield b'partial'
+        raise ConnectionError('reset by peer')
+
+    with pytest.raises(ConnectionError):
+        save_stream(failing(), dest)
+    assert dest.read_bytes() == b'previous'
+    assert [path.name for path in tmp_path.iterdir()] == ['contacts.csv']
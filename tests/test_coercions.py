@@ -0,0 +1,55 @@
+"""Compiled coercion chains: one callable per column, built once per transformer."""
+import pytest
+
+from etl.transformer import CSVTransformer, project_value
+
+MAPPING = {
+    'columns': {'Id': 'id', 'Email': 'email', 'Active': 'active', 'Rate': 'pay_rate',
+                'Start': 'start_date', 'Raw': 'raw'},
+    'coercions': {
+        'email': 'trim|lower',
+        'active': 'boolean',
+        'pay_rate': 'numeric',
+        'start_date': 'trim|date',
+        'raw': 'unknown_rule',
+    },
+    'null_like': ['', 'N/A'],
+}
+
+
+@pytest.fixture(scope='module')
+def transformer():
+    return CSVTransformer(MAPPING, workers=1)
+
+
+@pytest.mark.parametrize('column, value, expected', [
+    ('email', '  Ann@Example.COM ', 'ann@example.com'),
+    ('active', ' Yes', True),
+    ('active', 'F', False),
+    ('active', 'maybe', 'maybe'),
+    ('pay_rate', '$1,234.50', 1234.5),
+    ('pay_rate', '12 000', 12000.0),
+    ('pay_rate', 'tbd', 'tbd'),
+    ('start_date', ' 3/7/2025 ', '2025-03-07'),
+    ('start_date', 'someday', 'someday'),
+    ('raw', ' kept as is ', ' kept as is '),
+])
+def test_chains_apply_rules_in_order(transformer, column, value, expected):
+    assert project_value(value, transformer.coercers[column], transformer.null_values) == expected
+
+
+def test_columns_without_known_rules_pass_through(transformer):
+    assert transformer.coercers['id'] is None
+    assert transformer.coercers['raw'] is None
+    assert project_value('N/A', transformer.coercers['email'], transformer.null_values) is None
+
+
+def test_chains_are_built_once_and_share_the_column_parser():
+    transformer = CSVTransformer(MAPPING, workers=1)
+    coerce = transformer.coercers['start_date']
+    assert [coerce(value) for value in ('1/2/2025', '1/3/2025', '1/2/2025')] == [
+        '2025-01-02', '2025-01-03', '2025-01-02'
+    ]
+    assert transformer.coercers['start_date'] is coerce
+    stats = transformer.date_parsers['start_date'].stats()
+    assert (stats['values'], stats['cache_hits']) == (3, 1)
@@ -0,0 +1,135 @@
+"""Dashboard statistics: the webhook_daily_stats rollup and the WebhookStats cache."""
+from datetime import date
+
+import pytest
+
+from etl import dashboard
+from etl.dashboard import WebhookStats
+
+# Far enough back that no real webhook shares the rollup rows
+DAY = date(1999, 1, 4)
+
+
+class WebhookLog:
+    """Writes webhook_log rows and reads their rollup; removes both afterwards."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.ids = []
+
+    def insert(self, status, files, received_at=f'{DAY} 12:00'):
+        self.cursor.execute("""
+            INSERT INTO webhook_log (received_at, from_email, subject, status, files_processed, error_message)
+            VALUES (%s, 'dashboard@example.com', 'Dashboard test', %s, %s, %s)
+            RETURNING id
+        """, (received_at, status, files, None if status == 'success' else 'QA validation failed'))
+        self.ids.append(self.cursor.fetchone()[0])
+        return self.ids[-1]
+
+    def rollup(self, day=DAY):
+        self.cursor.execute("""
+            SELECT status, webhooks, files FROM webhook_daily_stats
+            WHERE day = %s AND webhooks > 0 ORDER BY status
+        """, (day,))
+        return self.cursor.fetchall()
+
+    def cleanup(self):
+        self.cursor.execute("DELETE FROM webhook_log WHERE id = ANY(%s)", (self.ids,))
+        self.cursor.execute("DELETE FROM webhook_daily_stats WHERE day BETWEEN %s AND %s + 1", (DAY, DAY))
+
+
+@pytest.fixture
+def webhook_log(db_conn):
+    log = WebhookLog(db_conn.cursor())
+    yield log
+    log.cleanup()
+
+
+def test_rollup_follows_inserts_updates_and_deletes(webhook_log):
+    first = webhook_log.insert('success', ['a.csv', 'b.csv'])
+    webhook_log.insert('success', ['c.csv'])
+    webhook_log.insert('partial', None)
+    assert webhook_log.rollup() == [('partial', 1, 0), ('success', 2, 3)]
+
+    webhook_log.cursor.execute("UPDATE webhook_log SET status = 'failed', files_processed = '{}' WHERE id = %s",
+                               (first,))
+    assert webhook_log.rollup() == [('failed', 1, 0), ('partial', 1, 0), ('success', 1, 1)]
+
+    webhook_log.cursor.execute("UPDATE webhook_log SET received_at = received_at + interval '1 day' WHERE id = %s",
+                               (first,))
+    assert webhook_log.rollup() == [('partial', 1, 0), ('success', 1, 1)]
+    assert webhook_log.rollup(date(1999, 1, 5)) == [('failed', 1, 0)]
+
+    webhook_log.cursor.execute("DELETE FROM webhook_log WHERE id = ANY(%s)", (webhook_log.ids,))
+    assert webhook_log.rollup() == [] and webhook_log.rollup(date(1999, 1, 5)) == []
+
+
+def test_rollup_matches_a_count_over_the_log(webhook_log):
+    for status, files in [('success', ['a.csv']), ('failed', None), ('success', ['b.csv', 'c.csv'])]:
+        webhook_log.insert(status, files)
+    webhook_log.cursor.execute("""
+        SELECT status, COUNT(*), COALESCE(SUM(array_length(files_processed, 1)), 0)
+        FROM webhook_log WHERE received_at::date = %s GROUP BY status ORDER BY status
+    """, (DAY,))
+    counted = webhook_log.cursor.fetchall()
+    assert webhook_log.rollup() == counted
+
+
+def test_today_counts_come_from_the_rollup(webhook_log):
+    stats = WebhookStats(ttl_seconds=0)
+    before = stats.get()['today']
+
+    webhook_log.insert('success', ['a.csv', 'b.csv'], received_at='now')
+    webhook_log.insert('partial', ['c.csv'], received_at='now')
+    webhook_log.insert('failed', None, received_at='now')
+    after = stats.get()
+
+    assert after['today'] == {
+        'success': before['success'] + 1,
+        'failed': before['failed'] + 2,
+        'total_files': before['total_files'] + 2,
+    }
+    assert after['last_7_days'][0]['date'] == date.today().strftime('%b %d')
+    assert after['recent_failures'][0]['error'] == 'QA validation failed'
+    assert len(after['recent_failures']) <= 5
+
+
+def test_results_are_reused_within_the_ttl(monkeypatch):
+    queries = []
+    monkeypatch.setattr(WebhookStats, '_query', lambda self: queries.append(1) or {'run': len(queries)})
+    clock = [100.0]
+    monkeypatch.setattr(dashboard.time, 'monotonic', lambda: clock[0])
+
+    stats = WebhookStats(ttl_seconds=10)
+    assert stats.get() == {'run': 1}
+    clock[0] += 9.9
+    assert stats.get() == {'run': 1}
+    clock[0] += 0.1
+    assert stats.get() == {'run': 2}
+
+    stats.invalidate()
+    assert stats.get() == {'run': 3}
+
+
+def test_zero_ttl_disables_the_cache_and_errors_are_not_cached(monkeypatch):
+    outcomes = [ConnectionError('database unavailable'), {'run': 1}, {'run': 2}]
+
+    def query(self):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    monkeypatch.setattr(WebhookStats, '_query', query)
+
+    stats = WebhookStats(ttl_seconds=0)
+    with pytest.raises(ConnectionError):
+        stats.get()
+    assert stats.get() == {'run': 1}
+    assert stats.get() == {'run': 2}
+
+
+def test_ttl_comes_from_the_environment(monkeypatch):
+    monkeypatch.setenv('ETL_DASHBOARD_CACHE_SECONDS', '2.5')
+    assert WebhookStats().ttl_seconds == 2.5
+    monkeypatch.delenv('ETL_DASHBOARD_CACHE_SECONDS')
+    assert WebhookStats().ttl_seconds == dashboard.DEFAULT_TTL_SECONDS
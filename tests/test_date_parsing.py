@@ -0,0 +1,52 @@
+"""Date parsing: learned formats, dateutil outliers and the per-column summary."""
+from datetime import date
+
+from etl.date_parsing import ColumnDateParser, merge_parse_stats
+from etl.transformer import CSVTransformer
+
+MAPPING = {
+    'target_object': 'events',
+    'columns': {'Id': 'id', 'Edited': 'edited_at'},
+    'coercions': {'edited_at': 'timestamptz'},
+}
+
+
+def test_learns_the_format_and_falls_back_for_outliers():
+    parser = ColumnDateParser('edited_at', 'timestamptz', sample_size=3)
+    values = [f'1/{day}/2025 10:00 AM' for day in range(1, 11)]
+    assert [parser(value) for value in values][0] == '2025-01-01T10:00:00'
+    assert parser.format == '%m/%d/%Y %I:%M %p'
+
+    assert parser('January 5, 2025') == '2025-01-05T00:00:00'
+    assert parser('not a date') is None
+    assert parser(values[0]) == '2025-01-01T10:00:00'
+
+    stats = parser.stats()
+    assert (stats['fast_path'], stats['fallback'], stats['failed'], stats['cache_hits']) == (10, 1, 1, 1)
+    assert stats['hit_rate'] == round(11 / 13, 4)
+
+
+def test_merged_stats_add_up():
+    first = {'edited_at': {'kind': 'timestamptz', 'format': 'iso', 'values': 4, 'cache_hits': 1,
+                           'fast_path': 3, 'fallback': 0, 'failed': 0, 'hit_rate': 1.0}}
+    second = {'edited_at': {**first['edited_at'], 'values': 6, 'fast_path': 4, 'fallback': 1}}
+    merged = merge_parse_stats([first, second])['edited_at']
+    assert (merged['values'], merged['fast_path'], merged['fallback'], merged['format']) == (10, 7, 1, 'iso')
+
+
+def transform(write_csv, rows, capsys):
+    path = write_csv([['Id', 'Edited']] + rows)
+    with CSVTransformer(MAPPING, workers=1).open_stream(path, date(2025, 1, 5), 'events.csv', 'Events') as stream:
+        stream.read()
+    return capsys.readouterr().out
+
+
+def test_clean_columns_print_no_summary(write_csv, capsys):
+    rows = [[str(i), f'1/{i}/2025 10:00 AM'] for i in range(1, 30)]
+    assert 'Date parsing' not in transform(write_csv, rows, capsys)
+
+
+def test_columns_with_outliers_are_reported(write_csv, capsys):
+    rows = [[str(i), f'1/{i}/2025 10:00 AM'] for i in range(1, 30)] + [['99', 'garbage']]
+    out = transform(write_csv, rows, capsys)
+    assert 'Date parsing [edited_at]: ' in out and 'failed 1)' in out
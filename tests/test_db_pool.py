@@ -0,0 +1,136 @@
+"""ConnectionPool: LIFO reuse, idle eviction, health checks and the size cap."""
+import threading
+import time
+
+import psycopg2
+import pytest
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+from etl import db_connection
+from etl.db_connection import ConnectionPool
+
+
+class FakeConnection:
+    """Just enough of a psycopg2 connection for the pool; `alive = False` makes pings fail."""
+
+    def __init__(self, number, autocommit):
+        self.number = number
+        self.autocommit = autocommit
+        self.alive = True
+        self.closed = 0
+        self.status = TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def execute(self, query, params=None):
+                if not connection.alive:
+                    raise psycopg2.OperationalError('server closed the connection unexpectedly')
+
+            def close(self):
+                pass
+        return Cursor()
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def commit(self):
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """Every connection the pool opens, in order."""
+    opened = []
+
+    def connect(autocommit=False):
+        opened.append(FakeConnection(len(opened) + 1, autocommit))
+        return opened[-1]
+    monkeypatch.setattr(db_connection, 'connect_with_retry', connect)
+    return opened
+
+
+def test_most_recently_returned_connection_is_reused(connections):
+    pool = ConnectionPool(max_size=3, idle_timeout=60, health_check_after=60)
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+
+    assert pool.acquire() is second
+    metrics = pool.metrics()
+    assert (metrics['created'], metrics['reused'], metrics['open'], metrics['in_use']) == (2, 1, 2, 1)
+
+
+def test_idle_connections_are_evicted(connections):
+    pool = ConnectionPool(max_size=3, idle_timeout=0.01, health_check_after=60)
+    pool.release(pool.acquire())
+    time.sleep(0.02)
+
+    assert pool.acquire() is connections[1]
+    assert connections[0].closed
+    assert pool.metrics()['idle_evicted'] == 1 and pool.metrics()['open'] == 1
+
+
+def test_stale_connection_is_replaced_after_a_failed_ping(connections):
+    pool = ConnectionPool(max_size=3, idle_timeout=60, health_check_after=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.alive = False
+
+    assert pool.acquire() is connections[1]
+    assert conn.closed and pool.metrics()['stale_discarded'] == 1
+
+
+def test_recently_used_connection_is_not_pinged(connections):
+    pool = ConnectionPool(max_size=3, idle_timeout=60, health_check_after=60)
+    conn = pool.acquire()
+    pool.release(conn)
+    # A dead connection goes unnoticed inside the health-check window
+    conn.alive = False
+    assert pool.acquire() is conn
+
+
+def test_connection_errors_discard_and_other_errors_return(connections):
+    pool = ConnectionPool(max_size=3, idle_timeout=60, health_check_after=60)
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection() as conn:
+            raise psycopg2.OperationalError('SSL connection has been closed unexpectedly')
+    assert conn.closed and pool.metrics()['broken_discarded'] == 1
+
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            conn.status = TRANSACTION_STATUS_INTRANS
+            raise ValueError('bad row')
+    # Rolled back and back in the pool
+    assert conn.rollbacks == 1 and not conn.closed and pool.metrics()['idle'] == 1
+
+
+def test_autocommit_switch_rolls_back_an_open_transaction(connections):
+    pool = ConnectionPool(max_size=1, idle_timeout=60, health_check_after=60)
+    conn = pool.acquire(autocommit=True)
+    pool.release(conn)
+    conn.status = TRANSACTION_STATUS_INTRANS
+
+    assert pool.acquire(autocommit=False) is conn
+    assert conn.autocommit is False and conn.rollbacks == 1
+
+
+def test_full_pool_waits_for_a_return_then_times_out(connections):
+    pool = ConnectionPool(max_size=1, idle_timeout=60, health_check_after=60, acquire_timeout=2)
+    held = pool.acquire()
+    threading.Timer(0.05, pool.release, args=(held,)).start()
+    assert pool.acquire() is held
+
+    pool.acquire_timeout = 0.05
+    with pytest.raises(psycopg2.OperationalError, match='waiting for a pooled connection'):
+        pool.acquire()
+    assert pool.metrics()['wait_timeouts'] == 1 and len(connections) == 1
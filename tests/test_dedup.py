@@ -0,0 +1,108 @@
+"""DuplicateKeyTracker: in-memory repeats, spilled runs and exact confirmation."""
+import random
+import tracemalloc
+from collections import Counter
+
+import pytest
+
+from etl import dedup
+from etl.dedup import BYTES_PER_HASH, DuplicateKeyTracker
+from etl.validator import QAValidator
+
+
+def track(keys, max_in_memory=None, rescan=True):
+    budget = max_in_memory * BYTES_PER_HASH if max_in_memory else None
+    tracker = DuplicateKeyTracker(budget)
+    for key in keys:
+        tracker.add(key)
+    try:
+        return tracker.finish((lambda: iter(keys)) if rescan else None), tracker.spills
+    finally:
+        tracker.close()
+
+
+def expected_duplicates(keys):
+    return {key: count for key, count in Counter(keys).items() if count > 1}
+
+
+def test_default_budget(monkeypatch):
+    monkeypatch.delenv('ETL_DEDUP_MEMORY_MB', raising=False)
+    assert dedup.default_memory_budget() == 64 * 1024 * 1024
+    assert DuplicateKeyTracker().max_in_memory == 64 * 1024 * 1024 // BYTES_PER_HASH
+
+
+@pytest.mark.parametrize('budget_mb', [8, 24])
+def test_memory_stays_within_budget(budget_mb):
+    budget = budget_mb * 1024 * 1024
+    tracker = DuplicateKeyTracker(budget)
+    keys = [(str(i),) for i in range(tracker.max_in_memory * 2)]
+    tracemalloc.start()
+    try:
+        # The keys themselves are the caller's; only the tracker's allocations count
+        for key in keys:
+            tracker.add(key)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        tracker.close()
+    assert tracker.spills == 2
+    assert peak <= budget
+
+
+def test_no_duplicates():
+    keys = [(str(i),) for i in range(100)]
+    assert track(keys, max_in_memory=7) == ({}, 15)
+
+
+def test_repeats_within_one_run():
+    keys = [('a',), ('b',), ('a',), ('a',), ('c', 'd'), ('c', 'd')]
+    assert track(keys) == ({('a',): 3, ('c', 'd'): 2}, 0)
+    assert track(keys, rescan=False)[0] == {('a',): 3, ('c', 'd'): 2}
+
+
+def test_repeats_across_spilled_runs():
+    # Budget of 3 hashes: 'a' lands in three different runs
+    keys = [('a',), ('b',), ('c',), ('d',), ('a',), ('e',), ('f',), ('a',), ('g',), ('b',)]
+    duplicates, spills = track(keys, max_in_memory=3)
+    assert spills >= 3
+    assert duplicates == {('a',): 3, ('b',): 2}
+
+
+def test_repeats_within_and_across_runs():
+    keys = [('a',), ('a',), ('b',), ('c',), ('x',), ('a',), ('y',), ('z',), ('a',), ('a',)]
+    assert track(keys, max_in_memory=3)[0] == {('a',): 5}
+
+
+def test_cross_run_repeats_without_rescan_count_exactly():
+    keys = [('a',), ('b',), ('c',), ('a',), ('d',), ('e',), ('a',)]
+    duplicates, _ = track(keys, max_in_memory=3, rescan=False)
+    # Keys first repeated across runs are only known by hash, but counted exactly
+    assert sorted(duplicates.values()) == [3]
+
+
+@pytest.mark.parametrize('max_in_memory', [1, 2, 5, 64, None])
+def test_randomized_against_counter(max_in_memory):
+    rng = random.Random(max_in_memory or 0)
+    keys = [(str(rng.randrange(300)), rng.choice('xy')) for _ in range(2000)]
+    assert track(keys, max_in_memory)[0] == expected_duplicates(keys)
+
+
+def test_rescan_rules_out_collisions(monkeypatch):
+    # With 2-bit hashes nearly every key collides; the rescan keeps only true repeats
+    monkeypatch.setattr(dedup, 'HASH_MASK', 0x3)
+    keys = [(str(i),) for i in range(40)] + [('7',), ('7',), ('12',)]
+    duplicates, spills = track(keys, max_in_memory=2)
+    assert spills > 0
+    assert duplicates == {('7',): 3, ('12',): 2}
+
+
+def test_validator_confirms_spilled_duplicates(write_csv):
+    rows = [['Id', 'Name']] + [[str(i % 250), 'n'] for i in range(300)]
+    mapping = {'columns': {'Id': 'id', 'Name': 'name'}, 'natural_key': ['id']}
+    is_valid, errors, stats = QAValidator(mapping, dedup_memory_budget=10 * BYTES_PER_HASH).validate_file(
+        write_csv(rows)
+    )
+    assert not is_valid
+    assert stats['duplicates'] == 50 and stats['dedup_spills'] > 0
+    assert errors[0] == "Duplicate key {'id': '0'}: 2 occurrences"
+    assert errors[5] == "... and 45 more duplicate keys"
@@ -0,0 +1,158 @@
+"""ELT mode: SQL coercions against the Python ones, and a shared _raw_hash."""
+import csv
+import io
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from etl.date_parsing import ColumnDateParser
+from etl.elt import SqlCoercions
+from etl.transformer import CSVTransformer
+
+COLUMNS = {'Id': 'id', 'Name': 'name', 'Email': 'email', 'Opt Out': 'opt_out',
+           'Born': 'born', 'Seen': 'seen', 'Score': 'score'}
+COERCIONS = {'name': 'trim', 'email': 'lower|trim', 'opt_out': 'boolean', 'born': 'date',
+             'seen': 'timestamptz', 'score': 'numeric'}
+MAPPING = {'target_object': 'people', 'natural_key': ['id'], 'columns': COLUMNS,
+           'coercions': COERCIONS, 'null_like': ['', 'NULL', 'n/a']}
+
+ROWS = [
+    list(COLUMNS),
+    ['1', ' Ann ', ' ANN@X.COM', 'Yes', '1/5/1990', '2/28/2025 2:37 PM', '$1,234.50'],
+    ['2', 'Bob', 'n/a', 'no', '1990-01-05', '2025-01-05T10:00:00+05:30', ''],
+    ['3', '', 'NULL', 'maybe', '02/30/2025', 'garbage', 'abc'],
+]
+
+DATES = [
+    '1/5/2025', '01/05/2025', '12/31/2025', '2/29/2024',
+    '02/30/2025', '2/29/2025', '0/10/2025', '4/31/2025',
+    '2025-01-05', '2024-02-29', '2025-02-29', '2025-13-01', '2025-00-10',
+    '1/5/2025 12:00 AM', '1/5/2025 12:30 PM', '1/5/2025 11:59 PM', '1/5/2025 1:05 am',
+    '1/5/2025 13:00 PM', '1/5/2025 0:15 AM', '1/5/2025 0:15 PM', '1/5/2025 14:37', '1/5/2025 24:00',
+    '1/5/2025 9:60 AM', '1/5/2025 9:30:59 PM', '1/5/2025 9:30:60 PM', '12/31/2025, 11:59 PM',
+    '2025-01-05T10:00:00', '2025-01-05 10:00', '2025-01-05T10:00:00Z',
+    '2025-01-05T10:00:00+05:30', '2025-01-05T23:30:00-08:00', '2025-01-05T10:00:00.123456-08:00',
+    '2025-01-05T24:00:00', '2025-01-05T10:61:00', '2025-01-05T10:00:61',
+    'garbage',
+]
+# dateutil guesses (day-first, completed from today) that SQL leaves NULL
+DATE_GUESSES = ['13/01/2025', '1/5', '2025', '2025-01']
+NUMBERS = ['1', '-0.5', '+7', '.5', '5.', '$1,234.50', ' 12 ', '1\xa0000', '1e3', '-2.5E-2',
+           'abc', '1.2.3', '$', '--1', '1e', '12abc']
+BOOLEANS = ['true', 'TRUE', ' Yes ', 'y', 't', '1', 'false', 'No', 'N', 'f', '0', 'maybe', '2', 'yess']
+
+
+def python_values(kind, values):
+    """What the Python path converts each value to (None where it gives up)."""
+    transformer = CSVTransformer({'columns': {}}, workers=1)
+    if kind in ('date', 'timestamptz'):
+        convert = ColumnDateParser('value', kind)
+    elif kind == 'numeric':
+        convert = transformer._to_numeric
+    else:
+        convert = transformer._to_boolean
+    return [convert(value) for value in values]
+
+
+def sql_values(cursor, kind, values):
+    cursor.execute("CREATE TEMP TABLE land (value text)")
+    try:
+        cursor.executemany("INSERT INTO land VALUES (%s)", [(value,) for value in values])
+        cursor.execute("SELECT ord, v FROM (SELECT row_number() OVER () AS ord, value FROM land) l, "
+                       "LATERAL (" + SqlCoercions({'coercions': {'value': kind}}).select(
+                           ('pg_temp', 'land'), ['value'],
+                           {'value': 'timestamptz' if kind == 'timestamptz' else kind},
+                           cursor.connection.server_version
+                       ).as_string(cursor).replace('FROM "pg_temp"."land" l', 'FROM (SELECT l.value) l')
+                       + ") c(v) ORDER BY ord")
+        return [row[1] for row in cursor.fetchall()]
+    finally:
+        cursor.execute("DROP TABLE land")
+
+
+def normalize(kind, value):
+    if value is None:
+        return None
+    if kind == 'date':
+        return date.fromisoformat(value) if isinstance(value, str) else value
+    if kind == 'timestamptz':
+        parsed = datetime.fromisoformat(value) if isinstance(value, str) else value
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    if kind == 'numeric':
+        return float(value)
+    return value
+
+
+@pytest.mark.parametrize('kind, values', [
+    ('date', DATES), ('timestamptz', DATES), ('numeric', NUMBERS), ('boolean', BOOLEANS),
+])
+def test_sql_coercions_match_python(db_conn, kind, values):
+    cursor = db_conn.cursor()
+    cursor.execute("SET TimeZone = 'UTC'")
+    expected = [normalize(kind, value) for value in python_values(kind, values)]
+    actual = [normalize(kind, value) for value in sql_values(cursor, kind, values)]
+    assert dict(zip(values, actual)) == dict(zip(values, expected))
+
+
+@pytest.mark.parametrize('kind', ['date', 'timestamptz'])
+def test_sql_dates_do_not_guess(db_conn, kind):
+    assert all(python_values(kind, DATE_GUESSES))
+    assert sql_values(db_conn.cursor(), kind, DATE_GUESSES) == [None] * len(DATE_GUESSES)
+
+
+def transformed(tmp_path, transform, rows):
+    source = tmp_path / 'input.csv'
+    with open(source, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f).writerows(rows)
+    output = tmp_path / f'out_{transform}.csv'
+    CSVTransformer(dict(MAPPING, transform=transform), workers=1).transform_csv(
+        str(source), str(output), date(2025, 1, 7), 'input.csv', 'People'
+    )
+    return list(csv.DictReader(io.StringIO(output.read_text(encoding='utf-8'), newline='')))
+
+
+def test_raw_hash_same_in_both_modes(tmp_path):
+    python_rows = transformed(tmp_path, 'python', ROWS)
+    elt_rows = transformed(tmp_path, 'elt', ROWS)
+
+    # The modes differ in the values they write, not in the hash
+    assert python_rows[0]['email'] == 'ann@x.com' and elt_rows[0]['email'] == ' ANN@X.COM'
+    hashes = [row['_raw_hash'] for row in python_rows]
+    assert hashes == [row['_raw_hash'] for row in elt_rows]
+    assert len(set(hashes)) == 3 and all(len(h) == 32 for h in hashes)
+
+
+def test_raw_hash_tracks_source_values(tmp_path):
+    changed = [row[:] for row in ROWS]
+    changed[1][6] = '$1,234.51'
+    # Null-like spellings are the same NULL
+    changed[2][2] = ''
+    reordered = [[row[i] for i in reversed(range(len(row)))] for row in ROWS]
+
+    base = [row['_raw_hash'] for row in transformed(tmp_path, 'python', ROWS)]
+    after = [row['_raw_hash'] for row in transformed(tmp_path, 'python', changed)]
+    assert (after[0] != base[0], after[1:]) == (True, base[1:])
+    assert [row['_raw_hash'] for row in transformed(tmp_path, 'elt', reordered)] == base
+
+
+def test_elt_select_passes_raw_hash_through(db_conn, tmp_path):
+    cursor = db_conn.cursor()
+    rows = transformed(tmp_path, 'elt', ROWS)
+    columns = list(rows[0])
+    cursor.execute("CREATE TEMP TABLE land_people ({})".format(', '.join(f'"{col}" text' for col in columns)))
+    try:
+        cursor.executemany("INSERT INTO land_people VALUES ({})".format(', '.join(['%s'] * len(columns))),
+                           [[row[col] or None for col in columns] for row in rows])
+        cursor.execute(SqlCoercions(MAPPING).select(
+            ('pg_temp', 'land_people'), columns, {'born': 'date', 'score': 'numeric'},
+            db_conn.server_version
+        ))
+        selected = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        cursor.execute("DROP TABLE land_people")
+
+    python_rows = transformed(tmp_path, 'python', ROWS)
+    assert [row['_raw_hash'] for row in selected] == [row['_raw_hash'] for row in python_rows]
+    assert [row['email'] for row in selected] == ['ann@x.com', None, None]
+    assert [row['score'] for row in selected] == [Decimal('1234.50'), None, None]
@@ -0,0 +1,62 @@
+"""COPY encoding passthrough: single-byte files keep their bytes, Python sees cp1252 text."""
+import csv
+import io
+from datetime import date
+
+import pytest
+
+from etl.encoding_utils import copy_passthrough_encoding
+from etl.transformer import METADATA_COLUMNS, CSVTransformer
+
+MAPPING = {
+    'target_object': 'notes',
+    'natural_key': [],
+    'columns': {'Id': 'id', 'Name': 'name', 'Note': 'note'},
+    'coercions': {'note': 'trim'},
+    'null_like': [''],
+}
+# Accented letters throughout, so the detector settles on Windows-1252, and
+# Windows-1252-only characters only past its 100 KB sample
+LINES = (['Id,Name,Note'] + [f'{i},Caf\xe9 {i},plain note {i}' for i in range(5000)]
+         + ['9001,“Smart” – quotes,€ 5 … '])
+
+
+def test_the_codec_reads_like_cp1252():
+    data = bytes(range(256))
+    text = data.decode('etl_win1252')
+    assert text == data.decode('cp1252', 'replace')
+    # Undefined bytes have no WIN1252 character to go back to
+    undefined = {0x81, 0x8d, 0x8f, 0x90, 0x9d}
+    assert text.encode('etl_win1252') == bytes(ord('?') if byte in undefined else byte for byte in data)
+
+
+@pytest.mark.parametrize('encoding, expected', [
+    ('windows-1252', 'WIN1252'), ('CP1252', 'WIN1252'), ('iso-8859-1', 'LATIN1'), ('utf-8', None),
+])
+def test_passthrough_encoding(encoding, expected):
+    assert copy_passthrough_encoding(encoding) == expected
+
+
+def transformed_rows(path, **kwargs):
+    transformer = CSVTransformer(MAPPING, **kwargs)
+    with transformer.open_stream(str(path), date(2025, 1, 5), 'notes.csv', 'Notes') as stream:
+        data = stream.read()
+        encoding = stream.encoding
+    text = data.decode({'UTF8': 'utf-8', 'WIN1252': 'cp1252'}[encoding])
+    extract_ts = len(MAPPING['columns']) + METADATA_COLUMNS.index('_extract_ts')
+    rows = list(csv.reader(io.StringIO(text, newline='')))
+    for row in rows[1:]:
+        del row[extract_ts]
+    return encoding, rows
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_passthrough_matches_utf8_output(tmp_path, workers):
+    source = tmp_path / 'notes.csv'
+    source.write_bytes('\r\n'.join(LINES + ['']).encode('cp1252'))
+    options = {'workers': workers, 'min_parallel_bytes': 0, 'chunk_bytes': 16 * 1024}
+
+    encoding, rows = transformed_rows(source, copy_passthrough=True, **options)
+    assert encoding == 'WIN1252'
+    assert rows == transformed_rows(source, copy_passthrough=False, **options)[1]
+    assert rows[-1][:3] == ['9001', '“Smart” – quotes', '€ 5 …']
@@ -0,0 +1,52 @@
+"""Mapping auto-detection from the header row (HeaderIndex)."""
+from pathlib import Path
+
+import pytest
+
+from etl.registry import CompiledMapping, HeaderIndex, MappingRegistry
+
+MAPPINGS_DIR = Path(__file__).resolve().parent.parent / 'Mappings'
+REGISTRY = MappingRegistry(str(MAPPINGS_DIR), reload_seconds=3600)
+
+
+def test_similarity_is_shared_over_union():
+    index = HeaderIndex({
+        'a': CompiledMapping({'columns': {'Id': 'id', 'Name': 'name'}}),
+        'b': CompiledMapping({'columns': {'Id': 'id', 'Name': 'name', 'Email': 'email', 'Phone': 'phone'}}),
+        'c': CompiledMapping({'columns': {'Other': 'other'}}),
+    })
+    assert index.score(['Id', 'Name']) == [(1.0, 'a'), (0.5, 'b')]
+    assert index.score(['Id', 'Name', 'Email', 'Extra']) == [(0.6, 'b'), (0.5, 'a')]
+    assert index.score(['Unrelated']) == []
+
+
+@pytest.mark.parametrize('name', REGISTRY.names())
+def test_every_shipped_mapping_recognizes_its_own_header(name):
+    headers = list(REGISTRY.get(name).column_mapping)
+    assert REGISTRY.match_headers(headers, preferred=name) == (name, 1.0)
+    # Unless another mapping has the identical header set, no hint is needed
+    twins = [other for other in REGISTRY.names()
+             if set(REGISTRY.get(other).column_mapping) == set(headers)]
+    if twins == [name]:
+        assert REGISTRY.match_headers(list(reversed(headers))) == (name, 1.0)
+
+
+def test_preferred_mapping_only_breaks_ties():
+    headers = list(REGISTRY.get('contacts').column_mapping)
+    assert REGISTRY.match_headers(headers, preferred='form_submission') == ('contacts', 1.0)
+
+
+def test_detect_mapping_explains_near_misses(app_module, write_csv, monkeypatch, app_dir):
+    monkeypatch.chdir(app_dir)
+    headers = list(app_module.registry.get('contacts').column_mapping)
+
+    exact = write_csv([headers, ['x'] * len(headers)], name='exact.csv')
+    assert app_module.detect_mapping(Path(exact), 'Daily export.csv') == ('contacts', None)
+
+    near = write_csv([headers[1:] + ['Surprise Column']], name='near.csv')
+    mapping, reason = app_module.detect_mapping(Path(near), 'Daily export.csv')
+    assert mapping is None
+    assert reason == 'Headers match no mapping exactly (closest: contacts, 1 missing, 1 extra)'
+
+    unrelated = write_csv([['Nothing', 'Matches']], name='unrelated.csv')
+    assert app_module.detect_mapping(Path(unrelated), 'contacts.csv') == (None, 'Headers match no mapping')
@@ -0,0 +1,93 @@
+"""Duplicate-file detection: processed_files is keyed by content, table and partition date."""
+import hashlib
+import io
+import uuid
+from datetime import date
+
+import pytest
+
+from etl.idempotency import ProcessedFileIndex
+from etl.job_queue import JobQueue
+
+DAY = date(2025, 1, 5)
+NEXT_DAY = date(2025, 1, 6)
+TABLE = 'staging.contacts'
+
+
+@pytest.fixture
+def content_hash(db_conn):
+    """A hash no real file has; its processed_files rows are removed afterwards."""
+    value = f"test-{uuid.uuid4().hex}"
+    yield value
+    db_conn.cursor().execute("DELETE FROM processed_files WHERE content_hash = %s", (value,))
+
+
+def test_lookup_is_per_partition(content_hash):
+    index = ProcessedFileIndex(ttl_days=7)
+    index.record(content_hash, TABLE, 41, 10, 'contacts.csv', DAY)
+
+    assert index.lookup(content_hash, TABLE, DAY)['load_id'] == 41
+    assert index.lookup(content_hash, TABLE, NEXT_DAY) is None
+    assert index.lookup(content_hash, 'staging.job_applicants', DAY) is None
+
+    # A later load of the same partition replaces the entry; the other partition is independent
+    index.record(content_hash, TABLE, 42, 11, 'contacts.csv', DAY)
+    index.record(content_hash, TABLE, 43, 12, 'contacts.csv', NEXT_DAY)
+    assert index.lookup(content_hash, TABLE, DAY)['row_count'] == 11
+    assert index.lookup(content_hash, TABLE, NEXT_DAY)['load_id'] == 43
+
+
+def test_disabled_index_never_matches(content_hash):
+    index = ProcessedFileIndex(ttl_days=0)
+    index.record(content_hash, TABLE, 41, 10, 'contacts.csv', DAY)
+    assert ProcessedFileIndex(ttl_days=7).lookup(content_hash, TABLE, DAY) is None
+
+
+def test_active_job_is_per_partition(tmp_path):
+    queue = JobQueue(path=str(tmp_path / 'jobs.sqlite3'))
+    job_id = queue.enqueue('a.csv', '/tmp/a.csv', 'contacts', '2025-01-05', target_table=TABLE, content_hash='h')
+
+    assert queue.find_active('h', TABLE, '2025-01-05')['id'] == job_id
+    assert queue.find_active('h', TABLE, '2025-01-06') is None
+    queue.finish(job_id, 'success')
+    assert queue.find_active('h', TABLE, '2025-01-05') is None
+
+
+@pytest.fixture
+def fake_pipeline(app_module, monkeypatch):
+    """Upload route with the load itself replaced; returns the load ids handed out."""
+    load_ids = []
+
+    def create_load_record(*args, **kwargs):
+        load_ids.append(1000 + len(load_ids))
+        return load_ids[-1]
+
+    monkeypatch.setattr(app_module, 'create_load_record', create_load_record)
+    monkeypatch.setattr(app_module, 'run_pipeline', lambda *args: (True, [], 3, [], {'rows': 0, 'file': None}))
+    monkeypatch.setattr(app_module, 'update_progress_and_status', lambda *args: None)
+    monkeypatch.setattr(app_module.notifier, 'notify_success', lambda *args: None)
+    return load_ids
+
+
+def test_upload_duplicate_and_force(client, db_conn, fake_pipeline):
+    content = f"Contact ID\n{uuid.uuid4().hex}\n".encode()
+
+    def upload(day, force=False):
+        data = {'csv_file': (io.BytesIO(content), 'contacts.csv'), 'mapping': 'contacts', 'partition_date': day}
+        if force:
+            data['force'] = '1'
+        return client.post('/upload', data=data, content_type='multipart/form-data')
+
+    try:
+        assert upload('2025-01-05').status_code == 200
+
+        repeat = upload('2025-01-05')
+        assert repeat.status_code == 409
+        assert repeat.get_json()['duplicate_of'] == fake_pipeline[0]
+
+        assert upload('2025-01-06').status_code == 200
+        assert upload('2025-01-05', force=True).status_code == 200
+        assert len(fake_pipeline) == 3
+    finally:
+        db_conn.cursor().execute("DELETE FROM processed_files WHERE content_hash = %s",
+                                 (hashlib.sha256(content).hexdigest(),))
@@ -0,0 +1,88 @@
+"""Webhook job queue: claims, the per-table cap, crash recovery and attachment names."""
+import pytest
+
+from etl.job_queue import JobQueue, JobWorkers
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / 'jobs.sqlite3'), max_per_table=1, max_attempts=2)
+
+
+def add(queue, table, name='Contacts Export.csv'):
+    return queue.enqueue('Contacts_Export.csv', f'/tmp/{table}.csv', 'contacts', '2025-01-05',
+                         target_table=table, original_name=name)
+
+
+def test_claims_oldest_first_and_only_once(queue):
+    first, second = add(queue, 'contacts'), add(queue, 'accounts')
+    claimed = queue.claim()
+    assert claimed['id'] == first and claimed['status'] == 'running' and claimed['attempts'] == 0
+    assert queue.get(first)['attempts'] == 1
+    assert queue.claim()['id'] == second
+    assert queue.claim() is None
+
+
+def test_table_at_its_cap_waits_while_others_run(queue):
+    busy, waiting, other = add(queue, 'contacts'), add(queue, 'contacts'), add(queue, 'accounts')
+    assert queue.claim()['id'] == busy
+    assert queue.claim()['id'] == other
+    assert queue.claim() is None
+
+    queue.finish(busy, 'success', result={'rows_loaded': 3})
+    assert queue.claim()['id'] == waiting
+    assert queue.counts() == {'success': 1, 'running': 2}
+
+
+def test_interrupted_jobs_requeue_until_the_attempt_limit(queue):
+    job_id = add(queue, 'contacts')
+    # Claimed by this process, which requeue_orphans treats as restarted
+    queue.claim()
+    requeued, failed = queue.requeue_orphans()
+    assert [job['id'] for job in requeued] == [job_id] and failed == []
+
+    queue.claim()
+    requeued, failed = queue.requeue_orphans()
+    assert requeued == [] and [job['id'] for job in failed] == [job_id]
+    stored = queue.get(job_id)
+    assert stored['status'] == 'failed' and stored['error'] == 'Interrupted 2 times, giving up'
+    assert queue.claim() is None
+
+
+def test_abandoned_jobs_reach_the_hook_with_their_original_name(queue):
+    add(queue, 'contacts')
+    queue.claim()
+    queue.requeue_orphans()
+    queue.claim()
+
+    abandoned = []
+    workers = JobWorkers(queue, handler=lambda job: {}, workers=1, on_abandoned=abandoned.append)
+    workers.start()
+    workers.stop()
+    assert [(job['original_name'], job['file_name']) for job in abandoned] == [
+        ('Contacts Export.csv', 'Contacts_Export.csv')
+    ]
+
+
+def test_webhook_log_lists_the_attachment_as_sent(app_module, db_conn, queue, monkeypatch):
+    cursor = db_conn.cursor()
+    cursor.execute("""
+        INSERT INTO webhook_log (from_email, subject, attachments_count, files_processed, files_skipped,
+                                 files_failed, status, load_ids)
+        VALUES ('test@example.com', 'queue test', 1, '{}', '{}', '{}', 'processing', '{}')
+        RETURNING id
+    """)
+    webhook_id = cursor.fetchone()[0]
+    monkeypatch.setattr(app_module, 'job_queue', queue)
+    try:
+        job_id = queue.enqueue('Contacts_Export.csv', '/tmp/contacts.csv', 'contacts', '2025-01-05',
+                               webhook_id=webhook_id, original_name='Contacts Export.csv')
+        job = queue.claim()
+        queue.finish(job_id, 'failed', 'boom')
+        app_module.record_webhook_job(job, 'failed', 'boom', None)
+
+        cursor.execute("SELECT files_failed, error_message, status FROM webhook_log WHERE id = %s",
+                       (webhook_id,))
+        assert cursor.fetchone() == (['Contacts Export.csv'], 'Contacts Export.csv: boom', 'partial')
+    finally:
+        cursor.execute("DELETE FROM webhook_log WHERE id = %s", (webhook_id,))
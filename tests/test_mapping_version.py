@@ -0,0 +1,40 @@
+"""_mapping_version: every loaded row carries a fingerprint of the mapping content."""
+import csv
+import io
+from datetime import date
+
+from etl.registry import CompiledMapping, MappingRegistry
+from etl.transformer import METADATA_COLUMNS, CSVTransformer
+
+MAPPING_YAML = """\
+target_object: notes
+natural_key: [id]
+columns:
+  Id: id   # the key
+  Note: note
+"""
+
+
+def test_fingerprint_follows_content_not_the_file(tmp_path):
+    (tmp_path / 'notes.yaml').write_text(MAPPING_YAML)
+    first = MappingRegistry(str(tmp_path), reload_seconds=0).get('notes')
+
+    # Comments and key order do not change it; file time and path do not either
+    (tmp_path / 'copy.yaml').write_text("columns: {Note: note, Id: id}\nnatural_key: [id]\ntarget_object: notes\n")
+    copy = MappingRegistry(str(tmp_path), reload_seconds=0).get('copy')
+    assert copy.fingerprint == first.fingerprint and copy.version != first.version
+    assert len(first.fingerprint) == 12
+
+    changed = CompiledMapping({**first, 'natural_key': ['note']})
+    assert changed.fingerprint != first.fingerprint
+
+
+def test_rows_carry_the_fingerprint(write_csv):
+    mapping = CompiledMapping({'target_object': 'notes', 'columns': {'Id': 'id', 'Note': 'note'}})
+    path = write_csv([['Id', 'Note'], ['1', 'a'], ['2', 'b']])
+    transformer = CSVTransformer(mapping)
+    with transformer.open_stream(path, date(2025, 1, 5), 'notes.csv', 'Notes') as stream:
+        rows = list(csv.DictReader(io.StringIO(stream.read().decode('utf-8'))))
+
+    assert [row['_mapping_version'] for row in rows] == [mapping.fingerprint] * 2
+    assert list(rows[0])[-len(METADATA_COLUMNS):] == METADATA_COLUMNS
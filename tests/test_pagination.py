@@ -0,0 +1,142 @@
+"""Keyset pagination: cursors, limits and page walks."""
+import base64
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from etl.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor, fetch_page, page_size
+
+COLUMNS = ['id', 'started_at', 'status']
+UTC = timezone.utc
+
+
+@pytest.mark.parametrize('timestamp', [
+    datetime(2025, 1, 5, 10, 30, 15, 123456, tzinfo=UTC),
+    datetime(2025, 1, 5, 10, 30, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+    datetime(2025, 1, 5, 10, 30, tzinfo=timezone(-timedelta(hours=8))),
+    datetime(2025, 1, 5, 10, 30),
+])
+def test_cursor_round_trip(timestamp):
+    token = encode_cursor(timestamp, 42)
+    assert '=' not in token
+    decoded, row_id = decode_cursor(token)
+    assert (decoded, row_id) == (timestamp, 42)
+    assert decoded.utcoffset() == timestamp.utcoffset()
+
+
+def b64(text):
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('token', [
+    '!!!', 'a', b64('no separator'), b64('2025-01-05T10:00:00|x'), b64('yesterday|5'),
+    b64('2025-13-05T10:00:00|5'), base64.urlsafe_b64encode(b'\xff\xfe|1').decode(),
+])
+def test_malformed_cursor(token):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(token)
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, DEFAULT_PAGE_SIZE), ('', DEFAULT_PAGE_SIZE), ('1', 1), ('0', 1), ('-5', 1),
+    ('200', 200), (str(MAX_PAGE_SIZE + 1), MAX_PAGE_SIZE), ('100000', MAX_PAGE_SIZE),
+])
+def test_page_size_clamped(value, expected):
+    assert page_size(value) == expected
+
+
+@pytest.mark.parametrize('value', ['abc', '1.5', '10x'])
+def test_page_size_invalid(value):
+    with pytest.raises(ValueError, match='Invalid limit'):
+        page_size(value)
+
+
+@pytest.mark.parametrize('path', ['/api/history', '/api/webhook-activity'])
+@pytest.mark.parametrize('query, message', [
+    ('cursor=!!!', 'Invalid cursor'),
+    ('cursor=' + b64('2025-01-05|x'), 'Invalid cursor'),
+    ('limit=abc', 'Invalid limit'),
+    ('date_to=05/01/2025', 'Invalid date_to'),
+])
+def test_bad_arguments_are_400(client, path, query, message):
+    # Rejected before any database connection is attempted
+    response = client.get(f'{path}?{query}')
+    assert response.status_code == 400
+    assert message in response.get_json()['error']
+
+
+@pytest.fixture
+def page_rows(db_conn):
+    cursor = db_conn.cursor()
+    cursor.execute("SET TimeZone = 'UTC'")
+    cursor.execute("""
+        CREATE TEMP TABLE page_rows (id serial PRIMARY KEY, started_at timestamptz, status text);
+        CREATE INDEX ON page_rows (started_at, id)
+    """)
+    yield cursor
+    cursor.execute("DROP TABLE page_rows")
+
+
+def insert(cursor, rows):
+    cursor.executemany("INSERT INTO page_rows (started_at, status) VALUES (%s, %s)", rows)
+
+
+def walk(cursor, limit, **kwargs):
+    """Every page in order, following next_cursor as a client would."""
+    pages, token = [], None
+    filters = kwargs.pop('filters', [])
+    while True:
+        after = decode_cursor(token) if token else None
+        rows, token = fetch_page(cursor, 'page_rows', COLUMNS, 'started_at', filters,
+                                 after=after, limit=limit, **kwargs)
+        pages.append(rows)
+        if token is None:
+            return pages
+        assert len(rows) == limit
+
+
+def test_ties_are_neither_skipped_nor_repeated(page_rows):
+    base = datetime(2025, 1, 5, 12, tzinfo=UTC)
+    # Runs of identical started_at longer than a page, plus NULLs that are never listed
+    insert(page_rows, [(base + timedelta(minutes=i // 7), 'success' if i % 3 else 'failed') for i in range(50)])
+    insert(page_rows, [(None, 'running')] * 3)
+    page_rows.execute("SELECT id, started_at, status FROM page_rows WHERE started_at IS NOT NULL "
+                      "ORDER BY started_at DESC, id DESC")
+    expected = page_rows.fetchall()
+
+    for limit in (1, 3, 7, 10, 49, 50, 51):
+        pages = walk(page_rows, limit)
+        assert [row for page in pages for row in page] == expected, limit
+        assert len(pages) == max(1, -(-len(expected) // limit))
+
+
+def test_filters(page_rows):
+    base = datetime(2025, 1, 5, 12, tzinfo=UTC)
+    insert(page_rows, [(base, 'success' if i % 3 else 'failed') for i in range(20)])
+    failed = [row for page in walk(page_rows, 2, filters=[('status', 'failed'), ('id', None)]) for row in page]
+    assert len(failed) == 7 and {row[2] for row in failed} == {'failed'}
+
+
+def test_date_range_is_inclusive(page_rows):
+    day = date(2025, 1, 5)
+    midnight = datetime(2025, 1, 5, tzinfo=UTC)
+    insert(page_rows, [
+        (midnight - timedelta(microseconds=1), 'before'),
+        (midnight, 'first'),
+        (midnight + timedelta(hours=23, minutes=59, seconds=59, microseconds=999999), 'last'),
+        (midnight + timedelta(days=1), 'after'),
+    ])
+    rows = [row for page in walk(page_rows, 1, date_from=day, date_to=day) for row in page]
+    assert [row[2] for row in rows] == ['last', 'first']
+
+    rows = [row for page in walk(page_rows, 10, date_to=day) for row in page]
+    assert [row[2] for row in rows] == ['last', 'first', 'before']
+
+
+def test_cursor_from_page_round_trips_through_database(page_rows):
+    offset = timezone(timedelta(hours=5, minutes=30))
+    insert(page_rows, [(datetime(2025, 1, 5, 10, 0, 0, 500, tzinfo=offset), 'a')] * 3)
+    rows, token = fetch_page(page_rows, 'page_rows', COLUMNS, 'started_at', [], limit=1)
+    assert decode_cursor(token) == (rows[0][1], rows[0][0])
+    rows, token = fetch_page(page_rows, 'page_rows', COLUMNS, 'started_at', [], after=decode_cursor(token), limit=5)
+    assert [row[0] for row in rows] == [2, 1] and token is None
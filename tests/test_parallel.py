@@ -0,0 +1,141 @@
+"""Record-aligned splitting and parallel transform equivalence."""
+import csv
+import io
+from datetime import date, datetime, timezone
+
+import pytest
+
+from etl import parallel
+from etl.transformer import METADATA_COLUMNS, CSVTransformer
+
+ROWS = [
+    ['Id', 'Notes', 'Edit Date', 'Status'],
+    ['1', 'plain', '2025-01-02T10:00:00', 'Open'],
+    ['2', 'line one\nline "two"\n\nline four', '2025-01-03T10:00:00', 'Open'],
+    ['3', '"quoted", with comma\r\nand CRLF inside', '2024-12-30T10:00:00', 'Open'],
+    ['4', '', '2025-01-04T10:00:00', ''],
+    ['5', 'bad offset', '2025-01-01T00:00:00+99:00', 'Open'],
+    ['6', '""', '2025-01-05T10:00:00', 'Closed'],
+    ['7', 'x' * 40 + '\n' + '"' * 6, '2025-01-06T10:00:00', 'Open'],
+]
+
+MAPPING = {
+    'target_object': 'notes',
+    'natural_key': [],
+    'columns': {'Id': 'id', 'Notes': 'notes', 'Edit Date': 'edited_at', 'Status': 'status'},
+    'coercions': {'edited_at': 'timestamptz', 'notes': 'trim'},
+    'null_like': ['', 'NULL'],
+    'reject_rules': ['status is null', "status = 'Closed'"],
+    'watermark': 'edited_at',
+    'load_mode': 'append',
+}
+
+
+def csv_bytes(rows, newline='\n'):
+    buffer = io.StringIO(newline='')
+    csv.writer(buffer, lineterminator=newline).writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+def split_and_parse(path, chunk_bytes):
+    """Records of each chunk, parsed on its own, plus the ranges."""
+    header_end, ranges = parallel.split_records(path, chunk_bytes)
+    with open(path, 'rb') as f:
+        data = f.read()
+    records = []
+    for start, end in ranges:
+        records.extend(csv.reader(io.StringIO(data[start:end].decode('utf-8'), newline='')))
+    return header_end, ranges, records
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+def test_split_every_chunk_size(tmp_path, newline):
+    path = tmp_path / 'input.csv'
+    data = csv_bytes(ROWS * 3, newline)
+    path.write_bytes(data)
+    expected = list(csv.reader(io.StringIO(data.decode('utf-8'), newline='')))
+
+    # Every chunk size puts boundaries inside quoted fields, "" escapes and CRLFs
+    for chunk_bytes in range(1, len(data) + 2):
+        header_end, ranges, records = split_and_parse(str(path), chunk_bytes)
+        assert data[:header_end] == csv_bytes(ROWS[:1], newline)
+        assert ranges[0][0] == header_end and ranges[-1][1] == len(data)
+        assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+        assert records == expected[1:], chunk_bytes
+
+
+def test_split_smaller_than_one_chunk(tmp_path):
+    path = tmp_path / 'input.csv'
+    data = csv_bytes(ROWS)
+    path.write_bytes(data)
+    header_end, ranges = parallel.split_records(str(path), 1024 * 1024)
+    assert ranges == [(header_end, len(data))]
+
+
+def test_split_without_trailing_newline(tmp_path):
+    path = tmp_path / 'input.csv'
+    path.write_bytes(csv_bytes(ROWS)[:-1])
+    header_end, ranges, records = split_and_parse(str(path), 7)
+    assert records == ROWS[1:]
+
+
+@pytest.mark.parametrize('content, expected', [(b'', (0, [])), (b'A,B\n', (4, []))])
+def test_split_empty_and_header_only(tmp_path, content, expected):
+    path = tmp_path / 'input.csv'
+    path.write_bytes(content)
+    assert parallel.split_records(str(path), 16) == expected
+
+
+def test_default_workers(monkeypatch):
+    monkeypatch.delenv('ETL_TRANSFORM_WORKERS', raising=False)
+    assert parallel.default_workers() == 1
+    monkeypatch.setenv('ETL_TRANSFORM_WORKERS', '3')
+    assert parallel.default_workers() == 3
+    assert parallel.pool_context().get_start_method() == 'spawn'
+
+
+def run_transform(tmp_path, source, label, **kwargs):
+    transformer = CSVTransformer(MAPPING, rejects_path=str(tmp_path / f'rejects_{label}.csv'),
+                                 watermark=datetime(2025, 1, 2, 10, tzinfo=timezone.utc), **kwargs)
+    output = tmp_path / f'out_{label}.csv'
+    row_count, errors = transformer.transform_csv(source, str(output), date(2025, 1, 7), 'input.csv', 'Notes')
+
+    # _extract_ts is the time of the run; everything else must match byte for byte
+    extract_ts = len(transformer.mapping.target_columns) + METADATA_COLUMNS.index('_extract_ts')
+    lines = []
+    for row in csv.reader(io.StringIO(output.read_text(encoding='utf-8'), newline='')):
+        del row[extract_ts]
+        lines.append(row)
+
+    rejects = tmp_path / f'rejects_{label}.csv'
+    return {
+        'output': csv_bytes(lines),
+        'row_count': row_count,
+        'errors': errors,
+        'records_read': transformer.records_read,
+        'rejected': transformer.rejected_count,
+        'rejects_file': rejects.read_bytes() if rejects.exists() else None,
+        'watermark_skipped': transformer.watermark_skipped,
+        'watermark_max': transformer.watermark_max,
+        'parallel': transformer.uses_parallel(source),
+    }
+
+
+@pytest.mark.parametrize('chunk_bytes', [64, 200, 1024 * 1024])
+def test_parallel_matches_single_process(tmp_path, chunk_bytes):
+    source = tmp_path / 'input.csv'
+    source.write_bytes(csv_bytes(ROWS[:1] + ROWS[1:] * 5, '\r\n'))
+
+    single = run_transform(tmp_path, str(source), 'single', workers=1)
+    multi = run_transform(tmp_path, str(source), 'multi', workers=2,
+                          chunk_bytes=chunk_bytes, min_parallel_bytes=0)
+
+    assert (single.pop('parallel'), multi.pop('parallel')) == (False, True)
+    assert multi == single
+
+    # Sanity check that every counter is exercised
+    assert single['errors'] == [f"Row {6 + 7 * n}: offset must be a timedelta strictly between "
+                                f"-timedelta(hours=24) and timedelta(hours=24)." for n in range(5)]
+    assert (single['row_count'], single['rejected'], single['watermark_skipped']) == (15, 10, 5)
+    assert single['records_read'] == 35
+    assert single['watermark_max'] == datetime(2025, 1, 6, 10, tzinfo=timezone.utc)
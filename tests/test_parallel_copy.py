@@ -0,0 +1,54 @@
+"""Multi-connection COPY: record-aligned blocks and slices outside the pool."""
+import pytest
+from psycopg2 import sql
+
+from etl import db_connection
+from etl.db_connection import ConnectionPool, pooled_connection
+from etl.parallel_copy import parallel_copy, record_blocks
+
+CSV = b'id,note\n1,plain\n2,"two\nlines"\n3,"quoted ""x"""\n4,last\n'
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 5, 7, len(CSV)])
+@pytest.mark.parametrize('block_bytes', [1, 10, 1024])
+def test_blocks_end_on_records(chunk_size, block_bytes):
+    blocks = list(record_blocks(chunked(CSV, chunk_size), block_bytes=block_bytes))
+    assert b''.join(blocks) == CSV[len(b'id,note\n'):]
+    for block in blocks:
+        # A quoted newline never ends a block
+        assert block.endswith(b'\n') and block.count(b'"') % 2 == 0
+
+
+def test_blocks_keep_header_and_unterminated_tail():
+    data = b'id\n1\n2'
+    assert b''.join(record_blocks([data], skip_header=False)) == data
+    assert list(record_blocks([b'id\n'])) == []
+
+
+@pytest.fixture
+def tiny_pool(db_conn, monkeypatch):
+    """A one-connection shared pool, so a slice borrowing from it would time out."""
+    pool = ConnectionPool(max_size=1, acquire_timeout=1)
+    monkeypatch.setattr(db_connection, '_pool', pool)
+    yield pool
+    pool.close_all()
+
+
+def test_slices_do_not_wait_on_the_pool(db_conn, schema, tiny_pool):
+    table = sql.Identifier(schema, 'copied')
+    db_conn.cursor().execute(sql.SQL("CREATE TABLE {} (id int, note text)").format(table))
+    copy_query = sql.SQL("COPY {} (id, note) FROM STDIN WITH (FORMAT csv)").format(table).as_string(db_conn)
+
+    # The load's own connection holds the only pooled slot
+    with pooled_connection(autocommit=True):
+        rows = parallel_copy(copy_query, record_blocks(chunked(CSV, 3), block_bytes=1), workers=3)
+
+    assert rows == 4
+    cursor = db_conn.cursor()
+    cursor.execute(sql.SQL("SELECT id, note FROM {} ORDER BY id").format(table))
+    assert cursor.fetchall() == [(1, 'plain'), (2, 'two\nlines'), (3, 'quoted "x"'), (4, 'last')]
+    assert tiny_pool.metrics()['wait_timeouts'] == 0
@@ -0,0 +1,204 @@
+"""Partition helpers; creation, migration and swap_snapshot need a real database (skipped without one)."""
+from datetime import date
+
+import pytest
+from psycopg2 import sql
+
+from etl.partitions import (add_bounds_check, default_granularity, ensure_partition, migrate_to_partitioned,
+                            partition_bounds, partition_name, swap_snapshot)
+
+DAY = date(2025, 1, 5)
+OTHER_DAY = date(2025, 1, 6)
+
+
+def create_table(cursor, schema, partitioned):
+    cursor.execute(sql.SQL("""
+        CREATE TABLE {}.snap (
+            id text NOT NULL,
+            value text,
+            _partition_date date NOT NULL,
+            PRIMARY KEY (id, _partition_date)
+        ) {}
+    """).format(sql.Identifier(schema),
+                sql.SQL("PARTITION BY RANGE (_partition_date)" if partitioned else "")))
+    return f"{schema}.snap"
+
+
+def insert(cursor, table_name, day, ids, value='old'):
+    cursor.execute(sql.SQL("INSERT INTO {} SELECT i, %s, %s FROM unnest(%s::text[]) i").format(
+        sql.Identifier(*table_name.split('.'))
+    ), (value, day, list(ids)))
+
+
+def make_shadow(cursor, schema, day, ids, suffix='1'):
+    """Shadow table prepared the way BulkLoader._load_snapshot does."""
+    shadow = (schema, f"snap_shadow_{suffix}")
+    cursor.execute(sql.SQL("CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)").format(
+        sql.Identifier(*shadow), sql.Identifier(schema, 'snap')
+    ))
+    insert(cursor, '.'.join(shadow), day, ids, value='new')
+    cursor.execute(sql.SQL("ALTER TABLE {} ADD PRIMARY KEY (id, _partition_date)").format(sql.Identifier(*shadow)))
+    add_bounds_check(cursor, shadow, day)
+    return shadow
+
+
+def counts(cursor, table_name):
+    cursor.execute(sql.SQL("SELECT _partition_date, value, COUNT(*) FROM {} GROUP BY 1, 2 ORDER BY 1, 2").format(
+        sql.Identifier(*table_name.split('.'))
+    ))
+    return cursor.fetchall()
+
+
+def constraints(cursor, schema, table):
+    cursor.execute("""
+        SELECT conname, contype FROM pg_constraint
+        WHERE conrelid = to_regclass(%s) ORDER BY conname
+    """, (f"{schema}.{table}",))
+    return cursor.fetchall()
+
+
+def exists(cursor, schema, table):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (f"{schema}.{table}",))
+    return cursor.fetchone()[0]
+
+
+def test_daily_partition_is_swapped(db_conn, schema):
+    cursor = db_conn.cursor()
+    table_name = create_table(cursor, schema, partitioned=True)
+    for day in (DAY, OTHER_DAY):
+        ensure_partition(cursor, table_name, day, 'day')
+    insert(cursor, table_name, DAY, ['a', 'b', 'c'])
+    insert(cursor, table_name, OTHER_DAY, ['a', 'b'])
+
+    shadow = make_shadow(cursor, schema, DAY, ['a', 'x'])
+    assert swap_snapshot(cursor, table_name, shadow, DAY) == ('attached', 3)
+
+    assert counts(cursor, table_name) == [(DAY, 'new', 2), (OTHER_DAY, 'old', 2)]
+    assert not exists(cursor, *shadow)
+    assert constraints(cursor, schema, 'snap_p20250105') == [('snap_p20250105_pkey', 'p')]
+    assert constraints(cursor, schema, 'snap_p20250106') == [('snap_p20250106_pkey', 'p')]
+
+    # The attached partition can itself be replaced again
+    shadow = make_shadow(cursor, schema, DAY, ['y'], suffix='2')
+    assert swap_snapshot(cursor, table_name, shadow, DAY) == ('attached', 2)
+    assert counts(cursor, table_name) == [(DAY, 'new', 1), (OTHER_DAY, 'old', 2)]
+    assert constraints(cursor, schema, 'snap_p20250105') == [('snap_p20250105_pkey', 'p')]
+
+
+def test_first_snapshot_of_a_day_is_attached(db_conn, schema):
+    cursor = db_conn.cursor()
+    table_name = create_table(cursor, schema, partitioned=True)
+    ensure_partition(cursor, table_name, OTHER_DAY, 'day')
+    insert(cursor, table_name, OTHER_DAY, ['a'])
+
+    shadow = make_shadow(cursor, schema, DAY, ['a', 'b'])
+    assert swap_snapshot(cursor, table_name, shadow, DAY) == ('attached', 0)
+    assert counts(cursor, table_name) == [(DAY, 'new', 2), (OTHER_DAY, 'old', 1)]
+    assert constraints(cursor, schema, 'snap_p20250105') == [('snap_p20250105_pkey', 'p')]
+
+
+def test_day_inside_monthly_partition_is_replaced(db_conn, schema):
+    cursor = db_conn.cursor()
+    table_name = create_table(cursor, schema, partitioned=True)
+    ensure_partition(cursor, table_name, DAY, 'month')
+    insert(cursor, table_name, DAY, ['a', 'b', 'c'])
+    insert(cursor, table_name, OTHER_DAY, ['a', 'b'])
+
+    shadow = make_shadow(cursor, schema, DAY, ['a', 'x'])
+    assert swap_snapshot(cursor, table_name, shadow, DAY) == ('replaced', 3)
+
+    assert counts(cursor, table_name) == [(DAY, 'new', 2), (OTHER_DAY, 'old', 2)]
+    # The savepoint rollback left the monthly partition and the shadow as they were
+    assert constraints(cursor, schema, 'snap_p202501') == [('snap_p202501_pkey', 'p')]
+    assert exists(cursor, *shadow) and not exists(cursor, schema, 'snap_p20250105')
+    cursor.execute("SELECT COUNT(*) FROM pg_inherits WHERE inhparent = %s::regclass", (table_name,))
+    assert cursor.fetchone()[0] == 1
+
+
+def test_unpartitioned_table_is_replaced(db_conn, schema):
+    cursor = db_conn.cursor()
+    table_name = create_table(cursor, schema, partitioned=False)
+    insert(cursor, table_name, DAY, ['a', 'b', 'c'])
+    insert(cursor, table_name, OTHER_DAY, ['a', 'b'])
+
+    shadow = make_shadow(cursor, schema, DAY, ['a', 'x'])
+    assert swap_snapshot(cursor, table_name, shadow, DAY) == ('replaced', 3)
+
+    assert counts(cursor, table_name) == [(DAY, 'new', 2), (OTHER_DAY, 'old', 2)]
+    assert constraints(cursor, schema, 'snap') == [('snap_pkey', 'p')]
+
+
+def test_failed_swap_keeps_old_snapshot(db_conn, schema):
+    cursor = db_conn.cursor()
+    table_name = create_table(cursor, schema, partitioned=True)
+    ensure_partition(cursor, table_name, DAY, 'day')
+    insert(cursor, table_name, DAY, ['a', 'b'])
+
+    # Without its bounds CHECK the swap fails after the old partition was detached
+    shadow = make_shadow(cursor, schema, DAY, ['x'])
+    cursor.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT {}").format(
+        sql.Identifier(*shadow), sql.Identifier(f"{shadow[1]}_bounds")
+    ))
+    with pytest.raises(Exception):
+        swap_snapshot(cursor, table_name, shadow, DAY)
+
+    assert counts(cursor, table_name) == [(DAY, 'old', 2)]
+    assert constraints(cursor, schema, 'snap_p20250105') == [('snap_p20250105_pkey', 'p')]
+    assert exists(cursor, *shadow)
+
+
+@pytest.mark.parametrize('day, granularity, bounds, name', [
+    ('2025-01-05', 'day', (date(2025, 1, 5), date(2025, 1, 6)), 'contacts_p20250105'),
+    ('2025-01-31', 'day', (date(2025, 1, 31), date(2025, 2, 1)), 'contacts_p20250131'),
+    ('2025-01-05', 'month', (date(2025, 1, 1), date(2025, 2, 1)), 'contacts_p202501'),
+    (date(2025, 12, 31), 'month', (date(2025, 12, 1), date(2026, 1, 1)), 'contacts_p202512'),
+])
+def test_partition_bounds_and_names(day, granularity, bounds, name):
+    assert partition_bounds(day, granularity) == bounds
+    assert partition_name('staging.contacts', bounds[0], granularity) == ('staging', name)
+
+
+def test_granularity_setting(monkeypatch):
+    monkeypatch.delenv('ETL_PARTITION_GRANULARITY', raising=False)
+    assert default_granularity() == 'month'
+    monkeypatch.setenv('ETL_PARTITION_GRANULARITY', 'Day')
+    assert default_granularity() == 'day'
+    monkeypatch.setenv('ETL_PARTITION_GRANULARITY', 'week')
+    with pytest.raises(ValueError, match='ETL_PARTITION_GRANULARITY'):
+        default_granularity()
+
+
+def test_partition_is_created_once_per_month(db_conn, schema):
+    cursor = db_conn.cursor()
+    table_name = create_table(cursor, schema, partitioned=True)
+    assert ensure_partition(cursor, table_name, DAY, 'month')
+    assert ensure_partition(cursor, table_name, OTHER_DAY, 'month')
+    insert(cursor, table_name, DAY, ['a'])
+    insert(cursor, table_name, OTHER_DAY, ['a'])
+
+    assert exists(cursor, schema, 'snap_p202501')
+    cursor.execute(sql.SQL("SELECT tableoid::regclass::text, COUNT(*) FROM {} GROUP BY 1").format(
+        sql.Identifier(schema, 'snap')
+    ))
+    assert cursor.fetchall() == [(f'{schema}.snap_p202501', 2)]
+
+
+def test_plain_table_needs_no_partition(db_conn, schema):
+    cursor = db_conn.cursor()
+    assert ensure_partition(cursor, create_table(cursor, schema, partitioned=False), DAY, 'month') is False
+    assert not exists(cursor, schema, 'snap_p202501')
+
+
+@pytest.mark.parametrize('keep_legacy', [False, True])
+def test_plain_table_is_migrated_with_its_rows(db_conn, schema, keep_legacy):
+    cursor = db_conn.cursor()
+    table_name = create_table(cursor, schema, partitioned=False)
+    insert(cursor, table_name, DAY, ['a', 'b'])
+    insert(cursor, table_name, date(2025, 3, 2), ['a'])
+
+    assert migrate_to_partitioned(cursor, table_name, 'month', keep_legacy) == ['snap_p202501', 'snap_p202503']
+    assert counts(cursor, table_name) == [(DAY, 'old', 2), (date(2025, 3, 2), 'old', 1)]
+    assert constraints(cursor, schema, 'snap') == [('snap_pkey', 'p')]
+    assert exists(cursor, schema, 'snap_legacy') is keep_legacy
+    # Already partitioned: nothing to do
+    assert migrate_to_partitioned(cursor, table_name, 'month') == []
@@ -0,0 +1,92 @@
+"""FusedPipeline: one pass feeds QA and transform; only valid files produce output."""
+import tempfile
+from datetime import date
+
+import pytest
+
+from etl import pipeline as pipeline_module
+from etl.pipeline import FusedPipeline
+from etl.transformer import CSVTransformer
+from etl.validator import QAValidator
+
+MAPPING = {
+    'target_object': 'accounts',
+    'natural_key': ['account_sfid'],
+    'columns': {'Account ID': 'account_sfid', 'Account Name': 'name', 'Active': 'active'},
+    'coercions': {'name': 'trim', 'active': 'boolean'},
+}
+DAY = date(2025, 1, 5)
+
+
+@pytest.fixture
+def spools(monkeypatch):
+    """Spool files the pipeline creates, kept for inspection."""
+    created = []
+    original = tempfile.SpooledTemporaryFile
+
+    def spooled(*args, **kwargs):
+        spool = original(*args, **kwargs)
+        created.append(spool)
+        return spool
+    monkeypatch.setattr(pipeline_module.tempfile, 'SpooledTemporaryFile', spooled)
+    return created
+
+
+def run(path, **kwargs):
+    fused = FusedPipeline(QAValidator(MAPPING), CSVTransformer(MAPPING, workers=1), **kwargs)
+    is_valid, errors, stats = fused.run(path, DAY, 'accounts.csv', 'Accounts')
+    return fused, is_valid, errors, stats
+
+
+def output_lines(fused):
+    with fused.output as stream:
+        return stream.read().decode('utf-8').splitlines()
+
+
+@pytest.mark.parametrize('spool_max_bytes, on_disk', [(1024 * 1024, False), (64, True)])
+def test_valid_file_streams_the_spooled_output(write_csv, spools, spool_max_bytes, on_disk):
+    rows = [['Account ID', 'Account Name', 'Active']] + [[f'A{i}', f' Acme {i} ', 'yes'] for i in range(20)]
+    fused, is_valid, errors, stats = run(write_csv(rows), spool_max_bytes=spool_max_bytes)
+
+    assert is_valid and errors == [] and stats['total_rows'] == 20
+    assert fused.row_count == 20
+    assert spools[0]._rolled is on_disk
+
+    lines = output_lines(fused)
+    assert lines[0].startswith('account_sfid,name,active,_partition_date,_file_name')
+    assert lines[1].startswith('A0,Acme 0,True,2025-01-05,accounts.csv,Accounts,')
+    assert len(lines) == 21
+    assert spools[0].closed
+
+
+def test_failing_file_produces_no_output(write_csv, spools):
+    rows = [['Account ID', 'Account Name', 'Active'], ['A1', 'Acme', 'yes'], ['A1', 'Acme again', 'no']]
+    fused, is_valid, errors, _ = run(write_csv(rows))
+
+    assert not is_valid
+    assert errors == ["Duplicate key {'account_sfid': 'A1'}: 2 occurrences"]
+    # Every row was still transformed in the same pass, then discarded
+    assert fused.row_count == 2
+    assert fused.output is None and spools[0].closed
+
+
+def test_header_mismatch_skips_the_transform(write_csv, spools):
+    rows = [['Account ID', 'Name'], ['A1', 'Acme']]
+    fused, is_valid, errors, stats = run(write_csv(rows))
+
+    assert not is_valid and errors
+    assert stats['total_rows'] == 1
+    assert fused.row_count == 0 and spools == [] and fused.output is None
+
+
+def test_transform_failure_closes_the_spool(write_csv, spools, monkeypatch):
+    def broken(*args, **kwargs):
+        yield b'header\n'
+        raise RuntimeError('transform blew up')
+    rows = [['Account ID', 'Account Name', 'Active'], ['A1', 'Acme', 'yes']]
+    fused = FusedPipeline(QAValidator(MAPPING), CSVTransformer(MAPPING, workers=1))
+    monkeypatch.setattr(fused.transformer, 'stream_rows', broken)
+
+    with pytest.raises(RuntimeError, match='transform blew up'):
+        fused.run(write_csv(rows), DAY, 'accounts.csv', 'Accounts')
+    assert spools[0].closed
@@ -0,0 +1,105 @@
+"""ProgressReporter: coalesced background writes that never reopen a finished load (needs a database)."""
+import psycopg2
+import pytest
+
+from etl import progress as progress_module
+from etl.progress import ProgressReporter
+
+
+@pytest.fixture
+def loads(db_conn):
+    """Create running load_history rows; returns a reader of (stage, percent, status) per id."""
+    cursor = db_conn.cursor()
+    created = []
+
+    def create():
+        cursor.execute("""
+            INSERT INTO load_history (load_date, target_table, file_name, mapping_file, status,
+                                      current_stage, progress_percent, started_at)
+            VALUES ('2025-01-05', 'staging.contacts', 'progress_test.csv', 'contacts', 'running',
+                    'Starting', 0, NOW())
+            RETURNING id
+        """)
+        created.append(cursor.fetchone()[0])
+        return created[-1]
+
+    def state(load_id):
+        cursor.execute("SELECT current_stage, progress_percent, status FROM load_history WHERE id = %s",
+                       (load_id,))
+        return cursor.fetchone()
+
+    yield create, state
+    cursor.execute("DELETE FROM load_history WHERE id = ANY(%s)", (created,))
+
+
+@pytest.fixture
+def reporter():
+    # Long interval: the background thread flushes once, then waits
+    reporter = ProgressReporter(flush_interval=60)
+    yield reporter
+    reporter.close()
+
+
+def test_updates_coalesce_to_the_latest_value(loads, reporter, monkeypatch):
+    create, state = loads
+    first, second = create(), create()
+    monkeypatch.setattr(reporter, '_start', lambda: None)
+
+    for percent in range(10, 60, 10):
+        reporter.update(first, f'Transforming {percent}%', percent)
+    reporter.update(second, 'Validating', 5)
+    assert state(first) == ('Starting', 0, 'running')
+
+    statements = []
+    original = progress_module.pooled_connection
+
+    def counting(*args, **kwargs):
+        statements.append(1)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(progress_module, 'pooled_connection', counting)
+    reporter.flush()
+
+    assert len(statements) == 1
+    assert state(first) == ('Transforming 50%', 50, 'running')
+    assert state(second) == ('Validating', 5, 'running')
+
+
+def test_buffered_update_never_reopens_a_finished_load(loads, reporter, monkeypatch):
+    create, state = loads
+    load_id = create()
+    monkeypatch.setattr(reporter, '_start', lambda: None)
+
+    reporter.update(load_id, 'Loading', 80)
+    reporter.complete(load_id, 'Complete', 100, 'success')
+    # A straggler from another thread after completion
+    reporter.update(load_id, 'Counting rows', 85)
+    reporter.flush()
+    assert state(load_id) == ('Complete', 100, 'success')
+
+
+def test_failed_flush_keeps_values_unless_newer_arrived(loads, reporter, monkeypatch):
+    create, state = loads
+    kept, replaced = create(), create()
+    monkeypatch.setattr(reporter, '_start', lambda: None)
+    reporter.update(kept, 'Loading', 60)
+    reporter.update(replaced, 'Loading', 60)
+
+    def broken(*args, **kwargs):
+        # Something newer arrives while the write is failing
+        reporter.update(replaced, 'Merging', 70)
+        raise psycopg2.OperationalError('connection lost')
+    monkeypatch.setattr(progress_module, 'pooled_connection', broken)
+    reporter.flush()
+    monkeypatch.undo()
+
+    reporter.flush()
+    assert state(kept) == ('Loading', 60, 'running')
+    assert state(replaced) == ('Merging', 70, 'running')
+
+
+def test_background_thread_writes_without_an_explicit_flush(loads, reporter):
+    create, state = loads
+    load_id = create()
+    reporter.update(load_id, 'Validating', 20)
+    reporter._thread.join(timeout=0.5)
+    assert state(load_id) == ('Validating', 20, 'running')
@@ -0,0 +1,68 @@
+"""MappingRegistry: compiled once, re-parsed only when a file changes."""
+import os
+
+import pytest
+
+from etl.registry import MappingRegistry
+
+
+def write_mapping(directory, name, target, columns, mtime=None):
+    path = directory / f'{name}.yaml'
+    lines = [f'target_object: {target}', 'columns:'] + [f'  "{source}": {column}' for source, column in columns.items()]
+    path.write_text('\n'.join(lines) + '\n')
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def mappings(tmp_path):
+    write_mapping(tmp_path, 'contacts', 'contacts', {'Contact ID': 'contact_sfid', 'Email': 'email'}, mtime=10**18)
+    return tmp_path
+
+
+def test_lookups_share_one_compiled_mapping(mappings):
+    registry = MappingRegistry(str(mappings), reload_seconds=0)
+    first = registry.get('contacts')
+    assert registry.get('contacts') is first
+    assert first.target_table == 'staging.contacts' and first.path.endswith('contacts.yaml')
+    assert registry.names() == ['contacts']
+
+
+def test_changed_file_is_recompiled(mappings):
+    registry = MappingRegistry(str(mappings), reload_seconds=0)
+    before = registry.get('contacts')
+    write_mapping(mappings, 'contacts', 'contacts', {'Contact ID': 'contact_sfid', 'Phone': 'phone'}, mtime=2 * 10**18)
+
+    after = registry.get('contacts')
+    assert after is not before
+    assert after.target_columns == ['contact_sfid', 'phone']
+
+
+def test_directory_is_rechecked_only_after_reload_seconds(mappings):
+    registry = MappingRegistry(str(mappings), reload_seconds=3600)
+    registry.get('contacts')
+    write_mapping(mappings, 'forms', 'form_submission', {'Form ID': 'form_sfid'})
+    assert registry.names() == ['contacts']
+
+    registry.invalidate()
+    assert registry.names() == ['contacts', 'forms']
+
+
+def test_deleted_and_unknown_mappings(mappings):
+    registry = MappingRegistry(str(mappings), reload_seconds=0)
+    registry.get('contacts')
+    (mappings / 'contacts.yaml').unlink()
+
+    with pytest.raises(FileNotFoundError, match='Mapping file not found'):
+        registry.get('contacts')
+    assert registry.names() == []
+
+
+def test_broken_mapping_is_left_out_of_valid_mappings(mappings):
+    (mappings / 'broken.yaml').write_text('target_object: broken\nload_mode: sideways\ncolumns: {A: a}\n')
+    registry = MappingRegistry(str(mappings), reload_seconds=0)
+
+    with pytest.raises(ValueError):
+        registry.get('broken')
+    assert list(registry.valid_mappings()) == ['contacts']
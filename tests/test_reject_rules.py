@@ -0,0 +1,184 @@
+"""Reject rule parsing, row routing and agreement between QA and transform."""
+import csv
+from datetime import date
+
+import pytest
+
+from etl.pipeline import FusedPipeline
+from etl.registry import compile_mapping
+from etl.reject_rules import RejectRule, RejectSink, bind_rules, first_match, parse_reject_rules
+from etl.transformer import CSVTransformer
+from etl.validator import QAValidator
+
+MAPPING = {
+    'target_object': 'people',
+    'natural_key': ['id'],
+    'columns': {'Id': 'id', 'Name': 'name'},
+    'coercions': {'name': 'trim'},
+    'null_like': ['', 'NULL', 'N/A', 'n/a', 'null'],
+    'reject_rules': ['id is null'],
+}
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+@pytest.mark.parametrize('text, column, op, operand', [
+    ('id is null', 'id', 'is null', None),
+    ('id IS  NOT   NULL', 'id', 'is not null', None),
+    ("status = 'Closed'", 'status', '=', 'Closed'),
+    ('status = "Closed Won"', 'status', '=', 'Closed Won'),
+    ('status = Closed', 'status', '=', 'Closed'),
+    ("status != 'Open'", 'status', '!=', 'Open'),
+    ("status <> 'Open'", 'status', '!=', 'Open'),
+    ("status = ''", 'status', '=', ''),
+    ("status = 'it''s'", 'status', '=', "it''s"),
+])
+def test_parse(text, column, op, operand):
+    rule = RejectRule.parse(text)
+    assert (rule.column, rule.op, rule.operand, rule.text) == (column, op, operand, text)
+
+
+@pytest.mark.parametrize('text', ['', 'id', 'id is', 'id is null extra', 'id =', 'id > 3', 'is null'])
+def test_parse_rejects_malformed(text):
+    with pytest.raises(ValueError):
+        RejectRule.parse(text)
+
+
+@pytest.mark.parametrize('text, value, expected', [
+    ('id is null', None, True),
+    ('id is null', '', True),
+    ('id is null', 'x', False),
+    ('id is not null', None, False),
+    ('id is not null', 'x', True),
+    ("id = 'x'", 'x', True),
+    ("id = 'x'", 'X', False),
+    ("id = 'x'", None, False),
+    ("id != 'x'", 'y', True),
+    ("id != 'x'", 'x', False),
+    ("id != 'x'", None, True),
+    ("id <> 'x'", 'y', True),
+    ("flag = 'True'", True, True),
+])
+def test_matches(text, value, expected):
+    assert RejectRule.parse(text).matches(value) is expected
+
+
+def test_unknown_column():
+    with pytest.raises(ValueError, match="unknown column 'nope'"):
+        parse_reject_rules(['nope is null'], ['id', 'name'])
+    with pytest.raises(ValueError):
+        compile_mapping(dict(MAPPING, reject_rules=['nope is null']))
+    assert len(parse_reject_rules(['nope is null'])) == 1
+
+
+def test_first_match_order_and_missing_columns():
+    rules = parse_reject_rules(["name = 'x'", 'id is null', 'gone is null'])
+    checks = bind_rules(rules, ['id', 'name'])
+    assert checks[2][0] is None
+    assert first_match(checks, ['1', 'x']) is rules[0]
+    assert first_match(checks, [None, 'y']) is rules[1]
+    # An unbound column is always null
+    assert first_match(checks, ['1', 'y']) is rules[2]
+    assert first_match(bind_rules(rules[:2], ['id', 'name']), ['1', 'y']) is None
+
+
+def test_sink_contents(tmp_path):
+    sink = RejectSink(str(tmp_path / 'rejects.csv'))
+    sink.begin(['Id', 'Name'])
+    assert not sink.written
+    sink.write(3, 'id is null', ['', 'a'])
+    sink.write(7, "name = 'x'", ['9', 'x'])
+    sink.close()
+    assert sink.count == 2
+    assert read_rows(sink.path) == [
+        ['_row_number', '_reject_rule', 'Id', 'Name'],
+        ['3', 'id is null', '', 'a'],
+        ['7', "name = 'x'", '9', 'x'],
+    ]
+
+
+def test_transform_writes_sidecar(tmp_path, write_csv):
+    source = write_csv([['Id', 'Name'], ['1', ' a '], ['', 'b'], ['2', 'c'], ['NULL', 'd']])
+    rejects = str(tmp_path / 'rejects.csv')
+    transformer = CSVTransformer(MAPPING, workers=1, rejects_path=rejects)
+    output = str(tmp_path / 'out.csv')
+    row_count, errors = transformer.transform_csv(source, output, date(2025, 1, 2), 'input.csv', 'People')
+
+    assert (row_count, errors, transformer.rejected_count) == (2, [], 2)
+    assert transformer.rejects_file == rejects
+    assert read_rows(rejects) == [
+        ['_row_number', '_reject_rule', 'Id', 'Name'],
+        ['3', 'id is null', '', 'b'],
+        ['5', 'id is null', 'NULL', 'd'],
+    ]
+    assert [row[:2] for row in read_rows(output)[1:]] == [['1', 'a'], ['2', 'c']]
+
+
+def test_no_sidecar_without_rejects(tmp_path, write_csv):
+    source = write_csv([['Id', 'Name'], ['1', 'a']])
+    transformer = CSVTransformer(MAPPING, workers=1, rejects_path=str(tmp_path / 'rejects.csv'))
+    transformer.transform_csv(source, str(tmp_path / 'out.csv'), date(2025, 1, 2), 'input.csv', 'People')
+    assert transformer.rejects_file is None
+    assert not (tmp_path / 'rejects.csv').exists()
+
+
+@pytest.mark.parametrize('keys, loaded', [
+    # Mapping null_like values are rejected by both stages, not flagged as duplicates
+    (['n/a', 'n/a', 'x1'], 1),
+    (['', 'NULL', 'x1'], 1),
+])
+def test_validator_agrees_with_transformer(tmp_path, write_csv, keys, loaded):
+    source = write_csv([['Id', 'Name']] + [[key, 'n'] for key in keys])
+
+    is_valid, errors, stats = QAValidator(MAPPING).validate_file(source)
+    transformer = CSVTransformer(MAPPING, workers=1)
+    row_count, transform_errors = transformer.transform_csv(
+        source, str(tmp_path / 'out.csv'), date(2025, 1, 2), 'input.csv', 'People'
+    )
+
+    assert (is_valid, errors) == (True, [])
+    assert row_count == loaded and transform_errors == []
+    assert stats['rejected_rows'] == transformer.rejected_count
+    assert stats['total_rows'] - stats['rejected_rows'] == row_count
+
+
+def test_whitespace_key_is_not_rejected(tmp_path, write_csv):
+    # Not null-like and id has no trim: the row is loaded, so QA must not
+    # skip it as rejected (it still reports the blank key as missing)
+    source = write_csv([['Id', 'Name'], ['  ', 'n'], ['x1', 'n']])
+    is_valid, errors, stats = QAValidator(MAPPING).validate_file(source)
+    transformer = CSVTransformer(MAPPING, workers=1)
+    row_count, _ = transformer.transform_csv(source, str(tmp_path / 'out.csv'), date(2025, 1, 2),
+                                             'input.csv', 'People')
+    assert (stats['rejected_rows'], transformer.rejected_count, row_count) == (0, 0, 2)
+    assert errors == ["Row 2: Missing required field 'Id'"]
+
+
+def test_validator_rules_use_coerced_values(write_csv):
+    # The transform compares the coerced (trimmed) value, so QA must too
+    mapping = dict(MAPPING, reject_rules=["name = 'skip'"])
+    source = write_csv([['Id', 'Name'], ['1', ' skip '], ['1', 'keep']])
+    is_valid, errors, stats = QAValidator(mapping).validate_file(source)
+    assert (is_valid, stats['rejected_rows'], stats['duplicates']) == (True, 1, 0)
+
+
+def test_pipeline_copies_good_rows(tmp_path, write_csv, db_conn):
+    source = write_csv([['Id', 'Name'], ['1', 'a'], ['n/a', 'x'], ['2', 'b'], ['', 'y'], ['n/a', 'z']])
+    rejects = str(tmp_path / 'rejects.csv')
+    pipeline = FusedPipeline(QAValidator(MAPPING), CSVTransformer(MAPPING, workers=1, rejects_path=rejects))
+    is_valid, errors, stats = pipeline.run(source, date(2025, 1, 2), 'input.csv', 'People')
+
+    assert (is_valid, errors, stats['rejected_rows']) == (True, [], 3)
+    assert [row[0] for row in read_rows(rejects)[1:]] == ['3', '5', '6']
+
+    cursor = db_conn.cursor()
+    cursor.execute("CREATE TEMP TABLE people (id text PRIMARY KEY, name text, _partition_date date, "
+                   "_file_name text, _source_report text, _extract_ts timestamp, "
+                   "_mapping_version text, _raw_hash text)")
+    with pipeline.output as stream:
+        cursor.copy_expert(f"COPY people ({', '.join(stream.columns)}) FROM STDIN WITH CSV HEADER", stream)
+    cursor.execute("SELECT id, name FROM people ORDER BY id")
+    assert cursor.fetchall() == [('1', 'a'), ('2', 'b')]
@@ -0,0 +1,74 @@
+"""ChunkedCSVStream: read(size) over uneven chunks, compaction and close."""
+import random
+
+import pytest
+
+from etl import streaming
+from etl.streaming import ChunkedCSVStream
+
+DATA = bytes(range(256)) * 40
+
+
+def uneven_chunks(data, seed):
+    rng = random.Random(seed)
+    pos = 0
+    while pos < len(data):
+        size = rng.choice([0, 1, 7, 300, 4096])
+        yield data[pos:pos + size]
+        pos += size
+
+
+@pytest.mark.parametrize('read_size', [1, 5, 1000, 20000])
+def test_reads_return_the_stream_in_order(monkeypatch, read_size):
+    # Compact often so the offset bookkeeping is exercised
+    monkeypatch.setattr(streaming, 'COMPACT_BYTES', 64)
+    stream = ChunkedCSVStream(['id'], uneven_chunks(DATA, read_size))
+    parts = []
+    while True:
+        data = stream.read(read_size)
+        assert isinstance(data, bytes) and len(data) <= read_size
+        if not data:
+            break
+        parts.append(data)
+    assert b''.join(parts) == DATA
+    assert all(len(part) == read_size for part in parts[:-1])
+
+
+def test_rest_of_the_stream_after_partial_reads():
+    stream = ChunkedCSVStream(['id'], iter([b'id\n1\n', b'2\n3\n']))
+    assert stream.read(4) == b'id\n1'
+    assert stream.read() == b'\n2\n3\n'
+    assert stream.read(10) == b''
+
+    stream = ChunkedCSVStream(['id'], iter([b'id\n1\n', b'2\n3\n']))
+    assert stream.read(3) == b'id\n'
+    assert list(stream) == [b'1\n', b'2\n3\n']
+
+
+def test_buffer_is_compacted_once_mostly_consumed(monkeypatch):
+    monkeypatch.setattr(streaming, 'COMPACT_BYTES', 100)
+    stream = ChunkedCSVStream(['id'], iter([b'x' * 1000]))
+    stream.read(99)
+    assert stream._offset == 99
+    stream.read(400)
+    assert stream._offset == 499
+    # Past half of the buffer: the consumed prefix is dropped
+    stream.read(2)
+    assert stream._offset == 0 and len(stream._buffer) == 499
+
+
+def test_close_closes_the_chunks_once():
+    closed = []
+
+    def chunks():
+        try:
+            yield b'a'
+            yield b'b'
+        finally:
+            closed.append('chunks')
+
+    stream = ChunkedCSVStream(['id'], chunks(), on_close=lambda: closed.append('hook'))
+    with stream:
+        assert stream.read(1) == b'a'
+    stream.close()
+    assert closed == ['chunks', 'hook'] and stream.closed
@@ -0,0 +1,26 @@
+"""Manual upload form: bad input is answered with JSON errors."""
+import io
+
+
+def post(client, mapping):
+    return client.post('/upload', data={
+        'csv_file': (io.BytesIO(b'Id\n1\n'), 'contacts.csv'),
+        'mapping': mapping,
+        'partition_date': '2025-01-05',
+    })
+
+
+def test_unknown_mapping_lists_the_available_ones(client, app_module):
+    response = post(client, 'no_such_mapping')
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['success'] is False
+    assert body['available_mappings'] == app_module.registry.names()
+    assert 'contacts' in body['available_mappings']
+    assert body['error'].startswith("Unknown mapping 'no_such_mapping'. Available mappings: ")
+
+
+def test_missing_mapping_is_rejected(client):
+    response = post(client, '')
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'error': 'No mapping selected'}
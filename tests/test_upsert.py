@@ -0,0 +1,65 @@
+"""UPSERT load mode: ON CONFLICT merge on the primary key, delete+insert without one (needs a database)."""
+from types import SimpleNamespace
+
+import pytest
+from psycopg2 import sql
+
+from etl.loader import BulkLoader
+
+DAY = '2025-01-05'
+TABLES = {
+    'plain': "PRIMARY KEY (person_id, _partition_date)",
+    'partitioned': "PRIMARY KEY (person_id, _partition_date)) PARTITION BY RANGE (_partition_date",
+    'keyless': None,
+}
+
+
+@pytest.fixture(params=sorted(TABLES))
+def people(request, db_conn, schema, write_csv):
+    """A people table of each shape, and a function upserting (person_id, name) rows into it."""
+    table = f'{schema}.people'
+    constraint = TABLES[request.param]
+    db_conn.cursor().execute(sql.SQL("""
+        CREATE TABLE {} (
+            person_id text NOT NULL,
+            name text,
+            _file_name text,
+            _partition_date date NOT NULL,
+            _loaded_at timestamptz DEFAULT clock_timestamp()
+            {}
+        )
+    """).format(sql.Identifier(schema, 'people'), sql.SQL(f", {constraint}" if constraint else '')))
+    loader = BulkLoader(progress=SimpleNamespace(update=lambda *args: None))
+
+    def upsert(rows, file_name):
+        path = write_csv([['person_id', 'name', '_file_name', '_partition_date']]
+                         + [[key, name, file_name, DAY] for key, name in rows], name=file_name)
+        stats = {}
+        loaded = loader._load(db_conn.cursor(), path, table, DAY, file_name, 'people', -1, ['person_id'], stats)
+        return loaded, stats
+
+    def contents():
+        cursor = db_conn.cursor()
+        cursor.execute(sql.SQL("SELECT person_id, name, _loaded_at FROM {} ORDER BY person_id")
+                       .format(sql.Identifier(schema, 'people')))
+        return cursor.fetchall()
+    return upsert, contents
+
+
+def test_reload_updates_existing_keys_and_inserts_new_ones(people):
+    upsert, contents = people
+    assert upsert([('p1', 'Ann'), ('p2', 'Bob')], 'first.csv') == (2, {'inserted': 2, 'updated': 0})
+    before = {key: loaded_at for key, _, loaded_at in contents()}
+
+    assert upsert([('p2', 'Robert'), ('p3', 'Cy')], 'second.csv') == (2, {'inserted': 1, 'updated': 1})
+    after = contents()
+    assert [(key, name) for key, name, _ in after] == [('p1', 'Ann'), ('p2', 'Robert'), ('p3', 'Cy')]
+    # Updated rows are stamped again; untouched ones keep their load time
+    assert after[0][2] == before['p1'] and after[1][2] > before['p2']
+
+
+def test_identical_reload_counts_updates(people):
+    upsert, contents = people
+    upsert([('p1', 'Ann')], 'first.csv')
+    assert upsert([('p1', 'Ann')], 'first.csv') == (1, {'inserted': 0, 'updated': 1})
+    assert len(contents()) == 1
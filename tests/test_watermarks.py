@@ -0,0 +1,91 @@
+"""Watermarks: forward loads filter and advance, forced reloads and backfills do neither."""
+import uuid
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from etl.watermarks import WatermarkStore
+
+UTC = timezone.utc
+DAY = date(2025, 1, 10)
+HEADER = ['Job Applicant: ID', 'Job Applicant: Job Applicant ID', 'Candidate', 'Field / Event',
+          'Old Value', 'New Value', 'Edit Date']
+
+
+@pytest.fixture
+def table(db_conn):
+    """A target_table name of our own in etl_watermarks."""
+    name = f"test.{uuid.uuid4().hex}"
+    yield name
+    db_conn.cursor().execute("DELETE FROM etl_watermarks WHERE target_table = %s", (name,))
+
+
+def test_store_moves_forward_only(table):
+    store = WatermarkStore()
+    assert store.get(table, 'edited_at', DAY) is None
+
+    store.advance(table, 'edited_at', datetime(2025, 1, 9, 8, tzinfo=UTC), DAY)
+    store.advance(table, 'edited_at', datetime(2025, 1, 8, tzinfo=UTC), date(2025, 1, 11))
+    assert store.get(table, 'edited_at', DAY) == datetime(2025, 1, 9, 8, tzinfo=UTC)
+    assert store.get(table, 'edited_at', date(2025, 1, 11)) == datetime(2025, 1, 9, 8, tzinfo=UTC)
+
+
+def test_backfill_neither_reads_nor_moves_the_mark(table):
+    store = WatermarkStore()
+    store.advance(table, 'edited_at', datetime(2025, 1, 9, tzinfo=UTC), DAY)
+
+    assert store.get(table, 'edited_at', date(2025, 1, 3)) is None
+    store.advance(table, 'edited_at', datetime(2025, 2, 1, tzinfo=UTC), date(2025, 1, 3))
+    assert store.get(table, 'edited_at', DAY) == datetime(2025, 1, 9, tzinfo=UTC)
+
+
+class RecordingStore:
+    def __init__(self, mark):
+        self.mark = mark
+        self.reads = []
+        self.advances = []
+
+    def get(self, table, column, load_date):
+        self.reads.append(load_date)
+        return self.mark
+
+    def advance(self, table, column, value, load_date, load_id=None):
+        self.advances.append((value, load_date))
+
+
+@pytest.fixture
+def pipeline(app_module, app_dir, monkeypatch, write_csv):
+    """Run main.run_pipeline on a two-event history file with a mark between the events."""
+    monkeypatch.chdir(app_dir)
+    store = RecordingStore(datetime(2025, 1, 6, tzinfo=UTC))
+    monkeypatch.setattr(app_module, 'watermarks', store)
+    monkeypatch.setattr(app_module, 'update_progress', lambda *args: None)
+    monkeypatch.setattr(app_module, 'load_to_staging',
+                        lambda stream, *args: sum(1 for _ in stream.read().splitlines()) - 1)
+    path = write_csv([HEADER,
+                      ['a1', 'JA-1', 'Ann', 'Status', 'New', 'Screen', '1/5/2025 10:00 AM'],
+                      ['a2', 'JA-2', 'Bob', 'Status', 'New', 'Offer', '1/7/2025 10:00 AM']],
+                     name='history.csv')
+    mapping = app_module.registry.get('job_applicant_history_events')
+
+    def run(force):
+        is_valid, errors, loaded, _, _ = app_module.run_pipeline(
+            mapping, 'job_applicant_history_events', Path(path), 'history.csv', DAY, 1, force
+        )
+        assert is_valid, errors
+        return loaded
+    return run, store
+
+
+def test_forward_load_filters_and_advances(pipeline):
+    run, store = pipeline
+    assert run(force=False) == 1
+    assert store.reads == [DAY]
+    assert store.advances == [(datetime(2025, 1, 7, 10, tzinfo=UTC), DAY)]
+
+
+def test_forced_reload_loads_everything_and_keeps_the_mark(pipeline):
+    run, store = pipeline
+    assert run(force=True) == 2
+    assert store.reads == [] and store.advances == []
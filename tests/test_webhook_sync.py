@@ -0,0 +1,128 @@
+"""Synchronous webhook: attachments load concurrently, one at a time per staging table."""
+import base64
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+
+from etl.job_queue import TableSlots
+
+# Attachments are matched to a mapping by name prefix here instead of by header
+PREFIXES = {'contacts': 'contacts', 'forms': 'form_submission'}
+
+
+class Concurrency:
+    """Tracks how many loads run at once, overall and per table."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = {}
+        self.peak = {}
+        self.peak_total = 0
+
+    @contextmanager
+    def running(self, table):
+        with self.lock:
+            self.active[table] = self.active.get(table, 0) + 1
+            self.peak[table] = max(self.peak.get(table, 0), self.active[table])
+            self.peak_total = max(self.peak_total, sum(self.active.values()))
+        try:
+            time.sleep(0.1)
+            yield
+        finally:
+            with self.lock:
+                self.active[table] -= 1
+
+
+def test_table_slots_cap_each_table_separately():
+    slots = TableSlots(per_table=2)
+    concurrency = Concurrency()
+
+    def load(table):
+        with slots.hold(table), concurrency.running(table):
+            pass
+    threads = [threading.Thread(target=load, args=(table,)) for table in ['a'] * 4 + ['b'] * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert concurrency.peak == {'a': 2, 'b': 2} and concurrency.peak_total == 4
+
+
+@pytest.fixture
+def webhook(app_module, app_dir, monkeypatch):
+    """process_attachments_sync with loads, lookups and webhook_log writes stubbed out."""
+    monkeypatch.chdir(app_dir)
+    monkeypatch.setenv('ETL_WEBHOOK_WORKERS', '4')
+    concurrency = Concurrency()
+    logged = []
+
+    def process(filename, upload_path, mapping_name, partition_date, content_hash=None, force=False):
+        table = app_module.registry.get(mapping_name).target_table
+        with concurrency.running(table):
+            if 'broken' in filename:
+                raise ValueError('QA validation failed')
+            return 101, 3, table
+
+    class Cursor:
+        def execute(self, query, params):
+            logged.append(params)
+
+        def close(self):
+            pass
+
+    class Connection:
+        def cursor(self):
+            return Cursor()
+
+        def commit(self):
+            pass
+
+    def detect(path, name):
+        mapping = PREFIXES.get(name.split('_')[0])
+        return mapping, None if mapping else 'no match'
+    monkeypatch.setattr(app_module, 'detect_mapping', detect)
+    monkeypatch.setattr(app_module, 'process_csv_attachment', process)
+    monkeypatch.setattr(app_module.processed_files, 'lookup', lambda *args: None)
+    monkeypatch.setattr(app_module, 'pooled_connection', contextmanager(lambda: (yield Connection())))
+
+    def send(names):
+        attachments = [{'file_name': name, 'content': base64.b64encode(b'Id\n1\n').decode()} for name in names]
+        with app_module.app.app_context():
+            response, status = app_module.process_attachments_sync(
+                attachments, 'sender@example.com', 'Daily exports', date(2025, 1, 5)
+            )
+        return status, response.get_json(), logged
+    return send, concurrency
+
+
+def test_attachments_load_concurrently_in_order(webhook):
+    send, concurrency = webhook
+    names = ['contacts_a.csv', 'forms_a.csv', 'notes.txt', 'contacts_b.csv', 'unknown.csv', 'forms_b.csv']
+    status, body, logged = send(names)
+
+    assert status == 200
+    results = body['processed_files']
+    assert [(r['file'], r['status']) for r in results] == [
+        ('contacts_a.csv', 'success'), ('forms_a.csv', 'success'), ('contacts_b.csv', 'success'),
+        ('unknown.csv', 'skipped'), ('forms_b.csv', 'success'),
+    ]
+    assert concurrency.peak == {'staging.contacts': 1, 'staging.form_submission': 1}
+    assert concurrency.peak_total == 2
+
+    (params,) = logged
+    assert params[3] == ['contacts_a.csv', 'forms_a.csv', 'contacts_b.csv', 'forms_b.csv']
+    assert params[4] == ['unknown.csv'] and params[7] == 'success'
+
+
+def test_one_failure_does_not_stop_the_others(webhook):
+    send, _ = webhook
+    status, body, logged = send(['contacts_broken.csv', 'forms_a.csv'])
+
+    assert [(r['file'], r['status']) for r in body['processed_files']] == [
+        ('contacts_broken.csv', 'failed'), ('forms_a.csv', 'success')
+    ]
+    assert body['processed_files'][0]['error'] == 'QA validation failed'
+    assert logged[0][5] == ['contacts_broken.csv'] and logged[0][7] == 'success'